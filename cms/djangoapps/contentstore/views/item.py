@@ -317,8 +317,12 @@ def xblock_view_handler(request, usage_key_string, view_name):
 
     if 'application/json' in accept_header:
         store = modulestore()
-        xblock = store.get_item(usage_key)
         container_views = ['container_preview', 'reorderable_container_child_preview', 'container_child_preview']
+        if view_name in container_views:
+            # Containers render all of their descendants, so fetch their definitions in one go.
+            xblock = store.get_item(usage_key, depth=None, prefetch_definitions=True)
+        else:
+            xblock = store.get_item(usage_key)
 
         # wrap the generated fragment in the xmodule_editor div so that the javascript
         # can bind to it correctly
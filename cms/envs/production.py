@@ -205,6 +205,10 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+COURSE_STRUCTURE_CACHE_CODEC = ENV_TOKENS.get('COURSE_STRUCTURE_CACHE_CODEC', COURSE_STRUCTURE_CACHE_CODEC)
+COURSE_OVERVIEW_CACHE_SIZE = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_SIZE', COURSE_OVERVIEW_CACHE_SIZE)
+COURSE_OVERVIEW_LOAD_WORKERS = ENV_TOKENS.get('COURSE_OVERVIEW_LOAD_WORKERS', COURSE_OVERVIEW_LOAD_WORKERS)
+
 if 'staticfiles' in CACHES:
     CACHES['staticfiles']['KEY_PREFIX'] = EDX_PLATFORM_REVISION
 
@@ -270,6 +274,7 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_CACHE.update(ENV_TOKENS.get("SAFE_EXEC_CACHE", {}))
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -425,6 +430,8 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
 )
 
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get("CONTENTSERVER_DISK_CACHE", {}))
+CONTENTSERVER_SENDFILE.update(ENV_TOKENS.get("CONTENTSERVER_SENDFILE", {}))
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 
 ############################### BLOCKSTORE #####################################
@@ -3,11 +3,13 @@
 import logging
 import re
 import six
+from django.utils.lru_cache import lru_cache
 from six import text_type
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
+from edx_django_utils.cache import RequestCache
 
 from xmodule.contentstore.content import StaticContent
 
@@ -16,6 +18,17 @@ from opaque_keys.edx.locator import AssetLocator
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+COURSE_URL_PREFIX = '/course/'
+JUMP_TO_ID_URL_PREFIX = '/jump_to_id/'
+
+# Static URLs are resolved once per request: the resolutions and the asset URL
+# configuration are kept in this request cache namespace.
+REQUEST_CACHE_NAMESPACE = 'static_replace'
+
+# The most static URL resolutions kept per request, so that long running
+# processes without requests (e.g. celery workers) don't keep too many.
+MAX_CACHED_URLS = 1000
+
 
 def _url_replace_regex(prefix):
     """
@@ -33,6 +46,58 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _static_url_prefix_regex(data_dir):
+    """
+    Match the prefix of static urls, except those of files in data_dir.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(static_url=settings.STATIC_URL, data_dir=data_dir)
+
+
+@lru_cache(maxsize=64)
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex of prefix.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
+def _get_cached_urls():
+    """
+    Returns the dict of this request's static URL resolutions.
+    """
+    cached_urls = RequestCache(REQUEST_CACHE_NAMESPACE).data.setdefault('urls', {})
+    if len(cached_urls) >= MAX_CACHED_URLS:
+        cached_urls.clear()
+    return cached_urls
+
+
+def _get_asset_url_config():
+    """
+    Returns the asset base URL and the excluded extensions, looked up once per request.
+    """
+    request_cache = RequestCache(REQUEST_CACHE_NAMESPACE)
+    cached_response = request_cache.get_cached_response('asset_url_config')
+    if cached_response.is_found:
+        return cached_response.value
+
+    # Import is placed here to avoid model import at project startup.
+    from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+    config = (AssetBaseUrlConfig.get_base_url(), AssetExcludedExtensionsConfig.get_excluded_extensions())
+    request_cache.set('asset_url_config', config)
+    return config
+
+
+def _exists_in_staticfiles_storage(path):
+    """
+    Returns whether path is in staticfiles_storage, looked up once per request.
+    """
+    cached_urls = _get_cached_urls()
+    key = ('exists', path)
+    if key not in cached_urls:
+        cached_urls[key] = staticfiles_storage.exists(path)
+    return cached_urls[key]
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -74,7 +139,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex(JUMP_TO_ID_URL_PREFIX).sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -94,13 +159,13 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex(COURSE_URL_PREFIX).sub(replace_course_url, text)
 
 
-def process_static_urls(text, replacement_function, data_dir=None):
+def _wrap_static_url_replacement(replacement_function):
     """
-    Run an arbitrary replacement function on any urls matching the static file
-    directory
+    Returns a function replacing the static urls matched by _url_replace_regex
+    with replacement_function.
     """
     def wrap_part_extraction(match):
         """
@@ -124,12 +189,16 @@ def process_static_urls(text, replacement_function, data_dir=None):
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
+    return wrap_part_extraction
+
+
+def process_static_urls(text, replacement_function, data_dir=None):
+    """
+    Run an arbitrary replacement function on any urls matching the static file
+    directory
+    """
+    return _compiled_url_replace_regex(_static_url_prefix_regex(data_dir)).sub(
+        _wrap_static_url_replacement(replacement_function),
         text
     )
 
@@ -151,25 +220,25 @@ def make_static_urls_absolute(request, html):
     )
 
 
-def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path='', static_paths_out=None):
+def _resolve_course_asset_url(course_id, rest):
     """
-    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
-    (/static/$md5_hashed_stuff) or by the course-specific content static url
-    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
-    correct url in the contentstore (/c4x/.. or /asset-loc:..)
-
-    text: The source text to do the substitution in
-    data_directory: The directory in which course data is stored
-    course_id: The course identifier used to distinguish static content for this course in studio
-    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
-    static_paths_out: (optional) pass an array to collect tuples for each static URI found:
-      * the original unmodified static URI
-      * the updated static URI (will match the original if unchanged)
+    Returns the contentstore url of the course asset at rest, looked up once per request.
+    """
+    base_url, excluded_exts = _get_asset_url_config()
+    cached_urls = _get_cached_urls()
+    key = ('course', course_id, rest, base_url, tuple(excluded_exts))
+    if key not in cached_urls:
+        url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+        if AssetLocator.CANONICAL_NAMESPACE in url:
+            url = url.replace('block@', 'block/', 1)
+        cached_urls[key] = url
+    return cached_urls[key]
+
+
+def _static_url_replacement(data_directory, course_id, static_asset_path, static_paths_out):
+    """
+    Returns the replacement function, for process_static_urls, of replace_static_urls.
     """
-
-    if static_paths_out is None:
-        static_paths_out = []
-
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -192,7 +261,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
             exists_in_staticfiles_storage = False
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                exists_in_staticfiles_storage = _exists_in_staticfiles_storage(rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
@@ -202,21 +271,14 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+                url = _resolve_course_asset_url(course_id, rest)
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
+                if _exists_in_staticfiles_storage(rest):
                     url = staticfiles_storage.url(rest)
                 else:
                     url = staticfiles_storage.url(course_path)
@@ -229,4 +291,68 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         static_paths_out.append((original_uri, url))
         return "".join([quote, url, quote])
 
+    return replace_static_url
+
+
+def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path='', static_paths_out=None):
+    """
+    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
+    (/static/$md5_hashed_stuff) or by the course-specific content static url
+    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
+    correct url in the contentstore (/c4x/.. or /asset-loc:..)
+
+    text: The source text to do the substitution in
+    data_directory: The directory in which course data is stored
+    course_id: The course identifier used to distinguish static content for this course in studio
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    static_paths_out: (optional) pass an array to collect tuples for each static URI found:
+      * the original unmodified static URI
+      * the updated static URI (will match the original if unchanged)
+    """
+
+    if static_paths_out is None:
+        static_paths_out = []
+
+    replace_static_url = _static_url_replacement(data_directory, course_id, static_asset_path, static_paths_out)
     return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+
+
+def replace_urls(text, course_id, jump_to_id_base_url=None, data_directory=None, static_asset_path='',
+                 static_paths_out=None):
+    """
+    Replace the /static/, /course/ and /jump_to_id/ urls of text in a single pass:
+    the result is that of replace_static_urls, then replace_course_urls, then
+    replace_jump_to_id_urls (if jump_to_id_base_url is given).
+
+    text: The source text to do the substitution in
+    course_id: The course identifier of the urls
+    jump_to_id_base_url: (optional) The base of the jump_to_id urls, see replace_jump_to_id_urls
+    data_directory, static_asset_path, static_paths_out: see replace_static_urls
+    """
+    if static_paths_out is None:
+        static_paths_out = []
+
+    course_url = '/courses/' + text_type(course_id) + '/'
+    replace_static_url = _wrap_static_url_replacement(
+        _static_url_replacement(data_directory, course_id, static_asset_path, static_paths_out)
+    )
+
+    def replace_url(match):
+        """
+        Replace a single matched url of any of the url families.
+        """
+        prefix = match.group('prefix')
+        if prefix == COURSE_URL_PREFIX:
+            return "".join([match.group('quote'), course_url, match.group('rest'), match.group('quote')])
+        elif prefix == JUMP_TO_ID_URL_PREFIX:
+            if jump_to_id_base_url is None:
+                return match.group(0)
+            return "".join([match.group('quote'), jump_to_id_base_url + match.group('rest'), match.group('quote')])
+        return replace_static_url(match)
+
+    prefix_regex = u'{static}|{course}|{jump_to_id}'.format(
+        static=_static_url_prefix_regex(static_asset_path or data_directory),
+        course=COURSE_URL_PREFIX,
+        jump_to_id=JUMP_TO_ID_URL_PREFIX,
+    )
+    return _compiled_url_replace_regex(prefix_regex).sub(replace_url, text)
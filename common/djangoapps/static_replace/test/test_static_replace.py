@@ -10,6 +10,7 @@ import ddt
 import pytest
 from django.test import override_settings
 from django.utils.http import urlencode, urlquote
+from edx_django_utils.cache import RequestCache
 from mock import Mock, patch
 from opaque_keys.edx.keys import CourseKey
 from PIL import Image
@@ -19,7 +20,9 @@ from static_replace import (
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -37,6 +40,14 @@ COURSE_KEY = CourseKey.from_string('org/course/run')
 STATIC_SOURCE = '"/static/file.png"'
 
 
+@pytest.fixture(autouse=True)
+def clear_request_cache():
+    """
+    Static url resolutions are cached per request: don't let them leak between tests.
+    """
+    RequestCache.clear_all_namespaces()
+
+
 def encode_unicode_characters_in_url(url):
     """
     Encodes all Unicode characters to their percent-encoding representation
@@ -252,6 +263,80 @@ def test_static_url_with_xblock_resource_on_cdn(mock_modulestore, mock_storage):
     assert replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY) == post_text
 
 
+@pytest.mark.django_db
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('xmodule.modulestore.django.modulestore', autospec=True)
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    Make sure replace_urls replaces the urls of all the url families like the separate passes do.
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+
+    text = (
+        '<img src="/static/file.png"/><a href="/course/info">'
+        '<a href=\'/jump_to_id/block\'><a href="/static/js/file.js?raw">'
+        '<img src="/static/xblock/resources/lil_xblock/public/images/pacifier.png"/>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        '/courses/org/course/run/jump_to_id/'
+    )
+    static_paths = []
+    assert replace_urls(
+        text, COURSE_KEY, '/courses/org/course/run/jump_to_id/', DATA_DIRECTORY, static_paths_out=static_paths,
+    ) == expected
+    assert '"/c4x/org/course/asset/file.png"' in expected
+    assert static_paths == [
+        ('/static/file.png', '/c4x/org/course/asset/file.png'),
+        ('/static/js/file.js?raw', '/static/js/file.js?raw'),
+    ]
+
+    # Without a base url, the jump_to_id urls are left alone.
+    assert "'/jump_to_id/block'" in replace_urls(text, COURSE_KEY, data_directory=DATA_DIRECTORY)
+
+
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
+@patch('static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+def test_static_urls_resolved_once(mock_get_excluded_extensions, mock_get_base_url, mock_storage, mock_static_content):
+    """
+    Make sure repeated static urls are resolved, and the asset url configuration loaded, once per request.
+    """
+    mock_storage.exists.return_value = False
+    mock_static_content.get_canonicalized_asset_path.return_value = '/asset-v1:org+course+run+type@asset+block@file.png'
+    mock_get_base_url.return_value = u''
+    mock_get_excluded_extensions.return_value = ['html']
+
+    text = '<img src="/static/file.png"/>' * 10 + '<img src="/static/other.png"/>'
+    replace_static_urls(text, DATA_DIRECTORY, course_id=COURSE_KEY)
+    replace_static_urls(text, DATA_DIRECTORY, course_id=COURSE_KEY)
+
+    assert mock_storage.exists.call_count == 2
+    assert mock_static_content.get_canonicalized_asset_path.call_count == 2
+    mock_get_base_url.assert_called_once_with()
+    mock_get_excluded_extensions.assert_called_once_with()
+
+    # A new request resolves them again.
+    RequestCache.clear_all_namespaces()
+    replace_static_urls(text, DATA_DIRECTORY, course_id=COURSE_KEY)
+    assert mock_storage.exists.call_count == 4
+
+
+@patch('static_replace.MAX_CACHED_URLS', 2)
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_static_url_cache_bounded(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+
+    text = '"/static/a.png" "/static/b.png" "/static/c.png"'
+    assert replace_static_urls(text, DATA_DIRECTORY) == \
+        '"/static/hashed/a.png" "/static/hashed/b.png" "/static/hashed/c.png"'
+    assert len(RequestCache('static_replace').data['urls']) <= 2
+
+
 @ddt.ddt
 class CanonicalContentTest(SharedModuleStoreTestCase):
     """
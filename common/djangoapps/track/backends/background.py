@@ -0,0 +1,343 @@
+"""
+Event tracker backend that sends events to another backend from a
+background thread, so that slow backends don't add latency to requests.
+
+Events are put on a bounded in-process queue, and sent in batches (see
+BaseBackend.send_batch) by a worker thread.  When the queue is full, the
+backpressure policy decides what happens to new events:
+
+  - `block`: wait up to `block_timeout` seconds for room, then drop the event.
+  - `drop`: drop the event.
+  - `spill`: append the event to a file in `spill_dir`, which is sent once the
+    queue has drained.  Use a separate `spill_dir` for each background backend,
+    on a disk which isn't shared with other servers.
+
+Queued and spilled events are sent when the process exits.  The events spilled
+by processes which exited without sending them, e.g. because they were killed,
+are sent by the next process of the backend to start.  Example::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.background.BackgroundBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {'database': 'track'},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'policy': 'spill',
+              'spill_dir': '/edx/var/track/spill',
+          }
+      }
+  }
+
+"""
+
+
+import atexit
+import errno
+import logging
+import os
+import re
+import threading
+import time
+
+import six.moves.cPickle as pickle
+from edx_django_utils import monitoring as monitoring_utils
+from six.moves import queue
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+POLICY_BLOCK = 'block'
+POLICY_DROP = 'drop'
+POLICY_SPILL = 'spill'
+POLICIES = (POLICY_BLOCK, POLICY_DROP, POLICY_SPILL)
+
+# How long the worker waits for events before checking for spilled events or shutdown.
+POLL_INTERVAL = 0.5
+
+# The spill files, and files of spilled events being sent, of the process with the pid.
+SPILL_FILE_RE = re.compile(r'^events-(?P<pid>\d+)\.')
+
+
+class BackgroundBackend(BaseBackend):
+    """
+    Event tracker backend which sends events to another backend from a background thread.
+    """
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, batch_interval=0, policy=POLICY_DROP,
+                 block_timeout=1.0, spill_dir=None, shutdown_timeout=10.0, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: the configuration of the backend the events are sent
+            to, with its `ENGINE` and `OPTIONS` as in TRACKING_BACKENDS
+          - `max_queue_size`: the most events queued in memory
+          - `batch_size`: the most events sent to the backend at once
+          - `batch_interval`: how many seconds to wait for a batch to fill
+            before sending it
+          - `policy`: what to do with events when the queue is full: `block`,
+            `drop` or `spill`
+          - `block_timeout`: how many seconds the `block` policy waits for room
+          - `spill_dir`: the directory of the `spill` policy's files
+          - `shutdown_timeout`: how many seconds to wait on exit for the queued
+            events to be sent
+
+        """
+        super(BackgroundBackend, self).__init__(**kwargs)
+
+        # Imported here, since the tracker instantiates its backends on import.
+        from track.tracker import _instantiate_backend_from_name  # pylint: disable=protected-access
+
+        if policy not in POLICIES:
+            raise ValueError('Invalid event track backpressure policy %s' % policy)
+        if policy == POLICY_SPILL and not spill_dir:
+            raise ValueError('The spill event track backpressure policy needs a spill_dir')
+
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill_dir = spill_dir
+        self.shutdown_timeout = shutdown_timeout
+
+        self.sent = 0
+        self.dropped = 0
+        self.spilled = 0
+
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._stopping = None
+        self._pid = None
+
+        atexit.register(self.close)
+
+    @property
+    def queue_depth(self):
+        """
+        The number of events waiting in the queue.
+        """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        """
+        Returns the counters of the backend's events.
+        """
+        return {
+            'queue_depth': self.queue_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+        }
+
+    def send(self, event):
+        """Queue event to be sent by the background thread."""
+        self._start_worker()
+
+        try:
+            if self.policy == POLICY_BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+
+        if self.policy == POLICY_SPILL:
+            try:
+                self._spill(event)
+                self._count('spilled')
+                return
+            except (IOError, OSError, pickle.PicklingError):
+                log.exception(u'Could not spill event to %s', self.spill_dir)
+
+        self._count('dropped')
+
+    def send_batch(self, events):
+        for event in events:
+            self.send(event)
+
+    def close(self):
+        """
+        Sends the queued and spilled events, waiting at most shutdown_timeout
+        seconds, and stops the background thread.
+        """
+        if self._worker is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._worker.join(self.shutdown_timeout)
+        if self._worker.is_alive():
+            log.warning(u'Timed out sending %d queued events', self.queue_depth)
+        self._worker = None
+
+    def _start_worker(self):
+        """
+        Starts the background thread, if this process doesn't have one yet.
+        """
+        # Forked processes don't inherit their parent's threads, so they need their own.
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue_size)
+            self._stopping = threading.Event()
+            self._worker = threading.Thread(target=self._run, name='track-background-backend')
+            self._worker.daemon = True
+            self._pid = os.getpid()
+            self._worker.start()
+
+    def _count(self, counter):
+        """
+        Increments the counter of that name, and reports it to monitoring.
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        monitoring_utils.accumulate('track.background.{}'.format(counter), 1)
+
+    def _run(self):
+        """
+        Sends the queued events until the backend is closed and everything is sent.
+        """
+        if self.policy == POLICY_SPILL:
+            self._replay_orphaned()
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._send_batch(batch)
+            elif self.policy == POLICY_SPILL and self._replay_spilled():
+                continue
+            elif self._stopping.is_set():
+                return
+
+    def _next_batch(self):
+        """
+        Returns up to batch_size queued events, waiting up to POLL_INTERVAL for
+        the first one, and then up to batch_interval for the others.
+        """
+        try:
+            batch = [self._queue.get(timeout=POLL_INTERVAL)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
+            try:
+                if timeout > 0 and not self._stopping.is_set():
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """
+        Sends batch to the backend.
+        """
+        try:
+            self.backend.send_batch(batch)
+        except Exception:  # pylint: disable=broad-except
+            # As with synchronous backends, the events are lost.
+            log.exception(u'Error sending %d events to the %s event tracker backend',
+                          len(batch), self.backend.__class__.__name__)
+            return
+        with self._lock:
+            self.sent += len(batch)
+
+    def _spill_path(self):
+        """
+        Returns the path of this process' spill file.
+        """
+        return os.path.join(self.spill_dir, 'events-{}.spill'.format(os.getpid()))
+
+    def _spill(self, event):
+        """
+        Appends event to the spill file.
+        """
+        with self._spill_lock:
+            with open(self._spill_path(), 'ab') as spill_file:
+                pickle.dump(event, spill_file, pickle.HIGHEST_PROTOCOL)
+
+    def _replay_spilled(self):
+        """
+        Sends the spilled events to the backend, and returns whether there were any.
+        """
+        path = self._spill_path()
+        replay_path = path + '.replay'
+        with self._spill_lock:
+            try:
+                # Events spilled from now on go to a new file.
+                os.rename(path, replay_path)
+            except OSError:
+                return False
+        self._replay(replay_path)
+        return True
+
+    def _replay_orphaned(self):
+        """
+        Sends the events spilled by processes which have exited, but didn't
+        send them, e.g. because they were killed or timed out on exit.
+        """
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return
+        for name in names:
+            match = SPILL_FILE_RE.match(name)
+            if match is None or _is_process_alive(int(match.group('pid'))):
+                continue
+            # The file is renamed as this process', so that it is sent again if
+            # this process doesn't send it either.  Only one of the processes
+            # starting at once can rename it.
+            replay_path = os.path.join(self.spill_dir, 'events-{}.orphan.{}'.format(os.getpid(), name))
+            try:
+                os.rename(os.path.join(self.spill_dir, name), replay_path)
+            except OSError:
+                continue
+            log.info(u'Sending the events spilled to %s by an exited process', name)
+            self._replay(replay_path)
+
+    def _replay(self, replay_path):
+        """
+        Sends the spilled events of replay_path to the backend, and removes it.
+        """
+        batch = []
+        try:
+            with open(replay_path, 'rb') as replay_file:
+                while True:
+                    try:
+                        batch.append(pickle.load(replay_file))
+                    except EOFError:
+                        break
+                    if len(batch) >= self.batch_size:
+                        self._send_batch(batch)
+                        batch = []
+        except (IOError, OSError, pickle.UnpicklingError):
+            log.exception(u'Could not read spilled events from %s', replay_path)
+        if batch:
+            self._send_batch(batch)
+
+        try:
+            os.unlink(replay_path)
+        except OSError:
+            pass
+
+
+def _is_process_alive(pid):
+    """
+    Returns whether a process with the pid is running.
+    """
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        # The process exists, but belongs to another user.
+        return error.errno == errno.EPERM
+    return True
@@ -2,19 +2,41 @@
 
 
 import logging
+import time
 
 import pymongo
 from bson.errors import BSONError
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError, PyMongoError
 
 from track.backends import BaseBackend
 
 log = logging.getLogger(__name__)
 
+# The code of duplicate key write errors.
+DUPLICATE_KEY_ERROR = 11000
+
 
 class MongoBackend(BaseBackend):
-    """Class for a MongoDB event tracker Backend"""
+    """
+    Class for a MongoDB event tracker Backend
+
+    To insert events in bulk, from a background thread, wrap it in a
+    `track.backends.background.BackgroundBackend`::
+
+      'mongo': {
+          'ENGINE': 'track.backends.background.BackgroundBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'batch_size': 500,
+              'batch_interval': 1,
+          }
+      }
+
+    """
 
     def __init__(self, **kwargs):
         """
@@ -30,6 +52,10 @@ class MongoBackend(BaseBackend):
           - `collection`: name of the collection
           - 'authsource': name of the authentication database
           - `extra`: parameters to pymongo.MongoClient not listed above
+          - `retries`: how many times to retry inserting batches of events
+            after connection errors
+          - `retry_delay`: how many seconds to wait before the first retry,
+            doubled for each later one
 
         """
 
@@ -48,6 +74,9 @@ class MongoBackend(BaseBackend):
 
         auth_source = kwargs.get('authsource') or None
 
+        self.retries = kwargs.get('retries', 2)
+        self.retry_delay = kwargs.get('retry_delay', 0.1)
+
         # Other mongo connection arguments
         extra = kwargs.get('extra', {})
 
@@ -98,3 +127,50 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection, with a single unordered insert"""
+        if not events:
+            return
+        # insert_many adds an _id to the documents: don't change the events, which other backends may be sending.
+        documents = [dict(event) for event in events]
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                self.collection.insert_many(documents, ordered=False)
+                return
+            except BulkWriteError as error:
+                # A retried insert fails on the documents inserted by an earlier attempt.
+                errors = error.details.get('writeErrors', [])
+                if attempt and all(write_error.get('code') == DUPLICATE_KEY_ERROR for write_error in errors):
+                    return
+                log.exception('Error inserting %d events to MongoDB event tracker backend', len(documents))
+                return
+            except AutoReconnect:
+                if attempt == self.retries:
+                    # As with single events, the events are lost.
+                    log.exception('Error inserting %d events to MongoDB event tracker backend', len(documents))
+                    return
+                log.warning('Retrying insert of %d events to MongoDB event tracker backend', len(documents))
+                time.sleep(delay)
+                delay *= 2
+            except BSONError:
+                # An event which can't be encoded fails the whole batch, so
+                # insert the events one by one to only lose that event.
+                log.warning('Inserting %d events to MongoDB event tracker backend one by one', len(documents))
+                self._insert_one_by_one(documents)
+                return
+            except PyMongoError:
+                log.exception('Error inserting %d events to MongoDB event tracker backend', len(documents))
+                return
+
+    def _insert_one_by_one(self, documents):
+        """Insert the documents of a failed batch in to the Mongo collection, one at a time"""
+        for document in documents:
+            try:
+                self.collection.insert_one(document)
+            except DuplicateKeyError:
+                # Inserted by the batch before it failed.
+                pass
+            except (PyMongoError, BSONError):
+                log.exception('Error inserting to MongoDB event tracker backend')
@@ -0,0 +1,158 @@
+"""Tests for the background event tracker backend."""
+
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+import six.moves.cPickle as pickle
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.background import BackgroundBackend
+
+
+class RecordingBackend(BaseBackend):
+    """
+    Records the batches of events it's sent, after waiting for `release` if given.
+    """
+    def __init__(self, release=None, **kwargs):
+        super(RecordingBackend, self).__init__(**kwargs)
+        self.release = release
+        self.batches = []
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        if self.release is not None:
+            self.release.wait()
+        self.batches.append(list(events))
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+
+@patch('track.backends.background.monitoring_utils')
+class TestBackgroundBackend(TestCase):
+    """Tests for BackgroundBackend"""
+
+    def setUp(self):
+        super(TestBackgroundBackend, self).setUp()
+        self.release = threading.Event()
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir)
+
+    def make_backend(self, **options):
+        """
+        Returns a BackgroundBackend sending events to a RecordingBackend which waits for self.release.
+        """
+        backend = BackgroundBackend(
+            backend={
+                'ENGINE': 'track.backends.tests.test_background.RecordingBackend',
+                'OPTIONS': {'release': self.release},
+            },
+            **options
+        )
+        self.addCleanup(backend.close)
+        self.addCleanup(self.release.set)
+        return backend
+
+    def wait_for_empty_queue(self, backend, timeout=5):
+        """
+        Waits until the worker has taken all the queued events of backend.
+        """
+        deadline = time.time() + timeout
+        while backend.queue_depth and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(backend.queue_depth, 0)
+
+    def test_batches(self, __):
+        backend = self.make_backend(batch_size=3)
+        for index in range(8):
+            backend.send({'index': index})
+        self.release.set()
+        backend.close()
+
+        self.assertEqual(backend.backend.events, [{'index': index} for index in range(8)])
+        self.assertTrue(all(len(batch) <= 3 for batch in backend.backend.batches))
+        self.assertEqual(backend.stats(), {'queue_depth': 0, 'sent': 8, 'dropped': 0, 'spilled': 0})
+
+    def test_batch_interval(self, __):
+        self.release.set()
+        backend = self.make_backend(batch_size=3, batch_interval=5)
+        for index in range(3):
+            backend.send({'index': index})
+        backend.close()
+
+        # The worker waited for the batch to fill.
+        self.assertEqual(backend.backend.batches, [[{'index': index} for index in range(3)]])
+
+    def test_drop(self, mock_monitoring):
+        backend = self.make_backend(max_queue_size=2, batch_size=1, policy='drop')
+        for index in range(10):
+            backend.send({'index': index})
+        self.release.set()
+        backend.close()
+
+        # At most one event is held by the worker, and two queued.
+        self.assertGreaterEqual(backend.dropped, 7)
+        self.assertEqual(len(backend.backend.events) + backend.dropped, 10)
+        mock_monitoring.accumulate.assert_called_with('track.background.dropped', 1)
+
+    def test_block(self, __):
+        backend = self.make_backend(max_queue_size=1, batch_size=1, policy='block', block_timeout=0.01)
+        for index in range(5):
+            backend.send({'index': index})
+        self.assertGreaterEqual(backend.dropped, 2)
+
+        self.release.set()
+        self.wait_for_empty_queue(backend)
+        backend.send({'index': 5})
+        backend.close()
+        self.assertEqual(backend.backend.events[-1], {'index': 5})
+
+    def test_spill(self, mock_monitoring):
+        backend = self.make_backend(max_queue_size=2, batch_size=2, policy='spill', spill_dir=self.spill_dir)
+        for index in range(10):
+            backend.send({'index': index})
+        # At most two events are held by the worker, and two queued.
+        self.assertGreaterEqual(backend.spilled, 6)
+        self.assertEqual(os.listdir(self.spill_dir), ['events-{}.spill'.format(os.getpid())])
+
+        self.release.set()
+        backend.close()
+
+        self.assertEqual(sorted(event['index'] for event in backend.backend.events), list(range(10)))
+        self.assertEqual(backend.stats()['sent'], 10)
+        self.assertEqual(backend.dropped, 0)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+        mock_monitoring.accumulate.assert_called_with('track.background.spilled', 1)
+
+    def test_spilled_by_exited_process(self, __):
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        for pid in (exited.pid, os.getppid()):
+            with open(os.path.join(self.spill_dir, 'events-{}.spill'.format(pid)), 'wb') as spill_file:
+                pickle.dump({'pid': pid}, spill_file, pickle.HIGHEST_PROTOCOL)
+
+        self.release.set()
+        backend = self.make_backend(policy='spill', spill_dir=self.spill_dir)
+        backend.send({'index': 0})
+        backend.close()
+
+        # Only the events spilled by the exited process are sent, when the worker starts.
+        self.assertEqual(backend.backend.events, [{'pid': exited.pid}, {'index': 0}])
+        self.assertEqual(os.listdir(self.spill_dir), ['events-{}.spill'.format(os.getppid())])
+
+    def test_invalid_options(self, __):
+        with self.assertRaises(ValueError):
+            self.make_backend(policy='ignore')
+        with self.assertRaises(ValueError):
+            self.make_backend(policy='spill')
@@ -2,6 +2,8 @@
 
 from django.test import TestCase
 from mock import patch
+from bson.errors import InvalidDocument
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError
 
 from track.backends.mongodb import MongoBackend
 
@@ -36,3 +38,65 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_send_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        self.backend.collection.insert_many.assert_called_once_with(events, ordered=False)
+        # The documents inserted are copies of the events.
+        self.assertIsNot(self.backend.collection.insert_many.call_args[0][0][0], events[0])
+
+    @patch('track.backends.mongodb.time.sleep')
+    def test_send_batch_retries(self, mock_sleep):
+        insert_many = self.backend.collection.insert_many
+        insert_many.side_effect = [AutoReconnect(), AutoReconnect(), None]
+
+        self.backend.send_batch([{'test': 1}])
+
+        self.assertEqual(insert_many.call_count, 3)
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [0.1, 0.2])
+
+    @patch('track.backends.mongodb.time.sleep')
+    def test_send_batch_retry_inserted_events(self, __):
+        insert_many = self.backend.collection.insert_many
+        insert_many.side_effect = [
+            AutoReconnect(),
+            BulkWriteError({'writeErrors': [{'code': 11000, 'index': 0}]}),
+        ]
+
+        with patch('track.backends.mongodb.log') as mock_log:
+            self.backend.send_batch([{'test': 1}, {'test': 2}])
+
+        self.assertEqual(insert_many.call_count, 2)
+        self.assertFalse(mock_log.exception.called)
+
+    @patch('track.backends.mongodb.time.sleep')
+    def test_send_batch_gives_up(self, __):
+        insert_many = self.backend.collection.insert_many
+        insert_many.side_effect = AutoReconnect()
+
+        with patch('track.backends.mongodb.log') as mock_log:
+            self.backend.send_batch([{'test': 1}])
+
+        self.assertEqual(insert_many.call_count, 3)
+        self.assertTrue(mock_log.exception.called)
+
+    def test_send_batch_invalid_event(self):
+        insert_many = self.backend.collection.insert_many
+        insert_many.side_effect = InvalidDocument("key 'a.b' must not contain '.'")
+        insert_one = self.backend.collection.insert_one
+        insert_one.side_effect = [
+            DuplicateKeyError('inserted'),
+            InvalidDocument("key 'a.b' must not contain '.'"),
+            None,
+        ]
+        events = [{'test': 1}, {'a.b': 2}, {'test': 3}]
+
+        with patch('track.backends.mongodb.log') as mock_log:
+            self.backend.send_batch(events)
+
+        # Only the invalid event is lost.
+        self.assertEqual([call[0][0] for call in insert_one.call_args_list], events)
+        self.assertEqual(mock_log.exception.call_count, 1)
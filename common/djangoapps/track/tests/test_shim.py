@@ -4,8 +4,9 @@
 from collections import namedtuple
 
 import ddt
+from django.test import TestCase
 from django.test.utils import override_settings
-from mock import sentinel
+from mock import patch, sentinel
 
 from openedx.core.lib.tests.assertions.events import assert_events_equal
 
@@ -260,6 +261,50 @@ class EventTransformerRegistryTestCase(EventTrackingTestCase):
             self.registry.create_transformer(event)
 
 
+class DottedPathMappingTestCase(TestCase):
+    """
+    Test the lookups of DottedPathMapping
+    """
+
+    def test_lookups(self):
+        mapping = transformers.DottedPathMapping()
+        mapping[u'edx.'] = sentinel.edx
+        mapping[u'edx.video.'] = sentinel.video
+        mapping[u'edx.video.played'] = sentinel.played
+
+        self.assertEqual(mapping[u'edx.video.played'], sentinel.played)
+        self.assertEqual(mapping[u'edx.video.paused'], sentinel.video)
+        self.assertEqual(mapping[u'edx.ui.lms.link_clicked'], sentinel.edx)
+        self.assertEqual(mapping.get(u'edx.video.paused'), sentinel.video)
+        self.assertEqual(mapping.get(u'problem_check', sentinel.default), sentinel.default)
+        self.assertNotIn(u'problem_check', mapping)
+        self.assertNotIn(None, mapping)
+        with self.assertRaises(KeyError):
+            mapping[u'problem_check']  # pylint: disable=pointless-statement
+
+    def test_changes_clear_lookups(self):
+        mapping = transformers.DottedPathMapping()
+        mapping[u'edx.'] = sentinel.edx
+        self.assertEqual(mapping[u'edx.video.paused'], sentinel.edx)
+        self.assertNotIn(u'problem_check', mapping)
+
+        mapping[u'edx.video.'] = sentinel.video
+        mapping[u'problem_check'] = sentinel.problem_check
+        self.assertEqual(mapping[u'edx.video.paused'], sentinel.video)
+        self.assertEqual(mapping[u'problem_check'], sentinel.problem_check)
+
+        del mapping[u'edx.video.']
+        self.assertEqual(mapping[u'edx.video.paused'], sentinel.edx)
+
+    @patch.object(transformers.DottedPathMapping, 'MAX_RESOLVED_KEYS', 2)
+    def test_bounded_lookups(self):
+        mapping = transformers.DottedPathMapping()
+        mapping[u'edx.'] = sentinel.edx
+        for index in range(5):
+            self.assertIsNone(mapping.get(u'unregistered_{}'.format(index)))
+        self.assertLessEqual(len(mapping._resolved), 2)  # pylint: disable=protected-access
+
+
 @ddt.ddt
 class PrefixedEventProcessorTestCase(EventTrackingTestCase):
     """
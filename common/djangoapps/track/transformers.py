@@ -15,6 +15,9 @@ from opaque_keys.edx.keys import UsageKey
 
 log = logging.getLogger(__name__)
 
+# The value of keys missing from a DottedPathMapping.
+_NOT_FOUND = object()
+
 
 class DottedPathMapping(object):
     """
@@ -24,58 +27,83 @@ class DottedPathMapping(object):
     prefix.  Any value whose prefix matches the dotted path can be used
     as a key for that value, but only the most specific match will
     be used.
+
+    The values of looked up keys, or their absence, are cached until the
+    mapping changes, so that each event name is only resolved once.
     """
 
-    # TODO: The current implementation of the prefix registry requires
-    # O(number of prefix event transformers) to access an event.  If we get a
-    # large number of EventTransformers, it may be worth writing a tree-based
-    # map structure where each node is a segment of the match key, which would
-    # reduce access time to O(len(match.key.split('.'))), or essentially constant
-    # time.
+    # The most looked up keys cached, since event names can come from clients.
+    MAX_RESOLVED_KEYS = 1000
 
     def __init__(self, registry=None):
         self._match_registry = {}
         self._prefix_registry = {}
+        self._sorted_prefixes = ()
+        self._resolved = {}
         self.update(registry or {})
 
     def __contains__(self, key):
-        try:
-            _ = self[key]
-            return True
-        except KeyError:
-            return False
+        return self._resolve(key) is not _NOT_FOUND
 
     def __getitem__(self, key):
-        if key in self._match_registry:
-            return self._match_registry[key]
-        if isinstance(key, six.string_types):
-            # Reverse-sort the keys to find the longest matching prefix.
-            for prefix in sorted(self._prefix_registry, reverse=True):
-                if key.startswith(prefix):
-                    return self._prefix_registry[prefix]
-        raise KeyError('Key {} not found in {}'.format(key, type(self)))
+        value = self._resolve(key)
+        if value is _NOT_FOUND:
+            raise KeyError('Key {} not found in {}'.format(key, type(self)))
+        return value
 
     def __setitem__(self, key, value):
         if key.endswith('.'):
             self._prefix_registry[key] = value
         else:
             self._match_registry[key] = value
+        self._registry_changed()
 
     def __delitem__(self, key):
         if key.endswith('.'):
             del self._prefix_registry[key]
         else:
             del self._match_registry[key]
+        self._registry_changed()
+
+    def _registry_changed(self):
+        """
+        Recompute the lookup structures after a change to the registries.
+        """
+        # Reverse-sort the prefixes to find the longest matching prefix first.
+        self._sorted_prefixes = tuple(sorted(self._prefix_registry, reverse=True))
+        self._resolved = {}
+
+    def _resolve(self, key):
+        """
+        Return the value of `key`, or `_NOT_FOUND`.
+        """
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable keys are never found.
+            return _NOT_FOUND
+
+        value = self._match_registry.get(key, _NOT_FOUND)
+        if value is _NOT_FOUND and isinstance(key, six.string_types):
+            for prefix in self._sorted_prefixes:
+                if key.startswith(prefix):
+                    value = self._prefix_registry[prefix]
+                    break
+
+        if len(self._resolved) >= self.MAX_RESOLVED_KEYS:
+            self._resolved = {}
+        self._resolved[key] = value
+        return value
 
     def get(self, key, default=None):
         """
         Return `self[key]` if it exists, otherwise, return `None` or `default`
         if it is specified.
         """
-        try:
-            self[key]
-        except KeyError:
-            return default
+        value = self._resolve(key)
+        return default if value is _NOT_FOUND else value
 
     def update(self, dict_):
         """
@@ -122,6 +150,14 @@ class EventTransformerRegistry(object):
         name = event.get(u'name')
         return cls.mapping[name](event)
 
+    @classmethod
+    def get_transformer_class(cls, name):
+        """
+        Return the EventTransformer class of events named `name`, or None if
+        no transformer is registered to handle them.
+        """
+        return cls.mapping.get(name)
+
 
 class EventTransformer(dict):
     """
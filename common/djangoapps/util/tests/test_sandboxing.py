@@ -3,12 +3,14 @@ Tests for sandboxing.py in util app
 """
 
 
+from django.core.cache import caches
 from django.test import TestCase
 from django.test.utils import override_settings
+from mock import patch
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 
-from xmodule.util.sandboxing import can_execute_unsafe_code
+from xmodule.util.sandboxing import SafeExecCache, can_execute_unsafe_code
 
 
 class SandboxingTest(TestCase):
@@ -39,3 +41,50 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(CourseLocator('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(CourseLocator('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class SafeExecCacheTest(TestCase):
+    """
+    Test the shared cache of safe_exec results
+    """
+    def setUp(self):
+        super(SafeExecCacheTest, self).setUp()
+        caches['default'].clear()
+
+    def test_miss_then_hit(self):
+        cache = SafeExecCache()
+        self.assertIsNone(cache.get('safe_exec.key'))
+        cache.set('safe_exec.key', (None, {'a': 3}))
+        self.assertEqual(SafeExecCache().get('safe_exec.key'), (None, {'a': 3}))
+
+    @override_settings(SAFE_EXEC_CACHE={'TIMEOUT': 100, 'EXCEPTION_TIMEOUT': 10})
+    def test_timeouts(self):
+        cache = SafeExecCache()
+        with patch.object(cache.cache, 'set') as mock_set:
+            cache.set('safe_exec.success', (None, {'a': 3}))
+            cache.set('safe_exec.failure', ('ZeroDivisionError', {}))
+        mock_set.assert_any_call('safe_exec.success', (None, {'a': 3}), 100)
+        mock_set.assert_any_call('safe_exec.failure', ('ZeroDivisionError', {}), 10)
+
+    @override_settings(SAFE_EXEC_CACHE={'MAX_ENTRY_SIZE': 1024})
+    def test_oversized_results_not_cached(self):
+        cache = SafeExecCache()
+        cache.set('safe_exec.small', (None, {'a': 'x'}))
+        cache.set('safe_exec.large', (None, {'a': 'x' * 2048}))
+        self.assertIsNotNone(cache.get('safe_exec.small'))
+        self.assertIsNone(cache.get('safe_exec.large'))
+
+    @override_settings(SAFE_EXEC_CACHE={'ALIAS': None})
+    def test_disabled(self):
+        cache = SafeExecCache()
+        cache.set('safe_exec.key', (None, {'a': 3}))
+        self.assertIsNone(cache.get('safe_exec.key'))
+
+    @override_settings(SAFE_EXEC_CACHE={'ALIAS': 'nonexistent'})
+    def test_missing_cache(self):
+        cache = SafeExecCache()
+        cache.set('safe_exec.key', (None, {'a': 3}))
+        self.assertIsNone(cache.get('safe_exec.key'))
@@ -32,6 +32,7 @@ import capa.inputtypes as inputtypes
 import capa.responsetypes as responsetypes
 import capa.xqueue_interface as xqueue_interface
 from capa.correctmap import CorrectMap
+from capa.parse_cache import ParsedProblem, parsed_problem_cache
 from capa.safe_exec import safe_exec
 from capa.util import contextualize_text, convert_files_to_filenames
 from django.utils.encoding import python_2_unicode_compatible
@@ -172,28 +173,17 @@ class LoncapaProblem(object):
         self.seed = state.get('seed', seed)
         assert self.seed is not None, "Seed must be provided for LoncapaProblem."
 
-        self.student_answers = state.get('student_answers', {})
-        self.has_saved_answers = state.get('has_saved_answers', False)
-        if 'correct_map' in state:
-            self.correct_map.set_dict(state['correct_map'])
-        self.done = state.get('done', False)
-        self.input_state = state.get('input_state', {})
+        self.set_state(state)
 
         # Convert startouttext and endouttext to proper <text></text>
         problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        if isinstance(problem_text, six.text_type):
-            # etree chokes on Unicode XML with an encoding declaration
-            problem_text = problem_text.encode('utf-8')
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, and add ID's to its responses and inputs
+        parsed_problem = self._parse_problem(problem_text)
+        self.tree = parsed_problem.tree
+        self.problem_data = parsed_problem.problem_data
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -201,11 +191,10 @@ class LoncapaProblem(object):
         else:
             self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
+        # Pre-parse the XML tree: this creates the dict (self.responders) of Response
         # instances for each question in the problem. The dict has keys = xml subtree of
         # Response, values = Response instance
-        self.problem_data = self._preprocess_problem(self.tree, minimal_init)
+        self._preprocess_problem(self.tree, parsed_problem.responses, minimal_init)
 
         if not minimal_init:
             if not self.student_answers:  # True when student_answers is an empty dict
@@ -323,6 +312,20 @@ class LoncapaProblem(object):
                 'input_state': self.input_state,
                 'done': self.done}
 
+    def set_state(self, state):
+        """
+        Replace the student's answers and correctness with those of `state`, as
+        returned by `get_state`, so the problem can grade another student's
+        state with the same seed without being recreated.
+        """
+        self.student_answers = state.get('student_answers', {})
+        self.has_saved_answers = state.get('has_saved_answers', False)
+        self.correct_map = CorrectMap()
+        if 'correct_map' in state:
+            self.correct_map.set_dict(state['correct_map'])
+        self.done = state.get('done', False)
+        self.input_state = state.get('input_state', {})
+
     def get_max_score(self):
         """
         Return the maximum score for this problem.
@@ -1056,20 +1059,53 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree, minimal_init):  # private
+    def _parse_problem(self, problem_text):  # private
+        """
+        Parse the problem XML into a ParsedProblem: its tree, made compatible
+        and with its includes inserted, with IDs assigned to its responses and
+        inputs (see _assign_ids), and the problem data of its responses.
+
+        None of this depends on the seed, so it's done once per problem and
+        version, and cached (see capa.parse_cache).  Problems with includes
+        aren't cached, since the files they include can change.
+        """
+        cache_key = None
+        if '<include' not in problem_text:
+            cache_key = parsed_problem_cache.key(self.problem_id, problem_text)
+            parsed_problem = parsed_problem_cache.get(cache_key)
+            if parsed_problem is not None:
+                return parsed_problem
+
+        if isinstance(problem_text, six.text_type):
+            # etree chokes on Unicode XML with an encoding declaration
+            problem_text = problem_text.encode('utf-8')
+        self.tree = etree.XML(problem_text)
+
+        self.make_xml_compatible(self.tree)
+
+        # handle any <include file="foo"> tags
+        self._process_includes()
+
+        problem_data = {}
+        responses = self._assign_ids(self.tree, problem_data)
+        parsed_problem = ParsedProblem(self.tree, problem_data, responses)
+
+        if cache_key is not None:
+            parsed_problem_cache.set(cache_key, parsed_problem)
+        return parsed_problem
+
+    def _assign_ids(self, tree, problem_data):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
+        Also fill problem_data with the a11y data of the responses.
 
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns a list of (response, inputfields) pairs.
         """
         response_id = 1
-        problem_data = {}
-        self.responders = {}
+        responses = []
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -1091,7 +1127,22 @@ class LoncapaProblem(object):
                 answer_id = answer_id + 1
 
             self.response_a11y_data(response, inputfields, responsetype_id, problem_data)
+            responses.append((response, inputfields))
+
+        return responses
+
+    def _preprocess_problem(self, tree, responses, minimal_init):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
 
+        Create capa Response instances for each responsetype, given by the
+        (response, inputfields) pairs of responses, and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in responses:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(
@@ -1120,8 +1171,6 @@ class LoncapaProblem(object):
                 solution.attrib['id'] = "%s_solution_%i" % (self.problem_id, solution_id)
                 solution_id += 1
 
-        return problem_data
-
     def response_a11y_data(self, response, inputfields, responsetype_id, problem_data):
         """
         Construct data to be used for a11y.
@@ -0,0 +1,111 @@
+"""
+A process-wide cache of the seed independent part of parsing capa problems.
+
+Parsing a problem's XML, making it compatible, and assigning the ids of its
+responses and inputs (see LoncapaProblem._parse_problem) gives the same tree
+for every learner, so it is done once per problem and version, and each
+LoncapaProblem gets its own copy of the resulting tree.  Only the seed dependent
+steps, running the problem's scripts and creating its responders, are redone.
+"""
+
+
+import hashlib
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+import six
+
+# The most parsed problems cached per process.
+PARSED_PROBLEM_CACHE_SIZE = 1000
+
+
+class ParsedProblem(object):
+    """
+    A parsed problem tree, with its problem data and the elements of its responses and their inputs.
+
+    `responses` is a list of (response element, list of input elements) pairs.
+    """
+    def __init__(self, tree, problem_data, responses):
+        self.tree = tree
+        self.problem_data = problem_data
+        self.responses = responses
+
+    def freeze(self):
+        """
+        Returns a copy of this parsed problem to cache, which refers to its
+        elements by their position in the tree, so that they can be found in
+        copies of the tree.
+        """
+        positions = {element: index for index, element in enumerate(self.tree.iter())}
+        responses = [
+            (positions[response], [positions[inputfield] for inputfield in inputfields])
+            for response, inputfields in self.responses
+        ]
+        return ParsedProblem(deepcopy(self.tree), deepcopy(self.problem_data), responses)
+
+    def thaw(self):
+        """
+        Returns a copy of this frozen parsed problem, with its own tree.
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        responses = [
+            (elements[response], [elements[inputfield] for inputfield in inputfields])
+            for response, inputfields in self.responses
+        ]
+        return ParsedProblem(tree, deepcopy(self.problem_data), responses)
+
+
+class ParsedProblemCache(object):
+    """
+    A bounded, least recently used, cache of parsed problems.
+    """
+    def __init__(self, max_size=PARSED_PROBLEM_CACHE_SIZE):
+        self.max_size = max_size
+        self._problems = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(problem_id, problem_text):
+        """
+        Returns the cache key of the problem with that id and XML text.
+        """
+        if isinstance(problem_text, six.text_type):
+            problem_text = problem_text.encode('utf-8')
+        return problem_id, hashlib.sha1(problem_text).hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the cached ParsedProblem of key, or None.
+        """
+        with self._lock:
+            frozen = self._problems.pop(key, None)
+            if frozen is None:
+                return None
+            self._problems[key] = frozen
+        return frozen.thaw()
+
+    def set(self, key, parsed_problem):
+        """
+        Caches a copy of parsed_problem.
+        """
+        frozen = parsed_problem.freeze()
+        with self._lock:
+            self._problems.pop(key, None)
+            self._problems[key] = frozen
+            while len(self._problems) > self.max_size:
+                self._problems.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all the cached problems.
+        """
+        with self._lock:
+            self._problems.clear()
+
+    def __len__(self):
+        return len(self._problems)
+
+
+parsed_problem_cache = ParsedProblemCache()  # pylint: disable=invalid-name
@@ -3090,66 +3090,111 @@ class FormulaResponse(LoncapaResponse):
         Each dictionary represents a test case for the answer.
         Returns a tuple of formula evaluation results.
         """
+        if not var_dict_list:
+            return []
+
+        # Evaluating the answer over all the samples at once parses it once,
+        # rather than once per sample.  Its result for the first sample must
+        # match that of the sample by sample evaluation, which also raises the
+        # errors of invalid answers.
+        first = self._evaluate_formula(answer, var_dict_list[0])
+        results = self._evaluate_formula_samples(answer, var_dict_list)
+        if results is not None and (results[0] == first or (isnan(results[0]) and isnan(first))):
+            return [first] + results[1:]
+
+        return [first] + [self._evaluate_formula(answer, var_dict) for var_dict in var_dict_list[1:]]
+
+    def _evaluate_formula_samples(self, answer, var_dict_list):
+        """
+        Evaluates answer for all the var_dict_list samples at once, with the
+        variables as NumPy arrays of their values, and returns the list of
+        results, or None if it can't be evaluated that way.
+
+        The evaluation fails on anything NumPy would handle differently from
+        the sample by sample evaluation, such as division by zero or powers of
+        negative numbers, so that these answers are evaluated sample by sample.
+        """
+        if len(var_dict_list) < 2:
+            return None
+        variables = {
+            var: numpy.array([var_dict[var] for var_dict in var_dict_list])
+            for var in var_dict_list[0]
+        }
+        try:
+            with numpy.errstate(all='raise'):
+                results = numpy.asarray(evaluator(variables, dict(), answer, case_sensitive=self.case_sensitive))
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if results.shape != (len(var_dict_list),) or results.dtype.kind not in 'fc':
+            return None
+
+        # Like the sample by sample evaluation, give real results for real values.
+        return [
+            value.real if isinstance(value, complex) and value.imag == 0 else value
+            for value in results.tolist()
+        ]
+
+    def _evaluate_formula(self, answer, var_dict):
+        """
+        Evaluates answer for the variable values of var_dict.
+        """
         _ = edx_six.get_gettext(self.capa_system.i18n)
 
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as err:
-                log.debug(
-                    'formularesponse: undefined variable in formula=%s',
-                    cgi.escape(answer)
-                )
-                raise StudentInputError(
-                    err.args[0]
-                )
-            except UnmatchedParenthesis as err:
+        try:
+            return evaluator(
+                var_dict,
+                dict(),
+                answer,
+                case_sensitive=self.case_sensitive,
+            )
+        except UndefinedVariable as err:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s',
+                cgi.escape(answer)
+            )
+            raise StudentInputError(
+                err.args[0]
+            )
+        except UnmatchedParenthesis as err:
+            log.debug(
+                'formularesponse: unmatched parenthesis in formula=%s',
+                cgi.escape(answer)
+            )
+            raise StudentInputError(
+                err.args[0]
+            )
+        except ValueError as err:
+            if 'factorial' in text_type(err):
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # text_type(err) will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: unmatched parenthesis in formula=%s',
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'Provided answer was: %s'),
                     cgi.escape(answer)
                 )
                 raise StudentInputError(
-                    err.args[0]
+                    _("Factorial function not permitted in answer "
+                      "for this problem. Provided answer was: "
+                      "{bad_input}").format(bad_input=cgi.escape(answer))
                 )
-            except ValueError as err:
-                if 'factorial' in text_type(err):
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # text_type(err) will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'Provided answer was: %s'),
-                        cgi.escape(answer)
-                    )
-                    raise StudentInputError(
-                        _("Factorial function not permitted in answer "
-                          "for this problem. Provided answer was: "
-                          "{bad_input}").format(bad_input=cgi.escape(answer))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
+                    bad_input=cgi.escape(answer)
                 )
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            )
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula").format(
+                    bad_input=cgi.escape(answer)
                 )
-        return out
+            )
 
     def randomize_variables(self, samples):
         """
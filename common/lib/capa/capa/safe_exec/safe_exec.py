@@ -107,7 +107,7 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed, the python path, and the extra files.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -121,6 +121,12 @@ def safe_exec(
         md5er = hashlib.md5()
         md5er.update(repr(code).encode('utf-8'))
         update_hash(md5er, safe_globals)
+        # The same code can give different results with different libraries,
+        # e.g. the python_lib.zip of different courses.
+        update_hash(md5er, python_path or [])
+        for filename, contents in extra_files or []:
+            update_hash(md5er, filename)
+            md5er.update(contents if isinstance(contents, bytes) else contents.encode('utf-8'))
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
         if cached is not None:
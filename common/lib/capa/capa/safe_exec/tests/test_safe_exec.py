@@ -170,6 +170,22 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_keyed_on_libraries(self):
+        # The same code run against different course libraries is cached
+        # separately, since the libraries can change the result.
+        cache = {}
+        safe_exec("a = 1", {}, cache=DictCache(cache))
+        safe_exec("a = 1", {}, cache=DictCache(cache), python_path=["lib.zip"])
+        safe_exec(
+            "a = 1", {}, cache=DictCache(cache), python_path=["lib.zip"],
+            extra_files=[("lib.zip", b"version 1")],
+        )
+        safe_exec(
+            "a = 1", {}, cache=DictCache(cache), python_path=["lib.zip"],
+            extra_files=[("lib.zip", b"version 2")],
+        )
+        self.assertEqual(len(cache), 4)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -12,6 +12,8 @@ from lxml import etree
 from markupsafe import Markup
 from mock import patch
 
+from capa.capa_problem import LoncapaProblem
+from capa.parse_cache import ParsedProblem, ParsedProblemCache, parsed_problem_cache
 from capa.responsetypes import LoncapaProblemError
 from capa.tests.helpers import new_loncapa_problem
 from openedx.core.djangolib.markup import HTML
@@ -509,6 +511,29 @@ class CAPAProblemTest(unittest.TestCase):
         problem = new_loncapa_problem(xml.format(correctness=False))
         self.assertIsNotNone(problem)
 
+    def test_set_state(self):
+        """
+        Verify that a problem grades the student state it's set to, as a new problem would.
+        """
+        xml = """
+        <problem>
+            <optionresponse>
+                <optioninput options="('apple','cherry')" correct="cherry"/>
+            </optionresponse>
+        </problem>
+        """
+        problem = new_loncapa_problem(xml)
+        problem.set_state({'student_answers': {'1_2_1': 'apple'}, 'done': True})
+        problem.correct_map.update(problem.get_grade_from_current_answers(None))
+        self.assertEqual(problem.calculate_score(), {'score': 0, 'total': 1})
+
+        problem.set_state({'student_answers': {'1_2_1': 'cherry'}, 'done': True})
+        self.assertEqual(problem.correct_map.get_dict(), {})
+        problem.correct_map.update(problem.get_grade_from_current_answers(None))
+        self.assertEqual(problem.calculate_score(), {'score': 1, 'total': 1})
+        self.assertEqual(problem.get_state()['student_answers'], {'1_2_1': 'cherry'})
+        self.assertTrue(problem.done)
+
 
 @ddt.ddt
 class CAPAMultiInputProblemTest(unittest.TestCase):
@@ -789,3 +814,86 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
         # Ensure that the answer is a string so that the dict returned from this
         # function can eventualy be serialized to json without issues.
         self.assertIsInstance(problem.get_question_answers()['1_solution_1'], six.text_type)
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Tests for the cache of the seed independent parsing of problems.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">
+        answer = random.random()
+        def check(expect, ans):
+            return True
+            </script>
+            <multiplechoiceresponse>
+                <label>Which is correct?</label>
+                <choicegroup type="MultipleChoice">
+                    <choice correct="false">Apple</choice>
+                    <choice correct="true">Cherry</choice>
+                </choicegroup>
+            </multiplechoiceresponse>
+            <customresponse cfn="check">
+                <textline/>
+            </customresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        parsed_problem_cache.clear()
+        self.addCleanup(parsed_problem_cache.clear)
+
+        patcher = patch.object(
+            LoncapaProblem, 'make_xml_compatible', autospec=True, side_effect=LoncapaProblem.make_xml_compatible,
+        )
+        self.mock_make_xml_compatible = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parsed_once(self):
+        problems = [new_loncapa_problem(self.xml, seed=seed) for seed in (1, 2, 3)]
+        self.assertEqual(self.mock_make_xml_compatible.call_count, 1)
+        self.assertEqual(len(parsed_problem_cache), 1)
+
+        for problem in problems:
+            self.assertEqual(problem.problem_data, problems[0].problem_data)
+            self.assertEqual(sorted(problem.inputs), ['1_2_1', '1_3_1'])
+            self.assertEqual(sorted(responder.id for responder in problem.responders.values()), ['1_2', '1_3'])
+            # Each problem has its own tree.
+            for response in problem.responders:
+                self.assertIs(response.getroottree().getroot(), problem.tree)
+        self.assertIsNot(problems[0].tree, problems[1].tree)
+
+        # The scripts are run for each seed.
+        self.assertNotEqual(problems[0].context['answer'], problems[1].context['answer'])
+
+    def test_changed_problem(self):
+        first = new_loncapa_problem(self.xml)
+        second = new_loncapa_problem(self.xml.replace('Apple', 'Pear'))
+        other_id = new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(self.mock_make_xml_compatible.call_count, 3)
+
+        self.assertIn('Apple', first.get_html())
+        self.assertIn('Pear', second.get_html())
+        self.assertEqual(sorted(other_id.inputs), ['2_2_1', '2_3_1'])
+
+    def test_includes_not_cached(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="missing.xml"/>
+            </problem>
+        """)
+        new_loncapa_problem(xml)
+        new_loncapa_problem(xml)
+        self.assertEqual(self.mock_make_xml_compatible.call_count, 2)
+        self.assertEqual(len(parsed_problem_cache), 0)
+
+    def test_bounded(self):
+        cache = ParsedProblemCache(max_size=2)
+        for problem_id in ('1', '2', '3'):
+            problem = new_loncapa_problem(self.xml, problem_id=problem_id)
+            cache.set(cache.key(problem_id, self.xml), ParsedProblem(problem.tree, problem.problem_data, []))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(cache.key('1', self.xml)))
+        self.assertIsNotNone(cache.get(cache.key('3', self.xml)))
@@ -576,6 +576,32 @@ class FormulaResponseTest(ResponseTest):
         self.assertTrue(list(problem.responders.values())[0].validate_answer('14*x'))
         self.assertFalse(list(problem.responders.values())[0].validate_answer('3*y+2*x'))
 
+    def test_samples_evaluated_at_once(self):
+        """
+        Answers are parsed once for all the samples, with the same results as sample by sample.
+        """
+        problem = self.build_problem(
+            sample_dict={'x': (-10, -1), 'y': (1, 10)},
+            num_samples=50,
+            tolerance="1%",
+            answer="x+2*y"
+        )
+        responder = list(problem.responders.values())[0]
+        var_dict_list = responder.randomize_variables(responder.samples)
+
+        for answer in ('x+2*y', 'sin(x)*y^2', 'y||x', 'x^0.5', 'sqrt(x)', 'fact(3)*x', '1/(x+5)', '5'):
+            expected = [
+                responder._evaluate_formula(answer, var_dict)  # pylint: disable=protected-access
+                for var_dict in var_dict_list
+            ]
+            self.assertEqual(responder.tupleize_answers(answer, var_dict_list), expected)
+
+        with mock.patch('capa.responsetypes.evaluator', wraps=calc.evaluator) as mock_evaluator:
+            self.assert_grade(problem, '2*y + x', 'correct')
+        # The student's and instructor's answers are each evaluated for the
+        # first sample, and then for all the samples at once.
+        self.assertEqual(mock_evaluator.call_count, 4)
+
 
 class StringResponseTest(ResponseTest):  # pylint: disable=missing-docstring
     xml_factory_class = StringResponseXMLFactory
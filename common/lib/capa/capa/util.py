@@ -11,6 +11,7 @@ from decimal import Decimal
 
 import bleach
 from calc import evaluator
+from django.utils.lru_cache import lru_cache
 from lxml import etree
 
 from openedx.core.djangolib.markup import HTML
@@ -22,6 +23,15 @@ default_tolerance = '0.001%'
 log = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _evaluate_tolerance(tolerance):
+    """
+    Evaluate the tolerance string, once per tolerance, rather than once per
+    comparison (FormulaResponse compares every sample with the same tolerance).
+    """
+    return evaluator(dict(), dict(), tolerance)
+
+
 def compare_with_tolerance(student_complex, instructor_complex, tolerance=default_tolerance, relative_tolerance=False):
     """
     Compare student_complex to instructor_complex with maximum tolerance tolerance.
@@ -61,11 +71,11 @@ def compare_with_tolerance(student_complex, instructor_complex, tolerance=defaul
         if tolerance == default_tolerance:
             relative_tolerance = True
         if tolerance.endswith('%'):
-            tolerance = evaluator(dict(), dict(), tolerance[:-1]) * 0.01
+            tolerance = _evaluate_tolerance(tolerance[:-1]) * 0.01
             if not relative_tolerance:
                 tolerance = tolerance * abs(instructor_complex)
         else:
-            tolerance = evaluator(dict(), dict(), tolerance)
+            tolerance = _evaluate_tolerance(tolerance)
 
     if relative_tolerance:
         tolerance = tolerance * max(abs(student_complex), abs(instructor_complex))
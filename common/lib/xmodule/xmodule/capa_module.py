@@ -18,7 +18,7 @@ from xmodule.editing_module import EditingMixin
 from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.raw_module import RawMixin
 from xmodule.util.misc import escape_html_characters
-from xmodule.util.sandboxing import get_python_lib_zip
+from xmodule.util.sandboxing import SafeExecCache, get_python_lib_zip
 from xmodule.util.xmodule_django import add_webpack_to_fragment
 from xmodule.x_module import (
     HTMLSnippet,
@@ -350,7 +350,7 @@ class ProblemBlock(
         capa_system = LoncapaSystem(
             ajax_url=None,
             anonymous_student_id=None,
-            cache=None,
+            cache=SafeExecCache(),
             can_execute_unsafe_code=None,
             get_python_lib_zip=None,
             DEBUG=None,
@@ -415,7 +415,7 @@ class ProblemBlock(
             # '$anonymous_student_id' in their XML.
             # For the purposes of this report, we don't need to support those use cases.
             anonymous_student_id=None,
-            cache=None,
+            cache=SafeExecCache(),
             can_execute_unsafe_code=lambda: None,
             get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, self.runtime.course_id)),
             DEBUG=None,
@@ -295,6 +295,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -316,25 +322,39 @@ class StaticContentStream(StaticContent):
         self._stream = stream
 
     def stream_data(self):
-        while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            if len(chunk) == 0:
-                break
-            yield chunk
+        self._stream.seek(0)
+        return self._read_chunks()
 
     def stream_data_in_range(self, first_byte, last_byte):
         """
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
-        position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        return self._read_chunks(last_byte - first_byte + 1)
+
+    def _read_chunks(self, length=None):
+        """
+        Yields the next length bytes of the stream (or all of the rest of it).
+
+        GridFS files are read a stored chunk at a time, so each chunk is passed
+        on as fetched from the database instead of being copied into a buffer
+        and read back out of it; other streams are read STREAM_DATA_CHUNK_SIZE
+        bytes at a time.
+        """
+        readchunk = getattr(self._stream, 'readchunk', None)
+        while length is None or length > 0:
+            if readchunk is not None:
+                chunk = readchunk()
+            elif length is None:
+                chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            else:
+                chunk = self._stream.read(min(length, STREAM_DATA_CHUNK_SIZE))
+            if len(chunk) == 0:
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            if length is not None:
+                if len(chunk) > length:
+                    chunk = chunk[:length]
+                length -= len(chunk)
             yield chunk
 
     def close(self):
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares the CourseStructureCache codecs on a generated course structure:
+the size of what they cache, and the time they take to encode and decode it.
+"""
+
+
+import datetime
+import random
+import timeit
+
+from bson import BSON
+from bson.codec_options import CodecOptions
+from bson.objectid import ObjectId
+from pytz import UTC
+from six.moves import range
+
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo
+from xmodule.modulestore.split_mongo.structure_codecs import COMPRESSORS, SERIALIZERS, StructureCodec
+
+try:
+    import click
+except ImportError:
+    click = None
+
+# Block types of the generated blocks, weighted roughly as in real courses.
+BLOCK_TYPES = ['problem'] * 4 + ['html'] * 3 + ['video'] * 2 + ['discussion']
+
+
+def make_structure(num_blocks, num_edits):
+    """
+    Returns a structure of a course with about num_blocks blocks, whose
+    blocks were last changed by one of num_edits edits.
+
+    The structure is built from a mongo document, like the structures
+    CourseStructureCache caches, so that none of its values are shared.
+    """
+    edits = [
+        {
+            'previous_version': ObjectId(),
+            'update_version': ObjectId(),
+            'source_version': None,
+            'edited_on': datetime.datetime.now(UTC),
+            'edited_by': random.randint(1, 100),
+        }
+        for __ in range(num_edits)
+    ]
+
+    def make_block(block_type, fields):
+        """
+        Returns the document of a new block of the given type, last changed by a random edit.
+        """
+        return {
+            'block_type': block_type,
+            'block_id': str(ObjectId()),
+            'definition': ObjectId(),
+            'fields': fields,
+            'defaults': {},
+            'asides': {},
+            'edit_info': dict(random.choice(edits)),
+        }
+
+    blocks = []
+    units = []
+    for __ in range(num_blocks // 10):
+        leaves = [
+            make_block(random.choice(BLOCK_TYPES), {'display_name': u'Leaf', 'weight': 1.0})
+            for __ in range(8)
+        ]
+        unit = make_block('vertical', {
+            'display_name': u'Unit',
+            'children': [[leaf['block_type'], leaf['block_id']] for leaf in leaves],
+        })
+        blocks.extend(leaves)
+        blocks.append(unit)
+        units.append(unit)
+
+    root = make_block('course', {
+        'display_name': u'Course',
+        'children': [[unit['block_type'], unit['block_id']] for unit in units],
+    })
+    blocks.append(root)
+    document = {
+        '_id': ObjectId(),
+        'root': [root['block_type'], root['block_id']],
+        'blocks': blocks,
+        'schema_version': 1,
+        'edited_by': 1,
+        'edited_on': datetime.datetime.now(UTC),
+        'original_version': ObjectId(),
+        'previous_version': ObjectId(),
+    }
+    # Round trip through BSON, as reading from mongo does.
+    return structure_from_mongo(BSON.encode(document).decode(CodecOptions(tz_aware=True)))
+
+
+def benchmark(structure, codec_name, repeat):
+    """
+    Returns the uncompressed size, the compressed size, and the best of
+    repeat encoding and decoding times of structure with the named codec.
+    """
+    codec = StructureCodec(codec_name)
+    data = codec.serialize(structure)
+    value = codec.compress(data)
+
+    def decode():
+        """
+        Decode the cached value, as CourseStructureCache.get does.
+        """
+        serializer, decompressed_data = StructureCodec.decompress(value)
+        serializer.loads(decompressed_data)
+
+    encode_time = min(timeit.repeat(lambda: codec.compress(codec.serialize(structure)), number=1, repeat=repeat))
+    decode_time = min(timeit.repeat(decode, number=1, repeat=repeat))
+    return len(data), len(value), encode_time, decode_time
+
+
+def run_benchmarks(num_blocks, num_edits, repeat):
+    """
+    Prints the results of benchmarking each codec.
+    """
+    structure = make_structure(num_blocks, num_edits)
+    print(u"{} blocks, {} edits".format(len(structure['blocks']), num_edits))
+    print(u"{:<14} {:>14} {:>14} {:>10} {:>10}".format(
+        'codec', 'uncompressed', 'compressed', 'encode', 'decode'
+    ))
+    for serializer_name in sorted(SERIALIZERS):
+        for compressor_name in sorted(COMPRESSORS):
+            codec_name = u'{}+{}'.format(serializer_name, compressor_name)
+            uncompressed_size, compressed_size, encode_time, decode_time = benchmark(structure, codec_name, repeat)
+            print(u"{:<14} {:>14,} {:>14,} {:>9.1f}ms {:>9.1f}ms".format(
+                codec_name, uncompressed_size, compressed_size, encode_time * 1000, decode_time * 1000
+            ))
+
+if click is not None:
+    # pylint: disable=bad-continuation
+    @click.command()
+    @click.option('--num_blocks',
+                  type=click.INT,
+                  default=5000,
+                  help="Number of blocks in the generated course structure.",
+                  required=False
+                  )
+    @click.option('--num_edits',
+                  type=click.INT,
+                  default=50,
+                  help="Number of edits which last changed the blocks.",
+                  required=False
+                  )
+    @click.option('--repeat',
+                  type=click.INT,
+                  default=5,
+                  help="Number of times to time each codec; the best time is reported.",
+                  required=False
+                  )
+    def cli(num_blocks, num_edits, repeat):
+        """
+        Compares the CourseStructureCache codecs on a generated course structure.
+        """
+        run_benchmarks(num_blocks, num_edits, repeat)
+
+if __name__ == '__main__':
+    if click is not None:
+        cli()  # pylint: disable=no-value-for-parameter
+    else:
+        print("Aborted! Module 'click' is not installed.")
@@ -105,6 +105,7 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, MongoConnection
+from xmodule.modulestore.split_mongo.structure_index import ParentMapCache, StructureIndex, build_parent_map
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
 
@@ -134,6 +135,9 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# The default number of entries (blocks with a parent) kept in the cache of parent maps
+DEFAULT_PARENT_MAP_CACHE_SIZE = 500000
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -415,7 +419,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
             # The definition hasn't been loaded from the db yet, so load it
             if definition is None:
-                definition = self.db_connection.get_definition(definition_guid, course_key)
+                definition = self._get_prefetched_definitions().get(definition_guid)
+                if definition is None:
+                    definition = self.db_connection.get_definition(definition_guid, course_key)
                 bulk_write_record.definitions[definition_guid] = definition
                 if definition is not None:
                     bulk_write_record.definitions_in_db.add(definition_guid)
@@ -424,7 +430,10 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             # cast string to ObjectId if necessary
             definition_guid = course_key.as_object_id(definition_guid)
-            return self.db_connection.get_definition(definition_guid, course_key)
+            definition = self._get_prefetched_definitions().get(definition_guid)
+            if definition is None:
+                definition = self.db_connection.get_definition(definition_guid, course_key)
+            return definition
 
     def get_definitions(self, course_key, ids):
         """
@@ -450,6 +459,12 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                     ids.remove(definition_id)
                     definitions.append(definition)
 
+        prefetched_definitions = self._get_prefetched_definitions()
+        for definition_id in list(ids):
+            if definition_id in prefetched_definitions:
+                ids.remove(definition_id)
+                definitions.append(prefetched_definitions[definition_id])
+
         if len(ids):
             # Query the db for the definitions.
             defs_from_db = list(self.db_connection.get_definitions(list(ids), course_key))
@@ -460,6 +475,16 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             definitions.extend(defs_from_db)
         return definitions
 
+    def _get_prefetched_definitions(self):
+        """
+        Return the map of definition ids to the definitions which prefetch_definitions fetched.
+        They're kept for the rest of the request, beyond any bulk operation; as definitions
+        never change once they're persisted, they can be shared by all courses.
+        """
+        if self.request_cache is None:
+            return {}
+        return self.request_cache.data.setdefault('prefetched_definitions', {})
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -713,9 +738,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, parent_map_cache_size=DEFAULT_PARENT_MAP_CACHE_SIZE, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param parent_map_cache_size: the number of entries (blocks with a parent) to keep in the cache of
+            the parent maps of structure versions, which is shared by all requests.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
@@ -745,6 +772,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["request_cache"] = self.request_cache
 
         self.signal_handler = signal_handler
+        self.parent_map_cache = ParentMapCache(parent_map_cache_size)
 
     def close_connections(self):
         """
@@ -825,6 +853,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         otherwise, do not load the definitions - they'll be loaded later when needed.
         """
         lazy = kwargs.pop('lazy', True)
+        prefetch_definitions = kwargs.pop('prefetch_definitions', False)
         should_cache_items = not lazy
 
         runtime = self._get_cache(course_entry.structure['_id'])
@@ -836,9 +865,55 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if should_cache_items:
             self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy)
 
+        if prefetch_definitions and lazy:
+            self._prefetch_definitions(course_entry, block_keys, depth)
+
         with self.bulk_operations(course_entry.course_key, emit_signals=False):
             return [runtime.load_item(block_key, course_entry, **kwargs) for block_key in block_keys]
 
+    def prefetch_definitions(self, course_key, block_keys, depth=0):
+        """
+        Fetch the definitions of the given blocks and of their descendants out to depth, in one
+        query, so that loading the blocks' content later in the request doesn't cost a query per
+        block. get_item and get_items do this for the blocks they load when passed
+        prefetch_definitions=True.
+
+        Arguments:
+            course_key (CourseLocator|LibraryLocator): the course of the blocks
+            block_keys (list(BlockKey)): the blocks about to be instantiated
+            depth (int): how many levels of descendants of the blocks to fetch the definitions of
+                (None for all of them)
+        """
+        self._prefetch_definitions(self._lookup_course(course_key), block_keys, depth)
+
+    def _prefetch_definitions(self, course_entry, block_keys, depth):
+        """
+        Fetch the definitions of the given blocks of course_entry and of their descendants out
+        to depth which haven't been loaded or fetched yet, and keep them for the rest of the request.
+        """
+        if self.request_cache is None:
+            return
+
+        blocks = {}
+        for block_key in block_keys:
+            blocks = self.descendants(course_entry.structure['blocks'], block_key, depth, blocks)
+
+        bulk_write_record = self._get_bulk_ops_record(course_entry.course_key)
+        prefetched_definitions = self._get_prefetched_definitions()
+        definition_ids = set(
+            block.definition for block in six.itervalues(blocks)
+            if block.definition is not None and not block.definition_loaded
+        )
+        definition_ids.difference_update(prefetched_definitions)
+        if bulk_write_record.active:
+            definition_ids.difference_update(bulk_write_record.definitions)
+
+        if definition_ids:
+            prefetched_definitions.update(
+                (definition['_id'], definition)
+                for definition in self.db_connection.get_definitions(list(definition_ids), course_entry.course_key)
+            )
+
     def _get_cache(self, course_version_guid):
         """
         Find the descriptor cache for this course if it exists
@@ -864,6 +939,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Should only be used by testing or something which implements transactional boundary semantics.
         :param course_version_guid: if provided, clear only this entry
         """
+        if course_version_guid:
+            self.parent_map_cache.discard(course_version_guid)
+        else:
+            self.parent_map_cache.clear()
+
         if self.request_cache is None:
             return
 
@@ -872,8 +952,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_index', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_index'] = {}
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1266,23 +1348,20 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
+        blocks = course.structure['blocks']
         items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
-        def _block_matches_all(block_data):
+        def _block_matches_all(block_id):
             """
-            Check that the block matches all the criteria
+            Check that the block matches all the criteria which don't require loading its definition
             """
-            # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
+            block_data = blocks.get(block_id)
+            return (  # pylint: disable=bad-continuation
+                block_data is not None and
                 self._block_matches(block_data, qualifiers) and
                 self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
+            )
 
         if settings is None:
             settings = {}
@@ -1290,7 +1369,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in six.iteritems(course.structure['blocks']):
+            for block_id in self._get_items_candidates(course, qualifiers, settings, block_name):
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1301,9 +1380,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     name_matches = block_id.id == block_name
                 else:
                     name_matches = block_id.id in block_name
-                if name_matches and _block_matches_all(block):
+                if name_matches and _block_matches_all(block_id):
                     block_ids.append(block_id)
 
+            block_ids = self._filter_items_by_content(course, block_ids, content)
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1319,10 +1399,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if not include_orphans:
             path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+            parents_cache = self._get_parent_map(course)
 
-        for block_id, value in six.iteritems(course.structure['blocks']):
-            if _block_matches_all(value):
+        for block_id in self._get_items_candidates(course, qualifiers, settings):
+            if _block_matches_all(block_id):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
                         block_id.type in DETACHED_XBLOCK_TYPES or
@@ -1332,11 +1412,82 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 else:
                     items.append(block_id)
 
+        items = self._filter_items_by_content(course, items, content)
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _get_items_candidates(self, course, qualifiers, settings, block_name=None):
+        """
+        Returns the keys of the blocks in the course which could match the get_items criteria:
+        the blocks found from the structure's index when the criteria allow it, otherwise
+        all of the course's blocks.
+        """
+        candidates = self._get_structure_index(course.structure).candidates(
+            block_type=qualifiers.get('block_type'),
+            block_id=block_name,
+            settings=settings,
+        )
+        if candidates is None:
+            return list(course.structure['blocks'])
+        return candidates
+
+    def _filter_items_by_content(self, course, block_keys, content):
+        """
+        Returns the block_keys whose definitions match the get_items content criteria.
+        The definitions of all the blocks are fetched at once.
+        """
+        if not content or not block_keys:
+            return block_keys
+
+        blocks = course.structure['blocks']
+        definitions = {
+            definition['_id']: definition
+            for definition in self.get_definitions(
+                course.course_key, [blocks[block_key].definition for block_key in block_keys]
+            )
+        }
+        return [
+            block_key for block_key in block_keys
+            if blocks[block_key].definition in definitions and
+            self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+        ]
+
+    def _get_structure_index(self, structure):
+        """
+        Find the StructureIndex of this structure version, creating it if needed.
+        Like the descriptor caches, indexes are kept in the request cache.
+        """
+        if self.request_cache is None:
+            return StructureIndex(structure['blocks'])
+
+        indexes = self.request_cache.data.setdefault('structure_index', {})
+        index = indexes.get(structure['_id'])
+        if index is None:
+            index = indexes[structure['_id']] = StructureIndex(structure['blocks'])
+        return index
+
+    def _get_parent_map(self, course):
+        """
+        Find the map from block keys to the tuple of their parents' keys for the
+        structure of the course envelope.
+
+        The maps of persisted structure versions are kept in the parent_map_cache
+        and shared with later requests.  Structures changed in an active bulk
+        operation can still change, so their maps are built each time instead.
+        The maps may be shared, so callers mustn't change them.
+        """
+        structure = course.structure
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        if (  # pylint: disable=bad-continuation
+            bulk_write_record.active and
+            structure['_id'] in bulk_write_record.structures and
+            structure['_id'] not in bulk_write_record.structures_in_db
+        ):
+            return build_parent_map(structure['blocks'])
+        return self.parent_map_cache.get(structure)
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -1361,8 +1512,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :param course: actual db json of course from structures
         :param path_cache: a dictionary that records which modules have a path to the root so that we don't have to
         double count modules if we're computing this for a list of modules in a course.
-        :param parents_cache: a dictionary containing mapping of block_key to list of its parents. Optionally, this
-        should be built for course structure to make this method faster.
+        :param parents_cache: a dictionary containing mapping of block_key to list of its parents. Defaults to
+        the course structure's cached parent map.
 
         :return Bool: whether or not component has path to the root
         """
@@ -1371,9 +1522,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return path_cache[block_key]
 
         if parents_cache is None:
-            xblock_parents = self._get_parents_from_structure(block_key, course.structure)
-        else:
-            xblock_parents = parents_cache[block_key]
+            parents_cache = self._get_parent_map(course)
+        xblock_parents = parents_cache.get(block_key, ())
 
         if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
             # Found, xblock has the path to the root
@@ -1405,14 +1555,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        parent_map = self._get_parent_map(course)
+        all_parent_ids = parent_map.get(BlockKey.from_usage_key(locator), ())
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if self.has_path_to_root(valid_parent, course, parents_cache=parent_map)
         ]
 
         if len(parent_ids) == 0:
@@ -1436,16 +1587,12 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in six.iteritems(blocks):
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        parent_map = self._get_parent_map(course)
+        root = course.structure['root']
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
-            for block_id in items
+            for block_id, block_data in six.iteritems(course.structure['blocks'])
+            if block_id not in parent_map and block_id != root and block_data.block_type not in detached_categories
         ]
 
     def get_course_index_info(self, course_key):
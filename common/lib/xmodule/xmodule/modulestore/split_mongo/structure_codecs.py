@@ -0,0 +1,237 @@
+"""
+Codecs for storing split modulestore structures in the CourseStructureCache.
+
+A codec pairs a serializer, which turns a structure into bytes and back, with
+a compressor.  Cached values written by a codec start with a header naming its
+serializer and compressor, so any codec can read the values written by any
+other; values without a header are in the original pickle+zlib format.
+"""
+
+
+import zlib
+
+import six
+import six.moves.cPickle as pickle
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.split_mongo import BlockKey
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# The first byte of cached values with a header; zlib streams never start with it.
+HEADER_MAGIC = b'\x00'
+
+# The original codec, whose values have no header.  CourseStructureCache
+# writes values with it unless configured otherwise, so that they can still
+# be read by servers which predate the other codecs.
+DEFAULT_CODEC = 'pickle+zlib'
+
+# The EditInfo attributes which are stored, in the order BlockSerializer stores them.
+EDIT_INFO_ATTRS = (
+    'previous_version',
+    'update_version',
+    'source_version',
+    'edited_on',
+    'edited_by',
+    'original_usage',
+    'original_usage_version',
+)
+
+
+class PickleSerializer(object):
+    """
+    Pickles the whole structure, BlockData objects and all.
+    """
+    id = b'p'
+
+    def dumps(self, structure):
+        # Protocol can't be incremented until cache is cleared
+        return pickle.dumps(structure, 4)
+
+    def loads(self, data):
+        if six.PY2:
+            return pickle.loads(data)
+        else:
+            return pickle.loads(data, encoding='latin-1')
+
+
+class BlockSerializer(object):
+    """
+    Stores the blocks of a structure as plain tuples, in a fixed field order,
+    with each block's children stored as positions in the list of blocks, and
+    its edit info as a position in a list of the structure's distinct edit infos.
+
+    Unpickling builtin types is much cheaper than unpickling BlockData,
+    EditInfo and BlockKey instances one attribute at a time.  Referring to
+    children by position means their BlockKeys are built once per block
+    rather than once per reference, and as the blocks changed by the same
+    edit share their edit info, its versions are unpickled once per edit
+    rather than once per block.
+    """
+    id = b'b'
+
+    def dumps(self, structure):
+        blocks = structure['blocks']
+        positions = {block_key: position for position, block_key in enumerate(blocks)}
+        edit_infos = []
+        edit_info_positions = {}
+        encoded_blocks = []
+        for block_key, block in six.iteritems(blocks):
+            attrs = dict(block.__dict__)
+            fields = attrs.pop('fields')
+            children = fields.get('children')
+            if children is not None and all(child in positions for child in children):
+                fields = dict(fields)
+                children = [positions[child] for child in fields.pop('children')]
+            else:
+                children = None
+
+            edit_info_attrs = dict(attrs.pop('edit_info').__dict__)
+            edit_info = tuple(edit_info_attrs.pop(attr, None) for attr in EDIT_INFO_ATTRS)
+            try:
+                edit_info_position = edit_info_positions.get(edit_info)
+            except TypeError:
+                # Unhashable values can't be shared, but can still be stored.
+                edit_info_position = edit_info = None
+            if edit_info_position is None:
+                edit_info_position = len(edit_infos)
+                edit_infos.append(edit_info)
+                if edit_info is not None:
+                    edit_info_positions[edit_info] = edit_info_position
+
+            encoded_blocks.append((
+                block_key.type,
+                block_key.id,
+                fields,
+                children,
+                edit_info_position,
+                # Any other attributes, e.g. the block's definition id, and
+                # those not stored in mongo, kept as they are.
+                attrs,
+                edit_info_attrs,
+            ))
+
+        encoded_structure = dict(structure)
+        del encoded_structure['blocks']
+        encoded_structure['root'] = tuple(structure['root'])
+        return pickle.dumps((encoded_structure, encoded_blocks, edit_infos), 4)
+
+    def loads(self, data):
+        if six.PY2:
+            structure, encoded_blocks, edit_infos = pickle.loads(data)
+        else:
+            structure, encoded_blocks, edit_infos = pickle.loads(data, encoding='latin-1')
+
+        # Build BlockKeys with tuple.__new__, which skips the contract check in BlockKey.__new__.
+        block_keys = [
+            tuple.__new__(BlockKey, (block_type, block_id))
+            for block_type, block_id, __, __, __, __, __ in encoded_blocks
+        ]
+        blocks = {}
+        for block_key, encoded_block in six.moves.zip(block_keys, encoded_blocks):
+            __, __, fields, children, edit_info_position, attrs, edit_info_attrs = encoded_block
+            if children is not None:
+                fields['children'] = [block_keys[position] for position in children]
+
+            # Each block gets its own EditInfo, since they're updated in place.
+            edit_info = EditInfo.__new__(EditInfo)
+            edit_info.__dict__.update(edit_info_attrs)
+            edit_info.__dict__.update(six.moves.zip(EDIT_INFO_ATTRS, edit_infos[edit_info_position]))
+
+            block = BlockData.__new__(BlockData)
+            block.__dict__.update(attrs)
+            block.fields = fields
+            block.edit_info = edit_info
+            blocks[block_key] = block
+
+        structure['blocks'] = blocks
+        structure['root'] = BlockKey(*structure['root'])
+        return structure
+
+
+class ZlibCompressor(object):
+    """
+    zlib at its fastest level, which gives slightly larger results.
+    """
+    id = b'z'
+
+    def compress(self, data):
+        return zlib.compress(data, 1)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Lz4Compressor(object):
+    """
+    LZ4 frames: larger results than zlib, but several times faster to
+    decompress.  Only available when the lz4 package is installed.
+    """
+    id = b'l'
+
+    def compress(self, data):
+        return lz4.frame.compress(data)
+
+    def decompress(self, data):
+        return lz4.frame.decompress(data)
+
+
+SERIALIZERS = {
+    'pickle': PickleSerializer(),
+    'blocks': BlockSerializer(),
+}
+
+COMPRESSORS = {
+    'zlib': ZlibCompressor(),
+}
+if lz4 is not None:
+    COMPRESSORS['lz4'] = Lz4Compressor()
+
+_SERIALIZERS_BY_ID = {serializer.id: serializer for serializer in six.itervalues(SERIALIZERS)}
+_COMPRESSORS_BY_ID = {compressor.id: compressor for compressor in six.itervalues(COMPRESSORS)}
+
+
+class StructureCodec(object):
+    """
+    Encodes structures with a serializer and a compressor, named as
+    "<serializer>+<compressor>", e.g. "blocks+zlib".
+    """
+    def __init__(self, name):
+        self.name = name
+        serializer_name, __, compressor_name = name.partition('+')
+        try:
+            self.serializer = SERIALIZERS[serializer_name]
+            self.compressor = COMPRESSORS[compressor_name]
+        except KeyError:
+            raise ValueError(u"Unknown course structure cache codec: {}".format(name))
+
+    def serialize(self, structure):
+        """
+        Returns the structure as uncompressed bytes.
+        """
+        return self.serializer.dumps(structure)
+
+    def compress(self, data):
+        """
+        Returns serialized data compressed and with its header, ready to cache.
+        """
+        compressed_data = self.compressor.compress(data)
+        if self.name == DEFAULT_CODEC:
+            return compressed_data
+        return HEADER_MAGIC + self.serializer.id + self.compressor.id + compressed_data
+
+    @staticmethod
+    def decompress(value):
+        """
+        Returns the serializer and the decompressed data of a cached value,
+        whichever codec wrote it.
+        """
+        if value[:1] != HEADER_MAGIC:
+            return SERIALIZERS['pickle'], COMPRESSORS['zlib'].decompress(value)
+
+        serializer = _SERIALIZERS_BY_ID[value[1:2]]
+        compressor = _COMPRESSORS_BY_ID[value[2:3]]
+        return serializer, compressor.decompress(value[3:])
@@ -0,0 +1,253 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure, used to
+answer get_items queries without testing every block in the course, and the
+cache of the parent maps of structure versions.
+"""
+
+
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+import six
+
+
+class StructureIndex(object):
+    """
+    Indexes the blocks of one structure version by block type, by block id and
+    by the values of their settings fields (including ``children``, which makes
+    the index of that field a map from blocks to their parents).
+
+    Each index is built the first time a query needs it, so a structure only
+    pays for the indexes which are actually used.  A structure version doesn't
+    change once it has been persisted, so its indexes stay valid for as long as
+    it's cached; the modulestore discards them whenever it updates a structure.
+
+    The indexes only narrow down the blocks which could match a query: callers
+    must still check each candidate against the query.
+    """
+    def __init__(self, blocks):
+        """
+        Arguments:
+            blocks (dict): the structure's ``blocks``, a map of BlockKey to BlockData
+        """
+        self.blocks = blocks
+        self._by_type = None
+        self._by_id = None
+        self._by_field = {}
+        self._positions = None
+
+    def candidates(self, block_type=None, block_id=None, settings=None):
+        """
+        Returns the keys of the blocks which could match the given get_items
+        criteria, in structure order, or None if none of the criteria can be
+        answered from an index.
+
+        Arguments:
+            block_type: the criteria on the block's type, if any
+            block_id: the get_items ``name`` qualifier (an id or a collection of ids), if any
+            settings (dict): the criteria on the block's settings fields
+        """
+        narrowest = None
+        for index, values in self._lookups(block_type, block_id, settings or {}):
+            keys = self._union(index, values)
+            if narrowest is None or len(keys) < len(narrowest):
+                narrowest = keys
+                if not narrowest:
+                    break
+        return narrowest
+
+    def _lookups(self, block_type, block_id, settings):
+        """
+        Yields (index, values) pairs, one for each criterion which can be
+        answered from an index: a block can only match the criterion if it's
+        listed in the index under one of the values.
+        """
+        if block_type is not None:
+            values = _index_values(block_type)
+            if values is not None:
+                yield self._type_index(), values
+        if block_id is not None:
+            values = _index_values(
+                block_id if isinstance(block_id, six.string_types) else {'$in': list(block_id)}
+            )
+            if values is not None:
+                yield self._id_index(), values
+        for field_name, criteria in six.iteritems(settings):
+            values = _index_values(criteria)
+            if values is not None:
+                yield self._field_index(field_name), values
+
+    def _union(self, index, values):
+        """
+        Returns the keys listed in index under any of values, in structure order.
+        """
+        if len(values) == 1:
+            return index.get(values[0], [])
+
+        keys = set()
+        for value in values:
+            keys.update(index.get(value, ()))
+        if self._positions is None:
+            self._positions = {key: position for position, key in enumerate(self.blocks)}
+        return sorted(keys, key=self._positions.__getitem__)
+
+    def _type_index(self):
+        """
+        Returns the index of block keys by block type.
+        """
+        if self._by_type is None:
+            self._by_type = defaultdict(list)
+            for block_key in self.blocks:
+                self._by_type[block_key.type].append(block_key)
+        return self._by_type
+
+    def _id_index(self):
+        """
+        Returns the index of block keys by block id.
+        """
+        if self._by_id is None:
+            self._by_id = defaultdict(list)
+            for block_key in self.blocks:
+                self._by_id[block_key.id].append(block_key)
+        return self._by_id
+
+    def _field_index(self, field_name):
+        """
+        Returns the index of block keys by the value of the settings field
+        field_name.  Blocks whose field is a list are listed under each of its
+        elements, since get_items matches criteria against any element of a list.
+        """
+        index = self._by_field.get(field_name)
+        if index is None:
+            index = self._by_field[field_name] = defaultdict(list)
+            for block_key, block in six.iteritems(self.blocks):
+                if field_name not in block.fields:
+                    continue
+                for value in _hashable_values(block.fields[field_name]):
+                    keys = index[value]
+                    # Don't list a block twice when its list repeats a value.
+                    if not keys or keys[-1] != block_key:
+                        keys.append(block_key)
+        return index
+
+
+def build_parent_map(blocks):
+    """
+    Returns a map from the key of each block which has a parent to the tuple
+    of the keys of its parents, in structure order.
+
+    Arguments:
+        blocks (dict): a structure's ``blocks``, a map of BlockKey to BlockData
+    """
+    parent_lists = defaultdict(list)
+    for parent_key, block in six.iteritems(blocks):
+        for child_key in block.fields.get('children', []):
+            parents = parent_lists[child_key]
+            # A parent's children are all seen together, so this is enough to list it once.
+            if not parents or parents[-1] != parent_key:
+                parents.append(parent_key)
+    return {child_key: tuple(parents) for child_key, parents in six.iteritems(parent_lists)}
+
+
+class ParentMapCache(object):
+    """
+    Caches the parent maps (see build_parent_map) of structure versions, for
+    all the requests served by the process.
+
+    A persisted structure version never changes, so its parent map only has to
+    be built once.  The cache holds at most max_size map entries in total
+    (roughly, blocks with a parent); once full, the least recently used maps
+    are evicted.  The maps are shared, so callers mustn't change them.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._parent_maps = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, structure):
+        """
+        Returns the parent map of structure, building and caching it if needed.
+        """
+        version_guid = structure['_id']
+        with self._lock:
+            parent_map = self._parent_maps.pop(version_guid, None)
+            if parent_map is not None:
+                # Re-insert it as the most recently used.
+                self._parent_maps[version_guid] = parent_map
+                return parent_map
+
+        # Build outside of the lock, so that requests for other versions don't wait on it.
+        parent_map = build_parent_map(structure['blocks'])
+        if len(parent_map) > self.max_size:
+            return parent_map
+
+        with self._lock:
+            if version_guid not in self._parent_maps:
+                self._parent_maps[version_guid] = parent_map
+                self._size += len(parent_map)
+                while self._size > self.max_size:
+                    __, evicted_map = self._parent_maps.popitem(last=False)
+                    self._size -= len(evicted_map)
+        return parent_map
+
+    def discard(self, version_guid):
+        """
+        Removes the parent map of the structure version version_guid, if cached.
+        """
+        with self._lock:
+            parent_map = self._parent_maps.pop(version_guid, None)
+            if parent_map is not None:
+                self._size -= len(parent_map)
+
+    def clear(self):
+        """
+        Removes all the cached parent maps.
+        """
+        with self._lock:
+            self._parent_maps.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._parent_maps)
+
+
+def _index_values(criteria):
+    """
+    Returns the values which a field must equal one of to meet the get_items
+    criteria, or None if meeting the criteria takes more than an equality test
+    (regexes, functions, ``$nin``, ``$exists``...).
+    """
+    if isinstance(criteria, dict):
+        if list(criteria) != ['$in']:
+            return None
+        values = list(criteria['$in'])
+    else:
+        values = [criteria]
+
+    for value in values:
+        if callable(value) or isinstance(value, re._pattern_type):  # pylint: disable=protected-access
+            return None
+        try:
+            hash(value)
+        except TypeError:
+            return None
+    return values
+
+
+def _hashable_values(value):
+    """
+    Yields the values of a field which get_items criteria are compared to:
+    the elements of a list (recursively), or else the value itself.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for element_value in _hashable_values(element):
+                yield element_value
+    else:
+        try:
+            hash(value)
+        except TypeError:
+            return
+        yield value
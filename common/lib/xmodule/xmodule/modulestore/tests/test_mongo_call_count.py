@@ -176,6 +176,24 @@ class CountMongoCallsCourseTraversal(TestCase):
                     start_block = modulestore.get_course(course_key, depth=depth, lazy=lazy)
                     self._traverse_blocks_in_course(start_block, access_all_block_fields)
 
+    @ddt.data(
+        # Prefetching the definitions of all the blocks makes lazy loading cost no more than
+        # loading them all upfront.
+        (None, 3),
+        # Only the course block's definition is prefetched; the others are fetched as they're accessed.
+        (0, 38),
+    )
+    @ddt.unpack
+    def test_prefetch_definitions(self, depth, num_mongo_calls):
+        request_cache = MemoryCache()
+        with MIXED_SPLIT_MODULESTORE_BUILDER.build(request_cache=request_cache) as (content_store, modulestore):
+            course_key = self._import_course(content_store, modulestore)
+
+            with check_mongo_calls(num_mongo_calls):
+                with modulestore.bulk_operations(course_key):
+                    start_block = modulestore.get_course(course_key, depth=depth, lazy=True, prefetch_definitions=True)
+                    self._traverse_blocks_in_course(start_block, access_all_block_fields=True)
+
     @ddt.data(
         (MIXED_OLD_MONGO_MODULESTORE_BUILDER, 176),
         (MIXED_SPLIT_MODULESTORE_BUILDER, 4),
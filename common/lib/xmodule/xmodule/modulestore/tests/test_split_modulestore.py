@@ -15,6 +15,7 @@ import six
 from ccx_keys.locator import CCXBlockUsageLocator
 from contracts import contract
 from django.core.cache import InvalidCacheBackendError, caches
+from django.test.utils import override_settings
 from mock import patch
 from opaque_keys.edx.locator import BlockUsageLocator, CourseKey, CourseLocator, LocalId, VersionTree
 from path import Path as path
@@ -986,6 +987,25 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(not_corrupt_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_cache_codec(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with override_settings(COURSE_STRUCTURE_CACHE_CODEC='blocks+zlib'):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        # Structures cached by any codec can be read whatever the configured codec.
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
     @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
     def test_course_structure_cache_no_cache_configured(self, mock_get_cache):
         mock_get_cache.side_effect = InvalidCacheBackendError
@@ -0,0 +1,88 @@
+"""
+Tests for the CourseStructureCache codecs.
+"""
+
+
+import datetime
+import unittest
+import zlib
+
+import ddt
+import six.moves.cPickle as pickle
+from bson.objectid import ObjectId
+from pytz import UTC
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import StructureCodec
+
+
+def make_structure():
+    """
+    Returns a small structure: a course with two problems, one of them edited separately.
+    """
+    version = ObjectId()
+    edit_info = {'update_version': version, 'edited_on': datetime.datetime(2020, 1, 1, tzinfo=UTC), 'edited_by': 1}
+    root = BlockKey('course', 'course')
+    problems = [BlockKey('problem', 'problem1'), BlockKey('problem', 'problem2')]
+    blocks = {
+        root: BlockData(
+            block_type='course', definition=ObjectId(), fields={'children': list(problems)}, edit_info=edit_info,
+        ),
+        problems[0]: BlockData(
+            block_type='problem', definition=ObjectId(), fields={'weight': 2}, edit_info=edit_info,
+        ),
+        problems[1]: BlockData(
+            block_type='problem',
+            definition=ObjectId(),
+            fields={'display_name': u'Problème', 'children': [BlockKey('html', 'missing')]},
+            edit_info={'update_version': ObjectId(), 'previous_version': version, 'edited_by': 2},
+        ),
+    }
+    return {'_id': version, 'root': root, 'blocks': blocks, 'schema_version': 1}
+
+
+@ddt.ddt
+class TestStructureCodecs(unittest.TestCase):
+    """
+    Tests for StructureCodec
+    """
+    @ddt.data('pickle+zlib', 'blocks+zlib')
+    def test_round_trip(self, codec_name):
+        structure = make_structure()
+        codec = StructureCodec(codec_name)
+        serializer, data = StructureCodec.decompress(codec.compress(codec.serialize(structure)))
+        decoded_structure = serializer.loads(data)
+
+        self.assertEqual(decoded_structure, structure)
+        self.assertIsInstance(decoded_structure['root'], BlockKey)
+        for block_key, block in decoded_structure['blocks'].items():
+            self.assertIsInstance(block_key, BlockKey)
+            self.assertEqual(block.edit_info._subtree_edited_on, None)  # pylint: disable=protected-access
+
+        # Blocks don't share their edit info, since it's changed in place.
+        course_edit_info = decoded_structure['blocks'][BlockKey('course', 'course')].edit_info
+        problem_edit_info = decoded_structure['blocks'][BlockKey('problem', 'problem1')].edit_info
+        self.assertIsNot(course_edit_info, problem_edit_info)
+
+    def test_legacy_values(self):
+        # Values cached before there were codecs are read as pickle+zlib.
+        structure = make_structure()
+        value = zlib.compress(pickle.dumps(structure, 4), 1)
+        self.assertEqual(StructureCodec('blocks+zlib').compress(b'')[:1], b'\x00')
+        self.assertEqual(StructureCodec('pickle+zlib').compress(pickle.dumps(structure, 4)), value)
+
+        serializer, data = StructureCodec.decompress(value)
+        self.assertEqual(serializer.loads(data), structure)
+
+    def test_smaller_values(self):
+        structure = make_structure()
+        sizes = {}
+        for codec_name in ('pickle+zlib', 'blocks+zlib'):
+            sizes[codec_name] = len(StructureCodec(codec_name).serialize(structure))
+        self.assertLess(sizes['blocks+zlib'], sizes['pickle+zlib'])
+
+    @ddt.data('pickle', 'pickle+gzip', 'json+zlib')
+    def test_unknown_codec(self, codec_name):
+        with self.assertRaises(ValueError):
+            StructureCodec(codec_name)
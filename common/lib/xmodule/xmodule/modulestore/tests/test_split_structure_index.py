@@ -0,0 +1,129 @@
+"""
+Tests for the split modulestore's structure indexes.
+"""
+
+
+import re
+import unittest
+from collections import OrderedDict
+
+import ddt
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import ParentMapCache, StructureIndex, build_parent_map
+
+CHAPTER = BlockKey('chapter', 'chapter1')
+SEQUENTIAL = BlockKey('sequential', 'sequential1')
+PROBLEM_1 = BlockKey('problem', 'problem1')
+PROBLEM_2 = BlockKey('problem', 'problem2')
+DISCUSSION = BlockKey('discussion', 'problem1')
+
+
+@ddt.ddt
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests for StructureIndex
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        blocks = OrderedDict()
+        blocks[CHAPTER] = BlockData(block_type='chapter', fields={'children': [SEQUENTIAL]})
+        blocks[SEQUENTIAL] = BlockData(
+            block_type='sequential',
+            fields={'children': [PROBLEM_1, PROBLEM_2, DISCUSSION], 'graded': True},
+        )
+        blocks[PROBLEM_1] = BlockData(block_type='problem', fields={'weight': 1, 'display_name': 'One'})
+        blocks[PROBLEM_2] = BlockData(block_type='problem', fields={'weight': 2, 'display_name': 'Two'})
+        blocks[DISCUSSION] = BlockData(
+            block_type='discussion',
+            fields={'discussion_id': 'abc', 'tags': ['x', ['y', 'x']]},
+        )
+        self.index = StructureIndex(blocks)
+
+    @ddt.data(
+        ({'block_type': 'problem'}, [PROBLEM_1, PROBLEM_2]),
+        ({'block_type': 'html'}, []),
+        ({'block_type': {'$in': ['discussion', 'chapter']}}, [CHAPTER, DISCUSSION]),
+        ({'block_id': 'problem1'}, [PROBLEM_1, DISCUSSION]),
+        ({'block_id': ['chapter1', 'problem2']}, [CHAPTER, PROBLEM_2]),
+        ({'settings': {'discussion_id': 'abc'}}, [DISCUSSION]),
+        ({'settings': {'tags': 'x'}}, [DISCUSSION]),
+        ({'settings': {'tags': 'y'}}, [DISCUSSION]),
+        ({'settings': {'weight': {'$in': [2, 3]}}}, [PROBLEM_2]),
+        ({'settings': {'children': PROBLEM_2}}, [SEQUENTIAL]),
+        ({'block_type': 'problem', 'settings': {'weight': 1}}, [PROBLEM_1]),
+    )
+    @ddt.unpack
+    def test_candidates(self, criteria, expected):
+        self.assertEqual(self.index.candidates(**criteria), expected)
+
+    @ddt.data(
+        {},
+        {'block_type': re.compile('prob')},
+        {'settings': {'display_name': re.compile('One')}},
+        {'settings': {'weight': lambda weight: weight > 1}},
+        {'settings': {'graded': {'$exists': True}}},
+        {'settings': {'weight': {'$nin': [1]}}},
+        {'settings': {'tags': ['x']}},
+    )
+    def test_no_index(self, criteria):
+        self.assertIsNone(self.index.candidates(**criteria))
+
+    def test_narrowest_candidates(self):
+        # Criteria that can't be answered from an index are left for the caller to check.
+        self.assertEqual(
+            self.index.candidates(block_type='problem', settings={'display_name': re.compile('One')}),
+            [PROBLEM_1, PROBLEM_2],
+        )
+
+
+class TestParentMapCache(unittest.TestCase):
+    """
+    Tests for build_parent_map and ParentMapCache
+    """
+    def make_structure(self, num_children):
+        """
+        Returns a structure whose chapter has num_children problems, one of them listed twice.
+        """
+        problems = [BlockKey('problem', 'problem{}'.format(index)) for index in range(num_children)]
+        blocks = OrderedDict()
+        blocks[CHAPTER] = BlockData(block_type='chapter', fields={'children': problems + problems[:1]})
+        blocks[SEQUENTIAL] = BlockData(block_type='sequential', fields={'children': problems[:1]})
+        for problem in problems:
+            blocks[problem] = BlockData(block_type='problem', fields={})
+        return {'_id': ObjectId(), 'blocks': blocks}
+
+    def test_build_parent_map(self):
+        parent_map = build_parent_map(self.make_structure(2)['blocks'])
+        self.assertEqual(parent_map, {
+            BlockKey('problem', 'problem0'): (CHAPTER, SEQUENTIAL),
+            BlockKey('problem', 'problem1'): (CHAPTER,),
+        })
+
+    def test_cached(self):
+        cache = ParentMapCache(10)
+        structure = self.make_structure(2)
+        parent_map = cache.get(structure)
+        structure['blocks'] = {}
+        self.assertIs(cache.get(structure), parent_map)
+
+        cache.discard(structure['_id'])
+        self.assertEqual(cache.get(structure), {})
+
+    def test_eviction(self):
+        cache = ParentMapCache(5)
+        structures = [self.make_structure(2) for __ in range(3)]
+        for structure in structures[:2]:
+            cache.get(structure)
+        # Using the first structure makes the second the least recently used.
+        cache.get(structures[0])
+        cache.get(structures[2])
+        self.assertEqual(len(cache), 2)
+        self.assertIn(structures[0]['_id'], cache._parent_maps)  # pylint: disable=protected-access
+        self.assertNotIn(structures[1]['_id'], cache._parent_maps)  # pylint: disable=protected-access
+
+        # Maps bigger than the whole cache aren't cached.
+        cache.get(self.make_structure(6))
+        self.assertEqual(len(cache), 2)
@@ -88,6 +88,19 @@ class FakeGridFsItem(object):
         return chunk
 
 
+class FakeChunkedGridFsItem(FakeGridFsItem):
+    """
+    A FakeGridFsItem whose data is stored in chunks, which can be read a chunk at a time
+    """
+    chunk_size = 256
+
+    def readchunk(self):
+        """
+        Read the rest of the chunk at position cursor and move the cursor
+        """
+        return self.read(self.chunk_size - self.cursor % self.chunk_size)
+
+
 class MockImage(Mock):
     """
     This class pretends to be PIL.Image for purposes of thumbnails testing.
@@ -216,6 +229,23 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    @ddt.data((0, 255), (100, 1500), (300, 300), (256, 511))
+    @ddt.unpack
+    def test_static_content_stream_chunks(self, first_byte, last_byte):
+        """
+        Test that StaticContentStream streams chunked items a chunk at a time
+        """
+        data = SAMPLE_STRING
+        item = FakeChunkedGridFsItem(data)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        chunks = list(static_content_stream.stream_data_in_range(first_byte, last_byte))
+        self.assertEqual(''.join(chunks), data[first_byte:last_byte + 1])
+        self.assertTrue(all(len(chunk) <= FakeChunkedGridFsItem.chunk_size for chunk in chunks))
+
+        # Streaming all of the data starts over from the beginning.
+        self.assertEqual(''.join(static_content_stream.stream_data()), data)
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -1,12 +1,32 @@
 
 
+import logging
 import re
 
 import six
+import six.moves.cPickle as pickle
 from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from edx_django_utils import monitoring as monitoring_utils
+
+log = logging.getLogger(__name__)
 
 DEFAULT_PYTHON_LIB_FILENAME = 'python_lib.zip'
 
+DEFAULT_SAFE_EXEC_CACHE = {
+    # The alias, in the CACHES setting, of the cache to store results in.
+    # Results aren't cached if None.
+    'ALIAS': 'default',
+    # Seconds to keep results in the cache for.
+    'TIMEOUT': 24 * 60 * 60,
+    # Seconds to keep results of code that raised an exception in the
+    # cache for.  These are kept for a shorter time, since the exception
+    # may be transient, e.g. the sandbox timing out under load.
+    'EXCEPTION_TIMEOUT': 5 * 60,
+    # Results whose pickled size is larger than this many bytes aren't cached.
+    'MAX_ENTRY_SIZE': 512 * 1024,
+}
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -42,3 +62,62 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+class SafeExecCache(object):
+    """
+    Cache of the results of sandboxed Python problem code, for use as the
+    `cache` of safe_exec.  The results are stored in the Django cache that
+    the SAFE_EXEC_CACHE setting configures, so that they are shared across
+    requests and processes: identical randomized problems rendered for
+    different learners then skip the sandbox entirely.
+
+    safe_exec caches results as (exception message, globals) pairs, so the
+    results of code that raised an exception are cached too, for their own
+    (shorter) timeout.
+
+    Hits and misses are reported as custom metrics, from which the hit
+    rate can be computed.
+    """
+    def __init__(self):
+        self.config = dict(DEFAULT_SAFE_EXEC_CACHE, **getattr(settings, 'SAFE_EXEC_CACHE', {}))
+        self.cache = None
+        if self.config['ALIAS'] is not None:
+            try:
+                self.cache = caches[self.config['ALIAS']]
+            except InvalidCacheBackendError:
+                log.warning(u"SafeExecCache: No cache configured with alias %s", self.config['ALIAS'])
+
+    def get(self, key):
+        """
+        Returns the cached result for key, or None.
+        """
+        if self.cache is None:
+            return None
+
+        result = self.cache.get(key)
+        if result is None:
+            monitoring_utils.accumulate('safe_exec_cache.misses', 1)
+        else:
+            monitoring_utils.accumulate('safe_exec_cache.hits', 1)
+            if result[0]:
+                monitoring_utils.accumulate('safe_exec_cache.exception_hits', 1)
+        return result
+
+    def set(self, key, value, timeout_secs=None):
+        """
+        Caches value, a safe_exec result, for key.
+        """
+        if self.cache is None:
+            return
+
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.config['MAX_ENTRY_SIZE']:
+            monitoring_utils.accumulate('safe_exec_cache.oversized', 1)
+            return
+
+        if timeout_secs is None:
+            timeout_secs = self.config['EXCEPTION_TIMEOUT'] if value[0] else self.config['TIMEOUT']
+        self.cache.set(key, value, timeout_secs)
+        monitoring_utils.accumulate('safe_exec_cache.sets', 1)
+        monitoring_utils.accumulate('safe_exec_cache.size', size)
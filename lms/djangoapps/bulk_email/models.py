@@ -4,6 +4,8 @@ Models for bulk email
 
 
 import logging
+import re
+import string
 
 import markupsafe
 import six
@@ -23,7 +25,7 @@ from openedx.core.djangoapps.enrollments.errors import CourseModeNotFoundError
 from openedx.core.lib.html_to_text import html_to_text
 from openedx.core.lib.mail_utils import wrap_message
 from student.roles import CourseInstructorRole, CourseStaffRole
-from util.keyword_substitution import substitute_keywords_with_data
+from util.keyword_substitution import anonymous_id_from_user_id, substitute_keywords_with_data
 from util.query import use_read_replica_if_available
 
 log = logging.getLogger(__name__)
@@ -433,6 +435,141 @@ class CourseEmailTemplate(models.Model):
                 context[key] = markupsafe.escape(value)
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Compile the plain text message of plaintext, as render_plaintext
+        renders it, for all the recipients of an email.
+
+        `context` holds the values shared by all the recipients; see CompiledEmailTemplate.
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Compile the HTML message of htmltext, as render_htmltext renders it,
+        for all the recipients of an email.
+
+        `context` holds the values shared by all the recipients; see CompiledEmailTemplate.
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context, escape_values=True)
+
+
+class CompiledEmailTemplate(object):
+    """
+    A course email template, with the message body and the context values
+    shared by all the recipients of an email already rendered, so that
+    rendering the message of each recipient only fills in their own values.
+
+    The message of each recipient is the same as CourseEmailTemplate._render
+    would render with their context, which must have a `user_id`.
+    """
+    # The context values which differ between recipients.
+    RECIPIENT_KEYS = ('name', 'email', 'user_id', 'unsubscribe_link')
+    # The slot of the %%USER_ID%% keyword, which isn't a context value.
+    ANONYMOUS_USER_ID = 'anonymous_user_id'
+
+    # The placeholders of the slots in the compiled message, which can't appear in email text.
+    SLOT_FORMAT = u'\x00{}\x00'
+    SLOT_PATTERN = re.compile(u'\x00(\\w+)\x00')
+
+    def __init__(self, format_string, message_body, context, escape_values=False):
+        self.format_string = format_string
+        self.message_body = message_body
+        self.escape_values = escape_values
+        # The parts of the message: wrapped text, or lists of the text and slots of a line to fill and wrap.
+        self.parts = None
+
+        if self._formats_recipient_values(format_string):
+            # The template formats a recipient's value specially, so each message is rendered in full.
+            return
+
+        shared_context = {
+            key: self._escape(value)
+            for key, value in six.iteritems(context) if key not in self.RECIPIENT_KEYS
+        }
+        slot_context = dict(shared_context, **{key: self.SLOT_FORMAT.format(key) for key in self.RECIPIENT_KEYS})
+
+        # Substitute the keywords of the message body as CourseEmailTemplate._render does.
+        if 'course_id' in slot_context:
+            message_body = message_body.replace('%%USER_ID%%', self.SLOT_FORMAT.format(self.ANONYMOUS_USER_ID))
+            message_body = substitute_keywords_with_data(message_body, slot_context)
+
+        result = format_string.format(**slot_context)
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        result = result.replace(message_body_tag, message_body, 1)
+
+        # Lines are wrapped on their own, so only those with slots need wrapping again once filled.
+        self.parts = []
+        static_lines = []
+        for line in result.split('\n'):
+            if self.SLOT_PATTERN.search(line):
+                if static_lines:
+                    self.parts.append(wrap_message('\n'.join(static_lines)))
+                    static_lines = []
+                self.parts.append(self.SLOT_PATTERN.split(line))
+            else:
+                static_lines.append(line)
+        if static_lines:
+            self.parts.append(wrap_message('\n'.join(static_lines)))
+
+    def _formats_recipient_values(self, format_string):
+        """
+        Return whether format_string converts, formats, or indexes any recipient's value.
+        """
+        for __, field_name, format_spec, conversion in string.Formatter().parse(format_string):
+            if field_name in self.RECIPIENT_KEYS and (format_spec or conversion):
+                return True
+            if field_name and re.split(r'[.\[]', field_name, 1)[0] in self.RECIPIENT_KEYS and \
+                    field_name not in self.RECIPIENT_KEYS:
+                return True
+        return False
+
+    def _escape(self, value):
+        """
+        HTML-escape string values for HTML messages, as CourseEmailTemplate.render_htmltext does.
+        """
+        if self.escape_values and isinstance(value, six.string_types):
+            return markupsafe.escape(value)
+        return value
+
+    def render(self, context):
+        """
+        Render the message of the recipient of context.
+        """
+        if self.parts is None:
+            context = {key: self._escape(value) for key, value in six.iteritems(context)}
+            return CourseEmailTemplate._render(  # pylint: disable=protected-access
+                self.format_string, self.message_body, context
+            )
+
+        values = {}
+        lines = []
+        for part in self.parts:
+            if isinstance(part, six.string_types):
+                lines.append(part)
+                continue
+            # A line's parts alternate between text and the slots between them.
+            for index in range(1, len(part), 2):
+                slot = part[index]
+                if slot not in values:
+                    values[slot] = self._slot_value(slot, context)
+            line = u''.join(
+                values.get(item, item) if index % 2 else item for index, item in enumerate(part)
+            )
+            lines.append(wrap_message(line))
+        return u'\n'.join(lines)
+
+    def _slot_value(self, slot, context):
+        """
+        Return the text filling slot for the recipient of context.
+        """
+        if slot == self.ANONYMOUS_USER_ID:
+            return anonymous_id_from_user_id(context['user_id'])
+        if slot in self.RECIPIENT_KEYS:
+            return u'{}'.format(self._escape(context[slot]))
+        # Not a slot, but text which looks like one.
+        return self.SLOT_FORMAT.format(slot)
+
 
 @python_2_unicode_compatible
 class CourseAuthorization(models.Model):
@@ -512,6 +512,12 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Render the parts of the messages which are the same for all recipients once,
+        # so that only the recipients' own values are filled in for each of them.
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
 
         start_time = time.time()
         while to_list:
@@ -539,13 +545,12 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             email_context['email'] = email
             email_context['name'] = current_recipient['profile__name']
             email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
             email_context['unsubscribe_link'] = get_unsubscribed_link(current_recipient['username'],
                                                                       text_type(course_email.course_id))
 
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            # Construct message content using the compiled templates and context:
+            plaintext_msg = plaintext_template.render(email_context)
+            html_msg = html_template.render(email_context)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
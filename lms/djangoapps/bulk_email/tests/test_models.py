@@ -171,6 +171,7 @@ class NoCourseEmailTemplateTest(TestCase):
             CourseEmailTemplate.get_template()
 
 
+@ddt.ddt
 class CourseEmailTemplateTest(TestCase):
     """Test the CourseEmailTemplate model."""
 
@@ -269,6 +270,34 @@ class CourseEmailTemplateTest(TestCase):
         self.assertIn(context['course_title'], message)
         self.assertIn(context['name'], message)
 
+    @ddt.data('plaintext', 'htmltext')
+    def test_compiled_template(self, text_format):
+        template = CourseEmailTemplate.get_template()
+        body = u"Dear %%USER_FULLNAME%% (%%USER_ID%%), thanks for enrolling in %%COURSE_DISPLAY_NAME%%.\n" + u"x " * 500
+        shared_context = self._add_xss_fields(self._get_sample_html_context())
+        for key in ('name', 'email', 'user_id', 'unsubscribe_link'):
+            del shared_context[key]
+        compiled = getattr(template, 'compile_' + text_format)(body, dict(shared_context))
+
+        for user in UserFactory.create_batch(2, profile__name=u"<b>Åsa</b>"):
+            context = dict(
+                shared_context,
+                name=user.profile.name,
+                email=user.email,
+                user_id=user.id,
+                unsubscribe_link=u'/bulk_email/email/optout/{}?a&b'.format(user.username),
+            )
+            expected = getattr(template, 'render_' + text_format)(body, dict(context))
+            self.assertEqual(compiled.render(context), expected)
+
+    def test_compiled_template_formatting_recipient_values(self):
+        template = CourseEmailTemplate(plain_template=u"{name!r}, {{message_body}}", html_template=u"")
+        context = self._add_xss_fields(self._get_sample_plain_context())
+        compiled = template.compile_plaintext(u"Dear %%USER_FULLNAME%%", {})
+        self.assertEqual(
+            compiled.render(context), template.render_plaintext(u"Dear %%USER_FULLNAME%%", dict(context))
+        )
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
@@ -297,7 +297,7 @@ class CertificatesListRestApiTest(AuthAndScopesTestMixin, SharedModuleStoreTestC
             self.assertEqual(len(resp.data), 0)
 
         # Test student with 1 certificate
-        with self.assertNumQueries(14):
+        with self.assertNumQueries(15):
             resp = self.get_response(
                 AuthType.jwt,
                 requesting_user=self.student,
@@ -337,7 +337,7 @@ class CertificatesListRestApiTest(AuthAndScopesTestMixin, SharedModuleStoreTestC
             download_url='www.google.com',
             grade="0.88",
         )
-        with self.assertNumQueries(14):
+        with self.assertNumQueries(15):
             resp = self.get_response(
                 AuthType.jwt,
                 requesting_user=student_2_certs,
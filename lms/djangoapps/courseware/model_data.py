@@ -39,6 +39,7 @@ from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.lib.cache_utils import get_cache
 from xmodule.modulestore.django import modulestore
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
@@ -940,6 +941,8 @@ class ScoresClient(object):
     """
     Score = namedtuple('Score', 'correct total created')
 
+    _CACHE_NAMESPACE = u'courseware.model_data.ScoresClient'
+
     def __init__(self, course_key, user_id):
         self.course_key = course_key
         self.user_id = user_id
@@ -967,6 +970,40 @@ class ScoresClient(object):
         })
         self._has_fetched = True
 
+    @classmethod
+    def prefetch(cls, course_key, users, locations):
+        """
+        Prefetches, in a single query, the scores of the given users for
+        the given locations in the given course.  Clients subsequently
+        created with create_for_locations for any of these users and any
+        subset of these locations use the prefetched scores.
+        """
+        locations = set(locations)
+        user_ids = [user.id for user in users]
+        prefetched_scores = {user_id: {} for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=user_ids,
+            course_id=course_key,
+            module_state_key__in=locations,
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+            'student_id', 'module_state_key', 'grade', 'max_grade', 'created',
+        ):
+            prefetched_scores[user_id][location.map_into_course(course_key)] = cls.Score(correct, total, created)
+
+        get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(course_key)] = (locations, prefetched_scores)
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears prefetched scores for this course from the RequestCache.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
+    @classmethod
+    def _cache_key(cls, course_key):
+        return u"scores_cache.{}".format(course_key)
+
     def get(self, location):
         """
         Get the score for a given location, if it exists.
@@ -986,6 +1023,14 @@ class ScoresClient(object):
     def create_for_locations(cls, course_id, user_id, scorable_locations):
         """Create a ScoresClient with pre-fetched data for the given locations."""
         client = cls(course_id, user_id)
+        prefetched = get_cache(cls._CACHE_NAMESPACE).get(cls._cache_key(course_id))
+        if prefetched is not None:
+            prefetched_locations, prefetched_scores = prefetched
+            if user_id in prefetched_scores and prefetched_locations.issuperset(scorable_locations):
+                client._locations_to_scores.update(prefetched_scores[user_id])  # pylint: disable=protected-access
+                client._has_fetched = True  # pylint: disable=protected-access
+                return client
+
         client.fetch_scores(scorable_locations)
         return client
 
@@ -6,13 +6,16 @@ defined in edx_user_state_client.
 
 from collections import defaultdict
 
+import ddt
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
 
 from lms.djangoapps.courseware.tests.factories import UserFactory
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
+@ddt.ddt
 class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
     """
     Tests of the DjangoUserStateClient backend.
@@ -34,3 +37,85 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
         super(TestDjangoUserStateClient, self).setUp()
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
+
+    def get_many_for_users(self, users, blocks, fields=None):
+        """
+        Get the state for the specified users and blocks, as a dict mapping
+        (user, block) to state.
+        """
+        user_states = self.client.get_many_for_users(
+            usernames=[self._user(user) for user in users],
+            block_keys=[self._block(block) for block in blocks],
+            fields=fields,
+        )
+        return {
+            (user_state.username, user_state.block_key): user_state.state
+            for user_state in user_states
+        }
+
+    def _set_states_for_users(self):
+        """
+        Store states for several users, in blocks of two courses.
+        """
+        self.set(0, 0, {'a': 'b'})
+        self.set(0, 1, {'b': 'c'})
+        self.set(1, 1, {'c': 'd', 'e': 'f'})
+        self.set(1, 1000, {'g': 'h'})
+        self.set(2, 0, {'i': 'j'})
+        self.set(2, 1, {'k': 'l'})
+        self.delete(2, 1)
+
+    def test_get_many_for_users(self):
+        self._set_states_for_users()
+        self.assertEqual(
+            self.get_many_for_users([0, 1, 2], [0, 1, 1000]),
+            {
+                (self._user(0), self._block(0)): {'a': 'b'},
+                (self._user(0), self._block(1)): {'b': 'c'},
+                (self._user(1), self._block(1)): {'c': 'd', 'e': 'f'},
+                (self._user(1), self._block(1000)): {'g': 'h'},
+                (self._user(2), self._block(0)): {'i': 'j'},
+            }
+        )
+
+    def test_get_many_for_users_subset(self):
+        self._set_states_for_users()
+        self.assertEqual(
+            self.get_many_for_users([1], [1], fields=['e']),
+            {(self._user(1), self._block(1)): {'e': 'f'}},
+        )
+
+    @ddt.data((400, 2), (1, 9))
+    @ddt.unpack
+    def test_get_many_for_users_chunked(self, chunk_size, num_queries):
+        self._set_states_for_users()
+        expected_states = self.get_many_for_users([0, 1, 2], [0, 1, 1000])
+        with patch.object(DjangoXBlockUserStateClient, 'BULK_READ_CHUNK_SIZE', chunk_size):
+            with self.assertNumQueries(num_queries):
+                self.assertEqual(self.get_many_for_users([0, 1, 2], [0, 1, 1000]), expected_states)
+
+    @ddt.data((1, 6), (2, 3), (4, 2), (5000, 1))
+    @ddt.unpack
+    def test_iter_course_batched(self, batch_size, num_queries):
+        for user in range(5):
+            self.set(user, 0, {'a': user, 'b': 'c'})
+        self.delete(4, 0)
+
+        with self.assertNumQueries(num_queries):
+            user_states = list(self.client.iter_all_for_course(self._course(0), batch_size=batch_size))
+        self.assertEqual(
+            [(user_state.username, user_state.state) for user_state in user_states],
+            [(self._user(user), {'a': user, 'b': 'c'}) for user in range(4)],
+        )
+
+    def test_iter_block_fields(self):
+        for user in range(2):
+            self.set(user, 0, {'a': user, 'b': 'c'})
+
+        self.assertEqual(
+            [
+                (user_state.username, user_state.state)
+                for user_state in self.client.iter_all_for_block(self._block(0), batch_size=1, fields=['a'])
+            ],
+            [(self._user(user), {'a': user}) for user in range(2)],
+        )
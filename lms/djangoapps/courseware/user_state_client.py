@@ -12,14 +12,13 @@ from time import time
 import six
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.utils import IntegrityError
 from edx_django_utils import monitoring as monitoring_utils
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, chunks
 
 try:
     import simplejson as json
@@ -53,6 +52,10 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
     # Use this sample rate for DataDog events.
     API_DATADOG_SAMPLE_RATE = 0.1
 
+    # Maximum number of usernames, and of block keys, in each query made by
+    # get_many_for_users.  Kept below sqlite's limit on query parameters.
+    BULK_READ_CHUNK_SIZE = 400
+
     class ServiceUnavailable(XBlockUserStateClient.ServiceUnavailable):
         """
         This error is raised if the service backing this client is currently unavailable.
@@ -106,6 +109,40 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _get_student_module_states(self, usernames, block_keys):
+        """
+        Retrieve the raw state of the :class:`~StudentModule`s for the supplied
+        ``usernames`` and ``block_keys``, with one query per course for each
+        chunk of usernames and chunk of block keys.  The results of each
+        query are streamed from the database rather than loaded at once.
+
+        Arguments:
+            usernames (list of str): The names of the users to load states for.
+            block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
+
+        Yields:
+            (username, usage_key, state, modified) tuples, where state is the
+            serialized JSON state of the block for the user.
+        """
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+
+        for course_key, usage_keys in by_course:
+            usage_keys = list(usage_keys)
+            for usernames_chunk in chunks(usernames, self.BULK_READ_CHUNK_SIZE):
+                for usage_keys_chunk in chunks(usage_keys, self.BULK_READ_CHUNK_SIZE):
+                    query = StudentModule.objects.filter(
+                        student__username__in=usernames_chunk,
+                        course_id=course_key,
+                        module_state_key__in=usage_keys_chunk,
+                    ).values_list('student__username', 'module_state_key', 'state', 'modified')
+
+                    for username, module_state_key, state, modified in query.iterator():
+                        yield (username, module_state_key.map_into_course(course_key), state, modified)
+
     def _nr_metric_name(self, function_name, stat_name, block_type=None):
         """
         Return a metric name (string) representing the provided descriptors.
@@ -209,6 +246,65 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('get_many', 'duration', duration)
 
+    def get_many_for_users(self, usernames, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of each of the specified users for
+        the specified XBlock usages, in bulk.
+
+        Arguments:
+            usernames: The names of the users whose state should be retrieved
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each of the specified users and each
+            specified UsageKey in block_keys for which the user has state,
+            in no particular order.  The JSON state of each block is only
+            decoded when its tuple is yielded.
+        """
+        if scope != Scope.user_state:
+            raise ValueError(u"Only Scope.user_state is supported, not {}".format(scope))
+
+        evt_time = time()
+
+        # count how many times this function gets called
+        self._nr_stat_increment('get_many_for_users', 'calls')
+
+        # keep track of users and blocks requested
+        self._nr_stat_accumulate('get_many_for_users', 'users_requested', len(usernames))
+        self._nr_stat_accumulate('get_many_for_users', 'blocks_requested', len(block_keys))
+
+        module_states = self._get_student_module_states(usernames, block_keys)
+        for username, usage_key, raw_state, modified in module_states:
+            # A state of None means the user has never looked at the block,
+            # and a serialized empty dict means its state has been deleted, so
+            # conformant UserStateClients should treat both as if they don't exist.
+            if raw_state is None or raw_state == '{}':
+                continue
+
+            state = json.loads(raw_state)
+            if state == {}:
+                continue
+
+            # collect statistics for metric reporting
+            self._nr_block_stat_increment('get_many_for_users', usage_key.block_type, 'blocks_out')
+            self._nr_block_stat_accumulate('get_many_for_users', usage_key.block_type, 'size', len(raw_state))
+
+            # filter state on fields
+            if fields is not None:
+                state = {
+                    field: state[field]
+                    for field in fields
+                    if field in state
+                }
+            yield XBlockUserState(username, usage_key, state, modified, scope)
+
+        # The rest of this method exists only to report metrics.
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('get_many_for_users', 'duration', duration)
+
     def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
         """
         Set fields for a particular XBlock.
@@ -395,7 +491,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
             yield XBlockUserState(username, block_key, state, history_entry.created, scope)
 
-    def iter_all_for_block(self, block_key, scope=Scope.user_state):
+    def iter_all_for_block(self, block_key, scope=Scope.user_state, batch_size=None, fields=None):
         """
         Return an iterator over the data stored in the block (e.g. a problem block).
 
@@ -405,6 +501,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         Arguments:
             block_key: an XBlock's locator (e.g. :class:`~BlockUsageLocator`)
             scope (Scope): must be `Scope.user_state`
+            batch_size (int): the number of rows to fetch from the database at a time.
+                Defaults to the USER_STATE_BATCH_SIZE setting.
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
 
         Returns:
             an iterator over all data. Each invocation returns the next :class:`~XBlockUserState`
@@ -413,21 +512,10 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(module_state_key=block_key)
-        p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
-
-        for page_number in p.page_range:
-            page = p.page(page_number)
-
-            for sm in page.object_list:
-                state = json.loads(sm.state)
-
-                if state == {}:
-                    continue
+        results = StudentModule.objects.filter(module_state_key=block_key)
+        return self._iter_all(results, scope, batch_size, fields)
 
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
-
-    def iter_all_for_course(self, course_key, block_type=None, scope=Scope.user_state):
+    def iter_all_for_course(self, course_key, block_type=None, scope=Scope.user_state, batch_size=None, fields=None):
         """
         Return an iterator over all data stored in a course's blocks.
 
@@ -437,6 +525,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         Arguments:
             course_key: a course locator
             scope (Scope): must be `Scope.user_state`
+            batch_size (int): the number of rows to fetch from the database at a time.
+                Defaults to the USER_STATE_BATCH_SIZE setting.
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
 
         Returns:
             an iterator over all data. Each invocation returns the next :class:`~XBlockUserState`
@@ -445,19 +536,50 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(course_id=course_key)
+        results = StudentModule.objects.filter(course_id=course_key)
         if block_type:
             results = results.filter(module_type=block_type)
 
-        p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
+        return self._iter_all(results, scope, batch_size, fields)
 
-        for page_number in p.page_range:
-            page = p.page(page_number)
+    def _iter_all(self, results, scope, batch_size, fields):
+        """
+        Return an iterator over the XBlockUserStates of the given StudentModule
+        queryset, fetched in batches of batch_size rows.
+
+        Batches are fetched with keyset pagination on the primary key, rather
+        than with OFFSETs, so that fetching a batch doesn't get slower the
+        further into the queryset it is, and no query or transaction is held
+        open between batches.  Only the columns needed for the XBlockUserStates
+        are fetched.
+        """
+        batch_size = batch_size or settings.USER_STATE_BATCH_SIZE
+        results = results.order_by('id').values_list(
+            'id', 'student__username', 'module_state_key', 'state', 'modified',
+        )
 
-            for sm in page.object_list:
-                state = json.loads(sm.state)
+        last_id = None
+        while True:
+            batch = results if last_id is None else results.filter(id__gt=last_id)
+            batch = list(batch[:batch_size])
 
+            for _, username, module_state_key, raw_state, modified in batch:
+                if raw_state is None:
+                    continue
+
+                state = json.loads(raw_state)
                 if state == {}:
                     continue
 
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
+                # filter state on fields
+                if fields is not None:
+                    state = {
+                        field: state[field]
+                        for field in fields
+                        if field in state
+                    }
+                yield XBlockUserState(username, module_state_key, state, modified, scope)
+
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1][0]
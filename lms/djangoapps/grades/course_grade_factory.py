@@ -4,11 +4,13 @@ Course Grade Factory Class
 
 
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import six
 from six import text_type
 
+from lms.djangoapps.courseware.model_data import ScoresClient
 from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_CHANGED,
     COURSE_GRADE_NOW_FAILED,
@@ -19,11 +21,42 @@ from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade
-from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .models_api import (
+    bulk_prefetch_grade_overrides_and_visible_blocks,
+    clear_prefetched_course_grades,
+    clear_prefetched_grade_overrides_and_visible_blocks,
+    prefetch_course_and_subsection_grades,
+    prefetch_grade_overrides_and_visible_blocks
+)
+from .scores import possibly_scored
+from .subsection_grade_factory import clear_prefetched_submissions_scores, prefetch_submissions_scores
 
 log = getLogger(__name__)
 
 
+def _batches(iterable, batch_size):
+    """
+    Yields lists of up to batch_size consecutive items of the given iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _has_persisted_course_grade(user, course_key):
+    """
+    Returns whether the given user has a persisted grade in the course.
+    """
+    try:
+        PersistentCourseGrade.read(user.id, course_key)
+    except PersistentCourseGrade.DoesNotExist:
+        return False
+    return True
+
+
 class CourseGradeFactory(object):
     """
     Factory class to create Course Grade objects.
@@ -90,6 +123,7 @@ class CourseGradeFactory(object):
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            batch_size=None,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -99,6 +133,11 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If batch_size is given, students are graded in batches of that size
+        and the persisted grades, overrides, visible blocks, and scores of
+        each batch are fetched with a constant number of queries before
+        the batch is graded, rather than with several queries per student.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -109,8 +148,57 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+        if batch_size:
+            for users_batch in _batches(users, batch_size):
+                self._prefetch_batch(users_batch, course_data, force_update)
+                try:
+                    for user in users_batch:
+                        yield self._iter_grade_result(user, course_data, force_update)
+                finally:
+                    self._clear_prefetched_batch(users_batch, course_data)
+        else:
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update)
+
+    @staticmethod
+    def _prefetch_batch(users, course_data, force_update):
+        """
+        Prefetches, into the request cache, the persisted grades of the
+        given users in the course and, for those users whose grades will
+        be computed rather than read, their overrides, visible blocks,
+        and scores.
+        """
+        course_key = course_data.course_key
+        should_persist = should_persist_grades(course_key)
+        if should_persist:
+            prefetch_course_and_subsection_grades(course_key, users)
+
+        if force_update or not should_persist:
+            users_to_compute = users
+        elif assume_zero_if_absent(course_key):
+            users_to_compute = []
+        else:
+            users_to_compute = [user for user in users if not _has_persisted_course_grade(user, course_key)]
+
+        if users_to_compute:
+            if should_persist:
+                bulk_prefetch_grade_overrides_and_visible_blocks(course_key, users_to_compute)
+            scorable_locations = [
+                block_key for block_key in course_data.collected_structure if possibly_scored(block_key)
+            ]
+            ScoresClient.prefetch(course_key, users_to_compute, scorable_locations)
+            prefetch_submissions_scores(course_key, users_to_compute)
+
+    @staticmethod
+    def _clear_prefetched_batch(users, course_data):
+        """
+        Clears the data prefetched by _prefetch_batch from the request cache.
+        """
+        course_key = course_data.course_key
+        clear_prefetched_course_grades(course_key)
+        clear_prefetched_grade_overrides_and_visible_blocks(course_key, users)
+        ScoresClient.clear_prefetched_data(course_key)
+        clear_prefetched_submissions_scores(course_key)
 
     def _iter_grade_result(self, user, course_data, force_update):
         try:
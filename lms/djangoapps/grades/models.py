@@ -178,6 +178,35 @@ class VisibleBlocks(models.Model):
             prefetched = cls._initialize_cache(user_id, course_key)
         return prefetched
 
+    @classmethod
+    def bulk_prefetch(cls, course_key, users):
+        """
+        Prefetches, in a single query, the visible blocks of all the given
+        users in the given course and stores them in the cache, as
+        bulk_read would for each user.
+        """
+        prefetched = {user.id: {} for user in users}
+        grades_with_blocks = PersistentSubsectionGrade.objects.select_related('visible_blocks').filter(
+            user_id__in=list(prefetched),
+            course_id=course_key,
+        )
+        for grade in grades_with_blocks:
+            prefetched[grade.user_id][grade.visible_blocks.hashed] = grade.visible_blocks
+
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_prefetched in six.iteritems(prefetched):
+            cache[cls._cache_key(user_id, course_key)] = user_prefetched
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key, users):
+        """
+        Clears the visible blocks of the given users in the given course
+        from the RequestCache.
+        """
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user in users:
+            cache.pop(cls._cache_key(user.id, course_key), None)
+
     @classmethod
     def cached_get_or_create(cls, user_id, blocks):
         """
@@ -694,12 +723,48 @@ class PersistentSubsectionGradeOverride(models.Model):
 
     @classmethod
     def prefetch(cls, user_id, course_key):
+        if user_id in get_cache(cls._CACHE_NAMESPACE).get(cls._bulk_prefetched_key(course_key), ()):
+            # Already fetched, along with other users' overrides, by bulk_prefetch.
+            return
         get_cache(cls._CACHE_NAMESPACE)[(user_id, str(course_key))] = {
             override.grade.usage_key: override
             for override in
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_prefetch(cls, course_key, users):
+        """
+        Prefetches, in a single query, the overrides of all the given
+        users in the given course, as prefetch would for each user.
+        """
+        prefetched = {user.id: {} for user in users}
+        overrides = cls.objects.select_related('grade').filter(
+            grade__user_id__in=list(prefetched),
+            grade__course_id=course_key,
+        )
+        for override in overrides:
+            prefetched[override.grade.user_id][override.grade.usage_key] = override
+
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_prefetched in six.iteritems(prefetched):
+            cache[(user_id, str(course_key))] = user_prefetched
+        cache[cls._bulk_prefetched_key(course_key)] = set(prefetched)
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears overrides prefetched by bulk_prefetch for this course from
+        the RequestCache.
+        """
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id in cache.pop(cls._bulk_prefetched_key(course_key), ()):
+            cache.pop((user_id, str(course_key)), None)
+
+    @classmethod
+    def _bulk_prefetched_key(cls, course_key):
+        return u"bulk_prefetched_overrides.{}".format(course_key)
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
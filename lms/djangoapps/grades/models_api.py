@@ -17,6 +17,16 @@ def prefetch_grade_overrides_and_visible_blocks(user, course_key):
     _VisibleBlocks.bulk_read(user.id, course_key)
 
 
+def bulk_prefetch_grade_overrides_and_visible_blocks(course_key, users):
+    _PersistentSubsectionGradeOverride.bulk_prefetch(course_key, users)
+    _VisibleBlocks.bulk_prefetch(course_key, users)
+
+
+def clear_prefetched_grade_overrides_and_visible_blocks(course_key, users):
+    _PersistentSubsectionGradeOverride.clear_prefetched_data(course_key)
+    _VisibleBlocks.clear_prefetched_data(course_key, users)
+
+
 def prefetch_course_grades(course_key, users):
     _PersistentCourseGrade.prefetch(course_key, users)
 
@@ -6,13 +6,17 @@ SubsectionGrade Factory Class
 from collections import OrderedDict
 from logging import getLogger
 
+import six
 from lazy import lazy
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import anonymous_id_for_user
 
@@ -21,6 +25,42 @@ from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSu
 
 log = getLogger(__name__)
 
+_SUBMISSIONS_CACHE_NAMESPACE = u'grades.subsection_grade_factory.submissions_scores'
+
+
+def prefetch_submissions_scores(course_key, users):
+    """
+    Prefetches, in a single query, the scores stored by the Submissions
+    API for all the given users in the given course.  The prefetched
+    scores have the same shape as those returned by
+    submissions_api.get_scores and are used by SubsectionGradeFactory
+    instances for these users.
+    """
+    anonymous_user_ids = {anonymous_id_for_user(user, course_key): user.id for user in users}
+    prefetched_scores = {user_id: {} for user_id in six.itervalues(anonymous_user_ids)}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=list(anonymous_user_ids),
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        if summary.latest.is_hidden():
+            continue
+        user_id = anonymous_user_ids[summary.student_item.student_id]
+        prefetched_scores[user_id][summary.student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+
+    get_cache(_SUBMISSIONS_CACHE_NAMESPACE)[_submissions_cache_key(course_key)] = prefetched_scores
+
+
+def clear_prefetched_submissions_scores(course_key):
+    """
+    Clears prefetched submissions scores for this course from the RequestCache.
+    """
+    get_cache(_SUBMISSIONS_CACHE_NAMESPACE).pop(_submissions_cache_key(course_key), None)
+
+
+def _submissions_cache_key(course_key):
+    return u"submissions_scores_cache.{}".format(course_key)
+
 
 class SubsectionGradeFactory(object):
     """
@@ -121,6 +161,12 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = get_cache(_SUBMISSIONS_CACHE_NAMESPACE).get(
+            _submissions_cache_key(self.course_data.course_key), {}
+        )
+        if self.student.id in prefetched_scores:
+            return prefetched_scores[self.student.id]
+
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
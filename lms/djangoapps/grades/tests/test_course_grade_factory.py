@@ -11,8 +11,10 @@ from mock import patch
 from six import text_type
 
 from lms.djangoapps.courseware.access import has_access
+from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.lib.cache_utils import get_cache
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -243,6 +245,7 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertEqual(expected_summary, actual_summary)
 
 
+@ddt.ddt
 class TestGradeIteration(SharedModuleStoreTestCase):
     """
     Test iteration through student course grades.
@@ -337,6 +340,28 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
+    @ddt.data(1, 2, 5, 10)
+    def test_batched_iteration(self, batch_size):
+        expected_results = list(CourseGradeFactory().iter(self.students, self.course, force_update=True))
+        batched_results = list(
+            CourseGradeFactory().iter(self.students, self.course, force_update=True, batch_size=batch_size)
+        )
+        self.assertEqual(
+            [student for student, _, _ in batched_results],
+            [student for student, _, _ in expected_results],
+        )
+        for (_, expected_grade, _), (_, batched_grade, error) in zip(expected_results, batched_results):
+            self.assertIsNone(error)
+            self.assertEqual(batched_grade.percent, expected_grade.percent)
+            self.assertEqual(batched_grade.letter_grade, expected_grade.letter_grade)
+
+    def test_batched_iteration_clears_prefetched_data(self):
+        list(CourseGradeFactory().iter(self.students, self.course, force_update=True, batch_size=2))
+        self.assertEqual(
+            get_cache(ScoresClient._CACHE_NAMESPACE),  # pylint: disable=protected-access
+            {},
+        )
+
     def _course_grades_and_errors_for(self, course, students):
         """
         Simple helper method to iterate through student grades and give us
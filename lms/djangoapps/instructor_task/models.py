@@ -20,13 +20,14 @@ import hashlib
 import json
 import logging
 import os.path
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 import six
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -193,12 +194,54 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class ReportFile(object):
+    """
+    A CSV file for reports download that rows can be appended to
+    incrementally.  The file is kept in memory until it grows larger than
+    max_size bytes, at which point it is rolled over to a temporary file on
+    disk, so that the memory used to build a report does not grow with the
+    size of the report.
+    """
+    # Size, in bytes, above which report files are rolled over to disk.
+    MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+    def __init__(self, max_size=MAX_MEMORY_SIZE):
+        self.file = SpooledTemporaryFile(max_size=max_size)
+        self._row_buffer = six.BytesIO() if six.PY2 else six.StringIO()
+        self._csv_writer = csv.writer(self._row_buffer)
+        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
+        if six.PY2:
+            self.file.write(codecs.BOM_UTF8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append_rows(self, rows):
+        """
+        Appends the given rows (each row is an iterable of strings) to the
+        file, in csv format.
+        """
+        for row in rows:
+            if six.PY2:
+                self._csv_writer.writerow([six.text_type(item).encode('utf-8') for item in row])
+                self.file.write(self._row_buffer.getvalue())
+            else:
+                self._csv_writer.writerow([six.text_type(item) for item in row])
+                self.file.write(self._row_buffer.getvalue().encode('utf-8'))
+            self._row_buffer.seek(0)
+            self._row_buffer.truncate()
+
+    def close(self):
+        self.file.close()
+
+
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -230,18 +273,6 @@ class ReportStore(object):
             )
         return DjangoStorageReportStore.from_config(config_name)
 
-    def _get_utf8_encoded_rows(self, rows):
-        """
-        Given a list of `rows` containing unicode strings, return a
-        new list of rows with those strings encoded as utf-8 for CSV
-        compatibility.
-        """
-        for row in rows:
-            if six.PY2:
-                yield [six.text_type(item).encode('utf-8') for item in row]
-            else:
-                yield [six.text_type(item) for item in row]
-
 
 class DjangoStorageReportStore(ReportStore):
     """
@@ -291,14 +322,18 @@ class DjangoStorageReportStore(ReportStore):
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
         """
-        output_buffer = ContentFile('')
-        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
-        if six.PY2:
-            output_buffer.write(codecs.BOM_UTF8)
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        with ReportFile() as report_file:
+            report_file.append_rows(rows)
+            self.store_report_file(course_id, filename, report_file)
+
+    def store_report_file(self, course_id, filename, report_file):
+        """
+        Store the contents of the given ReportFile in a directory determined
+        by hashing `course_id`, and name the file `filename`.  The contents
+        are streamed to the storage backend rather than read into memory.
+        """
+        report_file.file.seek(0)
+        self.storage.save(self.path_to(course_id, filename), File(report_file.file))
 
     def links_for(self, course_id):
         """
@@ -47,8 +47,8 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
 from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     override_score_module_state,
+    perform_bulk_rescore,
     perform_module_state_update,
-    rescore_problem_module_state,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -77,9 +77,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_bulk_rescore, xmodule_instance_args)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
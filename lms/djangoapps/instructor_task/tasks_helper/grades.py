@@ -3,20 +3,28 @@ Functionality for generating grade reports.
 """
 
 
+import csv
+import io
 import logging
+import os
 import re
+import shutil
 from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 from itertools import chain
+from tempfile import mkdtemp
 from time import time
 
+import billiard
 import six
+from django import db
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from lazy import lazy
 from pytz import UTC
 from six import text_type
-from six.moves import zip, zip_longest
+from six.moves import zip_longest
 
 from course_blocks.api import get_course_blocks
 from course_modes.models import CourseMode
@@ -25,13 +33,13 @@ from lms.djangoapps.courseware.courses import get_course_by_id
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from lms.djangoapps.grades.api import CourseGradeFactory
 from lms.djangoapps.grades.api import context as grades_context
-from lms.djangoapps.grades.api import prefetch_course_and_subsection_grades
 from lms.djangoapps.instructor_analytics.basic import list_problem_responses
 from lms.djangoapps.instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.instructor_task.config.waffle import (
     generate_grade_report_for_verified_only,
     optimize_get_learners_switch_enabled
 )
+from lms.djangoapps.instructor_task.models import ReportFile
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from opaque_keys.edx.keys import UsageKey
@@ -40,12 +48,13 @@ from openedx.core.djangoapps.course_groups.cohorts import bulk_cache_cohorts, ge
 from openedx.core.djangoapps.user_api.course_tag.api import BulkCourseTags
 from student.models import CourseEnrollment
 from student.roles import BulkRoleCache
-from xmodule.modulestore.django import modulestore
+from xmodule.contentstore.django import _CONTENTSTORE
+from xmodule.modulestore.django import clear_existing_modulestores, modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import upload_csv_to_report_store, upload_report_file_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -53,6 +62,9 @@ ENROLLED_IN_COURSE = 'enrolled'
 
 NOT_ENROLLED_IN_COURSE = 'unenrolled'
 
+# The context of the report computed by a worker process of CourseGradeReport._process_pool.
+_worker_context = None  # pylint: disable=invalid-name
+
 
 def _user_enrollment_status(user, course_id):
     """
@@ -77,6 +89,7 @@ class _CourseGradeReportContext(object):
     boundaries.
     """
     def __init__(self, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+        self._init_args = (_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
         self.task_info_string = (
             u'Task: {task_id}, '
             u'InstructorTask ID: {entry_id}, '
@@ -92,6 +105,13 @@ class _CourseGradeReportContext(object):
         self.course_id = course_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
 
+    def __reduce__(self):
+        """
+        Only the arguments this context was constructed with are passed to
+        worker processes, which lazily recompute everything else.
+        """
+        return (self.__class__, self._init_args)
+
     @lazy
     def course(self):
         return get_course_by_id(self.course_id)
@@ -193,7 +213,6 @@ class _CourseGradeBulkContext(object):
         self.enrollments = _EnrollmentBulkContext(context, users)
         bulk_cache_cohorts(context.course_id, users)
         BulkRoleCache.prefetch(users)
-        prefetch_course_and_subsection_grades(context.course_id, users)
         BulkCourseTags.prefetch(context.course_id, users)
 
 
@@ -204,6 +223,10 @@ class CourseGradeReport(object):
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Number of enrollees in each shard of a report that is computed
+    # by a pool of worker processes.
+    USER_SHARD_SIZE = 1000
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -218,18 +241,101 @@ class CourseGradeReport(object):
         Internal method for generating a grade report for the given context.
         """
         context.update_status(u'Starting grades')
-        success_headers = self._success_headers(context)
-        error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
+        with ReportFile() as success_file, ReportFile() as error_file:
+            success_file.append_rows([self._success_headers(context)])
+            error_file.append_rows([self._error_headers()])
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+            num_workers = settings.GRADE_REPORT_WORKERS
+            if num_workers > 1:
+                shards_dir = mkdtemp()
+                try:
+                    shards = self._compute_shards(context, num_workers, shards_dir)
+                    self._merge_shards(shards, success_file, error_file)
+                finally:
+                    shutil.rmtree(shards_dir, ignore_errors=True)
+            else:
+                batched_rows = self._batched_rows(context)
+
+                context.update_status(u'Compiling grades')
+                self._compile(context, batched_rows, success_file, error_file)
 
-        context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+            context.update_status(u'Uploading grades')
+            self._upload(context, success_file, error_file)
 
         return context.update_status(u'Completed grades')
 
+    def _compute_shards(self, context, num_workers, shards_dir):
+        """
+        Splits the enrollees of the course into shards of consecutive user
+        ids and computes the rows of each shard in a pool of num_workers
+        worker processes, each of which writes its rows to partial CSV
+        files in shards_dir.  Returns the list of computed
+        _GradeReportShard objects in user id order.
+        """
+        user_ids = list(self._enrolled_user_ids(context))
+        shards = [
+            _GradeReportShard(
+                user_ids[start:start + self.USER_SHARD_SIZE],
+                os.path.join(shards_dir, u'{:06d}'.format(shard_index)),
+            )
+            for shard_index, start in enumerate(range(0, len(user_ids), self.USER_SHARD_SIZE))
+        ]
+
+        context.task_progress.total = len(user_ids)
+        context.update_status(u'Compiling grades')
+        computed_shards = []
+        with self._process_pool(num_workers, context) as pool:
+            for shard in pool.imap(_compute_grade_report_shard, shards):
+                computed_shards.append(shard)
+                context.task_progress.succeeded += shard.num_succeeded
+                context.task_progress.failed += shard.num_failed
+                context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+                context.update_status(
+                    u'Compiling grades: {} of {} shards'.format(len(computed_shards), len(shards))
+                )
+        return computed_shards
+
+    def _merge_shards(self, shards, success_file, error_file):
+        """
+        Appends the rows of the given computed shards, in order, to the
+        given success and error report files.
+        """
+        for shard in shards:
+            success_file.append_rows(_read_csv_rows(shard.success_path))
+            error_file.append_rows(_read_csv_rows(shard.error_path))
+
+    @staticmethod
+    @contextmanager
+    def _process_pool(num_workers, context):
+        """
+        Returns a pool of num_workers worker processes, which compute the
+        shards of the report of the given context.
+        """
+        # Forked workers must not share the database connections of
+        # this process, so close them before forking.  Both this process
+        # and the workers reconnect when they next query the database.
+        db.connections.close_all()
+        # Celery's prefork workers are daemonic processes, which the
+        # standard library's multiprocessing doesn't allow to have children.
+        pool = billiard.Pool(num_workers, initializer=_init_grade_report_worker, initargs=(context,))
+        try:
+            yield pool
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _enrolled_user_ids(self, context):
+        """
+        Returns the ids, in ascending order, of the users enrolled in the
+        course that this report is for.
+        """
+        filter_kwargs = {
+            'courseenrollment__course_id': context.course_id,
+        }
+        if generate_grade_report_for_verified_only():
+            filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+        return get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
+
     def _success_headers(self, context):
         """
         Returns a list of all applicable column headers for this grade report.
@@ -259,32 +365,32 @@ class CourseGradeReport(object):
             users = [u for u in users if u is not None]
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_file, error_file):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Appends the (success_rows, error_rows) of each of the given
+        batched_rows to the given success and error report files, one batch
+        at a time.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        for success_rows, error_rows in batched_rows:
+            success_file.append_rows(success_rows)
+            error_file.append_rows(error_rows)
+
+            # update metrics on task status
+            context.task_progress.succeeded += len(success_rows)
+            context.task_progress.failed += len(error_rows)
 
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
+    def _upload(self, context, success_file, error_file):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the given success and error report files.  The error report
+        file is only uploaded if there are errors.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        upload_report_file_to_report_store(success_file, 'grade_report', context.course_id, date)
+        if context.task_progress.failed > 0:
+            upload_report_file_to_report_store(error_file, 'grade_report_err', context.course_id, date)
 
     def _grades_header(self, context):
         """
@@ -501,6 +607,7 @@ class CourseGradeReport(object):
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
+                batch_size=len(users),
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -519,6 +626,76 @@ class CourseGradeReport(object):
             return success_rows, error_rows
 
 
+class _GradeReportShard(object):
+    """
+    A shard of a grade report that is computed by a worker process: the
+    ids of the users in the shard and, once computed, the paths of the
+    partial CSV files the worker wrote the shard's rows to.
+    """
+    def __init__(self, user_ids, path_prefix):
+        self.user_ids = user_ids
+        self.success_path = path_prefix + u'.csv'
+        self.error_path = path_prefix + u'_err.csv'
+        self.num_succeeded = 0
+        self.num_failed = 0
+
+
+def _init_grade_report_worker(context):
+    """
+    Initializes a worker process of CourseGradeReport._process_pool to
+    compute shards of the report of the given context, which is passed
+    to each worker once, rather than with each shard, so that each worker
+    only computes the course data of the context once.
+
+    The worker inherits the modulestore and contentstore of the process
+    that forked it, whose Mongo clients are not fork-safe.  They are
+    dropped, rather than closed over the sockets that process still uses,
+    so that the worker creates its own when it first needs them.
+    """
+    global _worker_context  # pylint: disable=global-statement, invalid-name
+    clear_existing_modulestores()
+    _CONTENTSTORE.clear()
+    _worker_context = context
+
+
+def _compute_grade_report_shard(shard):
+    """
+    Computes the rows of the given shard, writes them to the shard's
+    partial CSV files, and returns the shard.  Runs in a worker process.
+    """
+    report = CourseGradeReport()
+    context = _worker_context
+    with modulestore().bulk_operations(context.course_id):
+        with _open_csv(shard.success_path, 'w') as success_file, _open_csv(shard.error_path, 'w') as error_file:
+            success_writer = csv.writer(success_file)
+            error_writer = csv.writer(error_file)
+            for start in range(0, len(shard.user_ids), report.USER_BATCH_SIZE):
+                users = list(
+                    get_user_model().objects.filter(
+                        id__in=shard.user_ids[start:start + report.USER_BATCH_SIZE],
+                    ).select_related('profile').order_by('id')
+                )
+                success_rows, error_rows = report._rows_for_users(context, users)  # pylint: disable=protected-access
+                success_writer.writerows(success_rows)
+                error_writer.writerows(error_rows)
+                shard.num_succeeded += len(success_rows)
+                shard.num_failed += len(error_rows)
+    return shard
+
+
+def _open_csv(path, mode):
+    return io.open(path, mode, encoding='utf-8', newline='')
+
+
+def _read_csv_rows(path):
+    """
+    Yields the rows of the CSV file at the given path.
+    """
+    with _open_csv(path, 'r') as csv_file:
+        for row in csv.reader(csv_file):
+            yield row
+
+
 class ProblemGradeReport(object):
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
@@ -3,26 +3,40 @@ Instructor Tasks related to module state.
 """
 
 
+import copy
 import json
 import logging
+from itertools import islice
 from time import time
 
 import six
 from django.utils.translation import ugettext_noop
+from eventtracking import tracker
 from opaque_keys.edx.keys import UsageKey
 from xblock.runtime import KvsFieldData
 from xblock.scorable import Score
 
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
+from lms.djangoapps.courseware.access import has_access
 from lms.djangoapps.courseware.courses import get_course_by_id, get_problems_in_section
 from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from lms.djangoapps.courseware.models import StudentModule
 from lms.djangoapps.courseware.module_render import get_module_for_descriptor_internal
+from lms.djangoapps.grades.api import constants as grades_constants
 from lms.djangoapps.grades.api import events as grades_events
+from lms.djangoapps.grades.api import signals as grades_signals
+from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import get_user_by_username_or_email
-from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
+from track import contexts
+from track.event_transaction_utils import (
+    create_new_event_transaction_id,
+    get_event_transaction_id,
+    set_event_transaction_id,
+    set_event_transaction_type
+)
 from track.views import task_track
 from util.db import outer_atomic
+from xmodule.capa_base import CapaMixin
 from xmodule.modulestore.django import modulestore
 
 from ..exceptions import UpdateProblemModuleStateError
@@ -31,6 +45,12 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# The most StudentModules rescored, and saved, at once by perform_bulk_rescore.
+RESCORE_BATCH_SIZE = 100
+
+# The most LoncapaProblems, one per seed, kept by a BulkProblemRescorer.
+MAX_RESCORE_PROBLEMS = 100
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -61,26 +81,9 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
     student_identifier = task_input.get('student')
     override_score_task = action_name == ugettext_noop('overridden')
-    problems = {}
-
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[six.text_type(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
 
     modules_to_update = _get_modules_to_update(
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
@@ -109,6 +112,48 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     return task_progress.update_task_state()
 
 
+def perform_bulk_rescore(xmodule_instance_args, _entry_id, course_id, task_input, action_name):
+    """
+    Rescores the submissions to the problems of a task, like perform_module_state_update
+    with rescore_problem_module_state, but streams the StudentModules of each problem in
+    batches of RESCORE_BATCH_SIZE and rescores each batch with a BulkProblemRescorer.
+
+    Returns the task's results, as perform_module_state_update does.
+    """
+    start_time = time()
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
+    modules_to_update = _get_modules_to_update(course_id, usage_keys, task_input.get('student'), None)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    with modulestore().bulk_operations(course_id):
+        course = get_course_by_id(course_id)
+        for usage_key in usage_keys:
+            rescorer = BulkProblemRescorer(
+                xmodule_instance_args, problems[six.text_type(usage_key)], task_input, course
+            )
+            problem_modules = modules_to_update.filter(
+                module_state_key=usage_key
+            ).select_related('student').order_by('id')
+            for batch in _batches(problem_modules.iterator(), RESCORE_BATCH_SIZE):
+                for update_status in rescorer.rescore(batch):
+                    task_progress.attempted += 1
+                    if update_status == UPDATE_STATUS_SUCCEEDED:
+                        task_progress.succeeded += 1
+                    elif update_status == UPDATE_STATUS_FAILED:
+                        task_progress.failed += 1
+                    elif update_status == UPDATE_STATUS_SKIPPED:
+                        task_progress.skipped += 1
+                    else:
+                        raise UpdateProblemModuleStateError(
+                            u"Unexpected update_status returned: {}".format(update_status)
+                        )
+                task_progress.update_task_state()
+
+    return task_progress.update_task_state()
+
+
 @outer_atomic
 def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
@@ -196,6 +241,229 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
         return UPDATE_STATUS_SUCCEEDED
 
 
+class BulkProblemRescorer(object):
+    """
+    Rescores the StudentModules of one problem, a batch at a time.
+
+    The problem is bound to a learner only once.  Each learner's saved state is
+    then graded by a LoncapaProblem shared by all the learners with the same
+    seed, and the changed states and scores of a batch are saved in a single
+    transaction.  Problems which aren't capa problems, which don't support
+    rescoring, or whose scripts use the learner's anonymous id, are rescored
+    one learner at a time by rescore_problem_module_state instead.
+    """
+    def __init__(self, xmodule_instance_args, module_descriptor, task_input, course):
+        self.xmodule_instance_args = xmodule_instance_args
+        self.module_descriptor = module_descriptor
+        self.only_if_higher = task_input['only_if_higher']
+        self.task_input = task_input
+        self.course = course
+        self.instance = None
+        self.instance_student_id = None
+        self.is_bulk_rescorable = False
+        self._problems = {}
+
+    def rescore(self, student_modules):
+        """
+        Rescores the batch of `student_modules`, and returns their update statuses.
+        """
+        update_statuses = []
+        updates = []
+        for student_module in student_modules:
+            update_status, update = self._rescore_student_module(student_module)
+            update_statuses.append(update_status)
+            if update is not None:
+                updates.append(update)
+
+        if updates:
+            self._save(updates)
+        return update_statuses
+
+    def _rescore_student_module(self, student_module):
+        """
+        Rescores `student_module`, and returns its update status, along with
+        the update to save, if its state changed or its score is updated.
+        """
+        student = student_module.student
+        if self.instance is None:
+            self.instance = _get_module_instance_for_task(
+                student_module.course_id,
+                student,
+                self.module_descriptor,
+                self.xmodule_instance_args,
+                grade_bucket_type='rescore',
+                course=self.course
+            )
+            if self.instance is None:
+                return self._access_denied(student_module), None
+            self.instance_student_id = student.id
+            self.is_bulk_rescorable = (
+                isinstance(self.instance, CapaMixin) and
+                self.instance.lcp.supports_rescoring() and
+                'anonymous_student_id' not in self.instance.data
+            )
+
+        state = json.loads(student_module.state) if student_module.state else {}
+        if not self.is_bulk_rescorable or (state.get('done') and state.get('seed') is None):
+            return rescore_problem_module_state(
+                self.xmodule_instance_args, self.module_descriptor, student_module, self.task_input
+            ), None
+
+        if not state.get('done'):
+            return UPDATE_STATUS_SKIPPED, None
+
+        if student.id != self.instance_student_id and not has_access(
+                student, 'load', self.module_descriptor, student_module.course_id
+        ):
+            return self._access_denied(student_module), None
+
+        lcp = self._get_problem(state)
+        track_function = _get_track_function_for_task(student, self.xmodule_instance_args)
+        # Swap the learner's problem and track function into the bound instance,
+        # for the hint events of grading and the unmasking of the rescore events.
+        self.instance.lcp = lcp
+        self.instance.runtime.track_function = track_function
+
+        event_info = {'state': lcp.get_state(), 'problem_id': six.text_type(self.module_descriptor.location)}
+        score_field = self.instance.fields['score']
+        if state.get('score') is not None:
+            orig_score = score_field.from_json(state['score'])
+        else:
+            orig_score = self.instance.score_from_lcp(lcp)
+        event_info['orig_score'] = orig_score.raw_earned
+        event_info['orig_total'] = orig_score.raw_possible
+
+        create_new_event_transaction_id()
+        set_event_transaction_type(grades_events.GRADES_RESCORE_EVENT_TYPE)
+        try:
+            # Make sure that the attempt number is always at least 1 for grading purposes,
+            # as CapaMixin.update_correctness does.
+            lcp.context['attempt'] = max(state.get('attempts', 0), 1)
+            lcp.correct_map.update(lcp.get_grade_from_current_answers(None))
+            new_score = self.instance.score_from_lcp(lcp)
+        except (LoncapaProblemError, StudentInputError, ResponseError):
+            event_info['failure'] = 'input_error'
+            self._track(student_module, 'problem_rescore_fail', event_info)
+            TASK_LOG.warning(
+                u"error processing rescore call for course %(course)s, problem %(loc)s "
+                u"and student %(student)s",
+                dict(
+                    course=student_module.course_id,
+                    loc=student_module.module_state_key,
+                    student=student
+                ),
+                exc_info=True
+            )
+            return UPDATE_STATUS_FAILED, None
+        except Exception:
+            event_info['failure'] = 'unexpected'
+            self._track(student_module, 'problem_rescore_fail', event_info)
+            raise
+
+        new_state = dict(state, **lcp.get_state())
+        update_score = True
+        if self.only_if_higher and student_module.grade is not None:
+            update_score = is_score_higher_or_equal(
+                student_module.grade, student_module.max_grade, new_score.raw_earned, new_score.raw_possible
+            )
+        score_changed = update_score and (
+            (student_module.grade, student_module.max_grade) != (new_score.raw_earned, new_score.raw_possible)
+        )
+        if update_score:
+            new_state['score'] = score_field.to_json(new_score)
+
+        event_info['new_score'] = new_score.raw_earned
+        event_info['new_total'] = new_score.raw_possible
+        event_info['correct_map'] = lcp.correct_map.get_dict()
+        event_info['success'] = 'correct' if all(
+            lcp.correct_map.is_correct(answer_id) for answer_id in lcp.correct_map
+        ) else 'incorrect'
+        event_info['attempts'] = state.get('attempts', 0)
+        self._track(student_module, 'problem_rescore', event_info)
+
+        TASK_LOG.debug(
+            u"successfully processed rescore call for course %(course)s, problem %(loc)s "
+            u"and student %(student)s",
+            dict(
+                course=student_module.course_id,
+                loc=student_module.module_state_key,
+                student=student
+            )
+        )
+        changed = new_state != state or score_changed
+        if not changed and not update_score:
+            return UPDATE_STATUS_SUCCEEDED, None
+
+        student_module.state = json.dumps(new_state)
+        if update_score:
+            student_module.grade = new_score.raw_earned
+            student_module.max_grade = new_score.raw_possible
+        return UPDATE_STATUS_SUCCEEDED, (student_module, changed, update_score, get_event_transaction_id())
+
+    def _get_problem(self, state):
+        """
+        Returns the LoncapaProblem for the seed of `state`, set to `state`.
+        """
+        seed = state['seed']
+        lcp = self._problems.get(seed)
+        if lcp is None:
+            if len(self._problems) >= MAX_RESCORE_PROBLEMS:
+                self._problems.clear()
+            lcp = self._problems[seed] = self.instance.new_lcp(state)
+        else:
+            lcp.set_state(state)
+        return lcp
+
+    def _save(self, updates):
+        """
+        Saves the changed states and scores of `updates`, and signals the updated scores,
+        as CapaMixin.rescore does for unchanged scores too.
+        """
+        weight = getattr(self.module_descriptor, 'weight', None)
+        with outer_atomic():
+            for student_module, changed, update_score, event_transaction_id in updates:
+                if changed:
+                    student_module.save(update_fields=['state', 'grade', 'max_grade', 'modified'])
+                if not update_score:
+                    continue
+                set_event_transaction_id(event_transaction_id)
+                set_event_transaction_type(grades_events.GRADES_RESCORE_EVENT_TYPE)
+                grades_signals.PROBLEM_RAW_SCORE_CHANGED.send(
+                    sender=None,
+                    raw_earned=student_module.grade,
+                    raw_possible=student_module.max_grade,
+                    weight=weight,
+                    user_id=student_module.student_id,
+                    course_id=six.text_type(student_module.course_id),
+                    usage_id=six.text_type(student_module.module_state_key),
+                    only_if_higher=self.only_if_higher,
+                    modified=student_module.modified,
+                    score_db_table=grades_constants.ScoreDatabaseTableEnum.courseware_student_module,
+                )
+
+    def _track(self, student_module, event_type, event_info):
+        """
+        Emits the rescore event `event_type` for the learner of `student_module`,
+        in the course context the module's runtime would add.
+        """
+        event_info = copy.deepcopy(event_info)
+        self.instance.unmask_event(event_info)
+        context = contexts.course_context_from_course_id(student_module.course_id)
+        context['user_id'] = student_module.student_id
+        with tracker.get_tracker().context(event_type, context):
+            self.instance.runtime.track_function(event_type, event_info)
+
+    def _access_denied(self, student_module):
+        """
+        Logs that the learner of `student_module` can't access the problem, and returns a failed status.
+        """
+        TASK_LOG.warning(u"No module {location} for student {student}--access denied?".format(
+            location=student_module.module_state_key,
+            student=student_module.student
+        ))
+        return UPDATE_STATUS_FAILED
+
+
 @outer_atomic
 def override_score_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
@@ -388,6 +656,45 @@ def _get_task_id_from_xmodule_args(xmodule_instance_args):
         return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID)
 
 
+def _get_problems_to_update(course_id, task_input):
+    """
+    Returns the usage keys of the problems of the task, and a dict of their descriptors by usage key string.
+
+    The problems are the one of the task's `problem_url`, or all the problems of its `entrance_exam_url`.
+    """
+    usage_keys = []
+    problems = {}
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[six.text_type(usage_key)] = problem_descriptor
+
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
+def _batches(iterable, batch_size):
+    """
+    Yields lists of up to `batch_size` consecutive items of `iterable`.
+    """
+    iterator = iter(iterable)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
 def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn, override_score_task=False):
     """
     Fetches a StudentModule instances for a given `course_id`, `student` object, and `usage_keys`.
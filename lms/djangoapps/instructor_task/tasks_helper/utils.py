@@ -37,16 +37,38 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
         report_name: string - Name of the generated report
     """
     report_store = ReportStore.from_config(config_name)
-    report_name = u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+    report_name = _csv_report_name(csv_name, course_id, timestamp)
+    report_store.store_rows(course_id, report_name, rows)
+    tracker_emit(csv_name)
+    return report_name
+
+
+def upload_report_file_to_report_store(report_file, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+    """
+    Upload a CSV ReportFile using ReportStore.
+
+    Arguments:
+        report_file: ReportFile containing the CSV data
+        csv_name: Name of the resulting CSV
+        course_id: ID of the course
+
+    Returns:
+        report_name: string - Name of the generated report
+    """
+    report_store = ReportStore.from_config(config_name)
+    report_name = _csv_report_name(csv_name, course_id, timestamp)
+    report_store.store_report_file(course_id, report_name, report_file)
+    tracker_emit(csv_name)
+    return report_name
+
+
+def _csv_report_name(csv_name, course_id, timestamp):
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
         course_prefix=course_filename_prefix_generator(course_id),
         csv_name=csv_name,
         timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
     )
 
-    report_store.store_rows(course_id, report_name, rows)
-    tracker_emit(csv_name)
-    return report_name
-
 
 def tracker_emit(report_name):
     """
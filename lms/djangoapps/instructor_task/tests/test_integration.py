@@ -24,7 +24,9 @@ from six.moves import range
 from capa.responsetypes import StudentInputError
 from capa.tests.response_xml_factory import CodeResponseXMLFactory, CustomResponseXMLFactory
 from lms.djangoapps.courseware.model_data import StudentModule
+from lms.djangoapps.courseware.module_render import get_module_for_descriptor_internal
 from lms.djangoapps.grades.api import CourseGradeFactory
+from lms.djangoapps.grades.api import signals as grades_signals
 from lms.djangoapps.instructor_task.api import (
     submit_delete_problem_state_for_all_students,
     submit_rescore_problem_for_all_students,
@@ -267,6 +269,55 @@ class TestRescoringTask(TestIntegrationTask):
         self.check_state(self.user1, descriptor, 2, unchanged_max)
         self.check_state(self.user2, descriptor, 0, new_max)
 
+    def test_rescoring_binds_problem_once(self):
+        """
+        Tests that rescoring all students binds the problem only once, and grades each student's own answers.
+        """
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_1, OPTION_2])
+        self.submit_student_answer('u3', problem_url_name, [OPTION_2, OPTION_2])
+
+        self.redefine_option_problem(problem_url_name, correct_answer=OPTION_2)
+        with patch(
+            'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal',
+            wraps=get_module_for_descriptor_internal,
+        ) as mock_get_module:
+            instructor_task = self.submit_rescore_all_student_answers('instructor', problem_url_name)
+        self.assertEqual(mock_get_module.call_count, 1)
+
+        status = json.loads(InstructorTask.objects.get(id=instructor_task.id).task_output)
+        self.assertEqual((status['attempted'], status['succeeded']), (3, 3))
+        self.check_state(self.user1, descriptor, 0, 2)
+        self.check_state(self.user2, descriptor, 1, 2)
+        self.check_state(self.user3, descriptor, 2, 2)
+
+    def test_rescoring_unchanged_scores(self):
+        """
+        Tests that rescoring signals the scores of all students, even when their scores are unchanged.
+        """
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_1, OPTION_2])
+
+        with patch.object(
+            grades_signals.PROBLEM_RAW_SCORE_CHANGED, 'send', wraps=grades_signals.PROBLEM_RAW_SCORE_CHANGED.send,
+        ) as mock_send:
+            self.submit_rescore_all_student_answers('instructor', problem_url_name)
+
+        signaled_scores = {
+            call[1]['user_id']: (call[1]['raw_earned'], call[1]['raw_possible']) for call in mock_send.call_args_list
+        }
+        self.assertEqual(signaled_scores, {self.user1.id: (2, 2), self.user2.id: (1, 2)})
+        self.check_state(self.user1, descriptor, 2, 2)
+        self.check_state(self.user2, descriptor, 1, 2)
+
     def test_rescoring_failure(self):
         """Simulate a failure in rescoring a problem"""
         problem_url_name = 'H1P1'
@@ -12,7 +12,7 @@ from django.test import SimpleTestCase, TestCase, override_settings
 from opaque_keys.edx.locator import CourseLocator
 
 from common.test.utils import MockS3BotoMixin
-from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore, TASK_INPUT_LENGTH
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportFile, ReportStore, TASK_INPUT_LENGTH
 from lms.djangoapps.instructor_task.tests.test_base import TestReportMixin
 
 
@@ -69,6 +69,35 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows(self):
+        """
+        Test that ReportStore.store_rows() stores the given rows in csv format.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'rows_file', [[u'name', u'count'], [u'ni\xf1o', 1]])
+        self.assertEqual(self._read(report_store, 'rows_file'), u'name,count\r\nni\xf1o,1\r\n')
+
+    def test_store_report_file(self):
+        """
+        Test that ReportStore.store_report_file() stores all the rows of a
+        ReportFile that was rolled over to disk.
+        """
+        report_store = self.create_report_store()
+        with ReportFile(max_size=16) as report_file:
+            report_file.append_rows([u'row', index] for index in range(100))
+            report_store.store_report_file(self.course_id, 'report_file', report_file)
+        self.assertEqual(
+            self._read(report_store, 'report_file').splitlines(),
+            [u'row,{}'.format(index) for index in range(100)],
+        )
+
+    def _read(self, report_store, filename):
+        """
+        Returns the decoded contents of the given file of the report store.
+        """
+        with report_store.storage.open(report_store.path_to(self.course_id, filename)) as report:
+            return report.read().decode('utf-8-sig')
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
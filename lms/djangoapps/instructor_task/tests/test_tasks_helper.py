@@ -14,6 +14,7 @@ import shutil
 import tempfile
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from unittest import TestCase
 
 from six import text_type
 from six.moves import range, zip
@@ -38,6 +39,7 @@ from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsec
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.tasks_helper import grades as grades_helper
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -85,7 +87,9 @@ from student.models import ALLOWEDTOENROLL_TO_ENROLLED, CourseEnrollment, Course
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
 from survey.models import SurveyAnswer, SurveyForm
 from waffle.testutils import override_switch
+from xmodule.contentstore.django import _CONTENTSTORE
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore import django as modulestore_django
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
@@ -101,6 +105,53 @@ _TEAMS_CONFIG = TeamsConfig({
 SWITCH_GENERATE_GRADE_REPORT_VERIFIED_ONLY = '.'.join(['instructor_task', GENERATE_GRADE_REPORT_VERIFIED_ONLY])
 
 
+class _InProcessPool(object):
+    """
+    A stand-in for a pool of worker processes that runs tasks in this process,
+    so that they see the data of the test's database transaction.
+    """
+    def imap(self, func, iterable):
+        return map(func, iterable)
+
+
+@contextmanager
+def _in_process_pool(num_workers, context):  # pylint: disable=unused-argument
+    with patch('lms.djangoapps.instructor_task.tasks_helper.grades._worker_context', context):
+        yield _InProcessPool()
+
+
+def _grade_report_worker_state(_index):
+    """
+    Returns the process id of the worker process that runs it, whether the
+    worker dropped the modulestore and contentstore it inherited, and the
+    report context it was given.
+    """
+    return (
+        os.getpid(),
+        modulestore_django._MIXED_MODULESTORE is None,  # pylint: disable=protected-access
+        not _CONTENTSTORE,
+        grades_helper._worker_context,  # pylint: disable=protected-access
+    )
+
+
+class TestGradeReportProcessPool(TestCase):
+    """
+    Tests the pool of worker processes of sharded grade reports.
+    """
+    @patch.dict(_CONTENTSTORE, {'default': object()})
+    @patch('xmodule.modulestore.django._MIXED_MODULESTORE', object())
+    def test_process_pool(self):
+        with CourseGradeReport._process_pool(2, u'context') as pool:  # pylint: disable=protected-access
+            states = list(pool.imap(_grade_report_worker_state, range(4)))
+
+        self.assertEqual(len(states), 4)
+        for pid, dropped_modulestore, dropped_contentstore, context in states:
+            self.assertNotEqual(pid, os.getpid())
+            self.assertTrue(dropped_modulestore)
+            self.assertTrue(dropped_contentstore)
+            self.assertEqual(context, u'context')
+
+
 class InstructorGradeReportTestCase(TestReportMixin, InstructorTaskCourseTestCase):
     """ Base class for grade report tests. """
 
@@ -164,6 +215,46 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @override_settings(GRADE_REPORT_WORKERS=2)
+    @patch.object(CourseGradeReport, 'USER_SHARD_SIZE', 2)
+    @patch.object(CourseGradeReport, '_process_pool', staticmethod(_in_process_pool))
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_grade_report(self, _mock_current_task):
+        """
+        Test that a report computed in shards contains the rows of all
+        the shards, in order.
+        """
+        students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(5)
+        ]
+        result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5}, result)
+        self.verify_rows_in_csv(
+            [
+                {u'Student ID': text_type(student.id), u'Username': student.username}
+                for student in students
+            ],
+            ignore_other_columns=True,
+        )
+
+    @override_settings(GRADE_REPORT_WORKERS=2)
+    @patch.object(CourseGradeReport, '_process_pool', staticmethod(_in_process_pool))
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
+    def test_sharded_grading_failure(self, mock_grades_iter, _mock_current_task):
+        """
+        Test that grading errors of a report computed in shards are
+        reported in the progress dict and uploaded to the report store.
+        """
+        student = self.create_student('username', 'student@example.com')
+        mock_grades_iter.return_value = [(student, None, TypeError('Cannot grade student'))]
+        result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 0, 'failed': 1}, result)
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -551,6 +551,21 @@ CACHES = {
     },
 }
 
+# The codec used to store course structures in the 'course_structure_cache'.
+# Servers can read structures stored with any codec, but those which predate
+# this setting can only read the default 'pickle+zlib' codec.  See
+# xmodule.modulestore.split_mongo.structure_codecs for the available codecs.
+COURSE_STRUCTURE_CACHE_CODEC = 'pickle+zlib'
+
+# The most CourseOverviews kept in each process' cache of CourseOverview.get_from_ids,
+# or 0 to disable it.  Cached overviews are checked to be current before they are used,
+# which takes one query.
+COURSE_OVERVIEW_CACHE_SIZE = 0
+
+# The most courses CourseOverview.get_from_ids loads from the modulestore at once,
+# when their overviews are missing or outdated.
+COURSE_OVERVIEW_LOAD_WORKERS = 1
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -972,6 +987,24 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# Local disk cache of the course assets too large for the Django cache (see
+# openedx.core.djangoapps.contentserver.disk_cache).  Disabled unless DIR is
+# set; MAX_SIZE is in bytes.
+CONTENTSERVER_DISK_CACHE = {
+    'DIR': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+}
+
+# Hand-off of the assets in the disk cache to the web server (see
+# openedx.core.djangoapps.contentserver.sendfile).  When BACKEND is
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd), their
+# responses only carry the header naming the file for the web server to send.
+# For nginx, URL_PREFIX must be an internal location serving the disk cache's DIR.
+CONTENTSERVER_SENDFILE = {
+    'BACKEND': None,
+    'URL_PREFIX': '/protected-course-assets/',
+}
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1071,6 +1104,17 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Results of sandboxed problem code are cached, keyed on the code, its globals,
+# the random seed and the course's python library.  See
+# xmodule.util.sandboxing.DEFAULT_SAFE_EXEC_CACHE for the available options;
+# set 'ALIAS' to None to disable the cache.
+SAFE_EXEC_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 24 * 60 * 60,
+    'EXCEPTION_TIMEOUT': 5 * 60,
+    'MAX_ENTRY_SIZE': 512 * 1024,
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -2110,6 +2154,11 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum size, in bytes, of the process-local cache of block
+    # structures, used when the block_structure.process_local_cache
+    # waffle switch is enabled.
+    PROCESS_LOCAL_CACHE_MAX_BYTES=64 * 1024 * 1024,
 )
 
 ################################ Bulk Email ###################################
@@ -2782,6 +2831,10 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': None,
 }
 
+# Number of worker processes that concurrently compute the shards of a
+# grade report.  When 1, reports are computed by the celery task itself.
+GRADE_REPORT_WORKERS = 1
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': None,
@@ -241,6 +241,10 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+COURSE_STRUCTURE_CACHE_CODEC = ENV_TOKENS.get('COURSE_STRUCTURE_CACHE_CODEC', COURSE_STRUCTURE_CACHE_CODEC)
+COURSE_OVERVIEW_CACHE_SIZE = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_SIZE', COURSE_OVERVIEW_CACHE_SIZE)
+COURSE_OVERVIEW_LOAD_WORKERS = ENV_TOKENS.get('COURSE_OVERVIEW_LOAD_WORKERS', COURSE_OVERVIEW_LOAD_WORKERS)
+
 if 'staticfiles' in CACHES:
     CACHES['staticfiles']['KEY_PREFIX'] = EDX_PLATFORM_REVISION
 
@@ -422,6 +426,7 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_CACHE.update(ENV_TOKENS.get("SAFE_EXEC_CACHE", {}))
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -593,6 +598,8 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get("CONTENTSERVER_DISK_CACHE", {}))
+CONTENTSERVER_SENDFILE.update(ENV_TOKENS.get("CONTENTSERVER_SENDFILE", {}))
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -675,6 +682,7 @@ DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH = ENV_TOKENS.get(
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADE_REPORT_WORKERS = ENV_TOKENS.get('GRADE_REPORT_WORKERS', GRADE_REPORT_WORKERS)
 
 # Rate limit for regrading tasks that a grading policy change can kick off
 POLICY_CHANGE_TASK_RATE_LIMIT = ENV_TOKENS.get('POLICY_CHANGE_TASK_RATE_LIMIT', POLICY_CHANGE_TASK_RATE_LIMIT)
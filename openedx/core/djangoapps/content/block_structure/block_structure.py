@@ -6,10 +6,14 @@ Module with family of classes for block structures.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _BlockRelationsMap - Default backing store for a block structure's relations.
+    _IndexedBlockRelations - Integer-indexed, array-based backing store
+        for a block structure's relations.
     _BlockData - Data structure for a single block's data.
 """
 
 
+from array import array
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -43,6 +47,411 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _BlockRelationsMap(dict):
+    """
+    Default backing store for the relations of a block structure: a
+    map of a block's usage key to its block relations.  The existence
+    of a block in the structure is determined by its presence in this
+    map.
+
+    dict {UsageKey: _BlockRelations}
+    """
+    def get_parents(self, usage_key):
+        """
+        Returns the list of parents of the given block, or an empty
+        list if the block is not found.
+        """
+        return self[usage_key].parents if usage_key in self else []
+
+    def get_children(self, usage_key):
+        """
+        Returns the list of children of the given block, or an empty
+        list if the block is not found.
+        """
+        return self[usage_key].children if usage_key in self else []
+
+    def clear_parents(self, usage_key):
+        """
+        Removes all parents of the given block.
+        """
+        self[usage_key].parents = []
+
+    def add_block(self, usage_key):
+        """
+        Adds the given block, if not already present.
+        """
+        if usage_key not in self:
+            self[usage_key] = _BlockRelations()
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding the blocks if
+        not already present.
+        """
+        self.add_block(parent_key)
+        self.add_block(child_key)
+
+        self[child_key].parents.append(parent_key)
+        self[parent_key].children.append(child_key)
+
+    def remove_block(self, usage_key):
+        """
+        Removes the given block along with its relations and returns a
+        tuple of its former (parents, children).
+        """
+        children = self[usage_key].children
+        parents = self[usage_key].parents
+
+        # Remove block from its children.
+        for child in children:
+            self[child].parents.remove(usage_key)
+
+        # Remove block from its parents.
+        for parent in parents:
+            self[parent].children.remove(usage_key)
+
+        self.pop(usage_key, None)
+        return parents, children
+
+    def traverse_topologically(self, start_node, filter_func, yield_descendants_of_unyielded):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        return traverse_topologically(
+            start_node=start_node,
+            get_parents=self.get_parents,
+            get_children=self.get_children,
+            filter_func=filter_func,
+            yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+        )
+
+    def traverse_post_order(self, start_node, filter_func):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        return traverse_post_order(
+            start_node=start_node,
+            get_children=self.get_children,
+            filter_func=filter_func,
+        )
+
+    def pruned(self, root_block_usage_key):
+        """
+        Returns a new map with only the blocks reachable from the given
+        root block.
+        """
+        # Create a new block relations map to store only those blocks
+        # that are still linked
+        pruned_block_relations = _BlockRelationsMap()
+
+        # Build the structure from the leaves up by doing a post-order
+        # traversal of the old structure, thereby encountering only
+        # reachable blocks.
+        for block_key in self.traverse_post_order(root_block_usage_key, filter_func=None):
+            # If the block is in the old structure,
+            if block_key in self:
+                # Add it to the new pruned structure
+                pruned_block_relations.add_block(block_key)
+
+                # Add a relationship to only those old children that
+                # were also added to the new pruned structure.
+                for child in self[block_key].children:
+                    if child in pruned_block_relations:
+                        pruned_block_relations.add_relation(block_key, child)
+
+        return pruned_block_relations
+
+
+class _IndexedBlockRelations(object):
+    """
+    Alternate backing store for the relations of a block structure,
+    with the same interface as _BlockRelationsMap.
+
+    Usage keys are mapped to dense integer indices, and the parents
+    and children of all blocks are stored as CSR-style (offsets,
+    indices) integer arrays.  Traversals and pruning operate on the
+    integer indices, avoiding the cost of hashing and comparing usage
+    keys on every step.
+
+    The arrays are never modified.  Instead, the relations of blocks
+    that are mutated, or added, after construction are kept in
+    per-block lists that take precedence over the arrays.
+    """
+    def __init__(self, keys, child_offsets, child_indices, parent_offsets, parent_indices):
+        """
+        Arguments:
+            keys ([UsageKey]) - The usage keys of the blocks, in the
+                order of their indices.
+
+            child_offsets, child_indices (array(int)) - The children of
+                the block with index i are
+                child_indices[child_offsets[i]:child_offsets[i + 1]].
+
+            parent_offsets, parent_indices (array(int)) - The parents
+                of the blocks, laid out as the children are.
+        """
+        # list [UsageKey], dict {UsageKey: int}
+        self._keys = list(keys)
+        self._indices = {usage_key: index for index, usage_key in enumerate(self._keys)}
+
+        self._child_offsets = child_offsets
+        self._child_indices = child_indices
+        self._parent_offsets = parent_offsets
+        self._parent_indices = parent_indices
+
+        # Relations of mutated or added blocks, overriding the arrays.
+        # dict {int: [int]}
+        self._children_overrides = {}
+        self._parents_overrides = {}
+
+        # Whether the block with the given index is in the structure.
+        self._present = bytearray(b'\x01') * len(self._keys)
+        self._num_present = len(self._keys)
+
+    @classmethod
+    def from_block_relations(cls, block_relations):
+        """
+        Returns a new instance with the blocks and relations of the
+        given backing store, preserving the order of the blocks and of
+        their relations.
+        """
+        keys = list(block_relations)
+        indices = {usage_key: index for index, usage_key in enumerate(keys)}
+        children_lists = [[indices[child] for child in block_relations.get_children(key)] for key in keys]
+        parents_lists = [[indices[parent] for parent in block_relations.get_parents(key)] for key in keys]
+        return cls(keys, *(_to_csr(children_lists) + _to_csr(parents_lists)))
+
+    def __contains__(self, usage_key):
+        index = self._indices.get(usage_key)
+        return index is not None and bool(self._present[index])
+
+    def __iter__(self):
+        keys, present = self._keys, self._present
+        return (keys[index] for index in range(len(keys)) if present[index])
+
+    def __len__(self):
+        return self._num_present
+
+    def get_parents(self, usage_key):
+        """
+        Returns the list of parents of the given block, or an empty
+        list if the block is not found.
+        """
+        index = self._indices.get(usage_key)
+        if index is None:
+            return []
+        keys = self._keys
+        return [keys[parent] for parent in self._get_parent_indices(index)]
+
+    def get_children(self, usage_key):
+        """
+        Returns the list of children of the given block, or an empty
+        list if the block is not found.
+        """
+        index = self._indices.get(usage_key)
+        if index is None:
+            return []
+        keys = self._keys
+        return [keys[child] for child in self._get_child_indices(index)]
+
+    def clear_parents(self, usage_key):
+        """
+        Removes all parents of the given block.
+        """
+        self._parents_overrides[self._present_index(usage_key)] = []
+
+    def add_block(self, usage_key):
+        """
+        Adds the given block, if not already present.
+        """
+        index = self._indices.get(usage_key)
+        if index is None:
+            index = self._indices[usage_key] = len(self._keys)
+            self._keys.append(usage_key)
+            self._present.append(0)
+        if not self._present[index]:
+            self._present[index] = 1
+            self._num_present += 1
+            self._children_overrides[index] = []
+            self._parents_overrides[index] = []
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding the blocks if
+        not already present.
+        """
+        self.add_block(parent_key)
+        self.add_block(child_key)
+
+        parent, child = self._indices[parent_key], self._indices[child_key]
+        self._mutable_parent_indices(child).append(parent)
+        self._mutable_child_indices(parent).append(child)
+
+    def remove_block(self, usage_key):
+        """
+        Removes the given block along with its relations and returns a
+        tuple of its former (parents, children).
+        """
+        index = self._present_index(usage_key)
+        parents = list(self._get_parent_indices(index))
+        children = list(self._get_child_indices(index))
+
+        # Remove block from its children.
+        for child in children:
+            self._mutable_parent_indices(child).remove(index)
+
+        # Remove block from its parents.
+        for parent in parents:
+            self._mutable_child_indices(parent).remove(index)
+
+        self._present[index] = 0
+        self._num_present -= 1
+        self._children_overrides[index] = []
+        self._parents_overrides[index] = []
+
+        keys = self._keys
+        return [keys[parent] for parent in parents], [keys[child] for child in children]
+
+    def traverse_topologically(self, start_node, filter_func, yield_descendants_of_unyielded):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        start_index = self._indices.get(start_node)
+        if start_index is None:
+            return iter([start_node] if filter_func is None or filter_func(start_node) else [])
+        return self._to_keys(traverse_topologically(
+            start_node=start_index,
+            get_parents=self._get_parent_indices,
+            get_children=self._get_child_indices,
+            filter_func=self._index_filter(filter_func),
+            yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+        ))
+
+    def traverse_post_order(self, start_node, filter_func):
+        """
+        See the description in
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        start_index = self._indices.get(start_node)
+        if start_index is None:
+            return iter([start_node] if filter_func is None or filter_func(start_node) else [])
+        return self._to_keys(traverse_post_order(
+            start_node=start_index,
+            get_children=self._get_child_indices,
+            filter_func=self._index_filter(filter_func),
+        ))
+
+    def pruned(self, root_block_usage_key):
+        """
+        Returns a new instance with only the blocks reachable from the
+        given root block, compacted into new arrays.
+        """
+        root_index = self._indices.get(root_block_usage_key)
+        if root_index is None or not self._present[root_index]:
+            return _IndexedBlockRelations([], *(_to_csr([]) + _to_csr([])))
+
+        # Renumber the reachable blocks in post-order, adding each
+        # block's relations only to its already-added children, as
+        # _BlockRelationsMap.pruned does.
+        new_indices = {}
+        children_lists = []
+        for index in traverse_post_order(start_node=root_index, get_children=self._get_child_indices):
+            new_indices[index] = len(children_lists)
+            children_lists.append([
+                new_indices[child] for child in self._get_child_indices(index) if child in new_indices
+            ])
+
+        parents_lists = [[] for _ in children_lists]
+        for new_index, children in enumerate(children_lists):
+            for child in children:
+                parents_lists[child].append(new_index)
+
+        keys = [None] * len(new_indices)
+        for index, new_index in six.iteritems(new_indices):
+            keys[new_index] = self._keys[index]
+        return _IndexedBlockRelations(keys, *(_to_csr(children_lists) + _to_csr(parents_lists)))
+
+    def _present_index(self, usage_key):
+        """
+        Returns the index of the given block.
+        Raises KeyError if the block is not present.
+        """
+        index = self._indices[usage_key]
+        if not self._present[index]:
+            raise KeyError(usage_key)
+        return index
+
+    def _get_child_indices(self, index):
+        """
+        Returns the indices of the children of the block with the given index.
+        """
+        children = self._children_overrides.get(index)
+        if children is None:
+            children = self._child_indices[self._child_offsets[index]:self._child_offsets[index + 1]]
+        return children
+
+    def _get_parent_indices(self, index):
+        """
+        Returns the indices of the parents of the block with the given index.
+        """
+        parents = self._parents_overrides.get(index)
+        if parents is None:
+            parents = self._parent_indices[self._parent_offsets[index]:self._parent_offsets[index + 1]]
+        return parents
+
+    def _mutable_child_indices(self, index):
+        """
+        Returns the modifiable list of children indices of the block
+        with the given index.
+        """
+        if index not in self._children_overrides:
+            self._children_overrides[index] = list(self._get_child_indices(index))
+        return self._children_overrides[index]
+
+    def _mutable_parent_indices(self, index):
+        """
+        Returns the modifiable list of parent indices of the block
+        with the given index.
+        """
+        if index not in self._parents_overrides:
+            self._parents_overrides[index] = list(self._get_parent_indices(index))
+        return self._parents_overrides[index]
+
+    def _index_filter(self, filter_func):
+        """
+        Returns the given filter function on usage keys as a filter
+        function on indices.
+        """
+        if filter_func is None:
+            return None
+        keys = self._keys
+        return lambda index: filter_func(keys[index])
+
+    def _to_keys(self, indices):
+        """
+        Generator for mapping the given iterable of indices to usage keys.
+        """
+        keys = self._keys
+        for index in indices:
+            yield keys[index]
+
+
+def _to_csr(index_lists):
+    """
+    Returns a tuple of (offsets, indices) arrays for the given list of
+    lists of indices.
+    """
+    offsets = array('i', [0])
+    indices = array('i')
+    for index_list in index_lists:
+        indices.extend(index_list)
+        offsets.append(len(indices))
+    return offsets, indices
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -59,14 +468,14 @@ class BlockStructure(object):
         # UsageKey
         self.root_block_usage_key = root_block_usage_key
 
-        # Map of a block's usage key to its block relations. The
-        # existence of a block in the structure is determined by its
-        # presence in this map.
-        # dict {UsageKey: _BlockRelations}
-        self._block_relations = {}
+        # Backing store of the blocks' relations. The existence of a
+        # block in the structure is determined by its presence in this
+        # store.  Either a _BlockRelationsMap or, for structures created
+        # by BlockStructureFactory, an _IndexedBlockRelations.
+        self._block_relations = _BlockRelationsMap()
 
         # Add the root block.
-        self._add_block(self._block_relations, root_block_usage_key)
+        self._block_relations.add_block(root_block_usage_key)
 
     def __iter__(self):
         """
@@ -94,7 +503,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
-        return self._block_relations[usage_key].parents if usage_key in self else []
+        return self._block_relations.get_parents(usage_key)
 
     def get_children(self, usage_key):
         """
@@ -108,7 +517,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
-        return self._block_relations[usage_key].children if usage_key in self else []
+        return self._block_relations.get_children(usage_key)
 
     def set_root_block(self, usage_key):
         """
@@ -123,7 +532,7 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._block_relations.clear_parents(usage_key)
 
     def __contains__(self, usage_key):
         """
@@ -148,7 +557,7 @@ class BlockStructure(object):
             iterator(UsageKey) - An iterator of the usage
             keys of all the blocks in the block structure.
         """
-        return six.iterkeys(self._block_relations)
+        return iter(self._block_relations)
 
     #--- Block structure traversal methods ---#
 
@@ -170,10 +579,8 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
-        return traverse_topologically(
+        return self._block_relations.traverse_topologically(
             start_node=start_node or self.root_block_usage_key,
-            get_parents=self.get_parents,
-            get_children=self.get_children,
             filter_func=filter_func,
             yield_descendants_of_unyielded=yield_descendants_of_unyielded,
         )
@@ -195,9 +602,8 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
-        return traverse_post_order(
+        return self._block_relations.traverse_post_order(
             start_node=start_node or self.root_block_usage_key,
-            get_children=self.get_children,
             filter_func=filter_func,
         )
 
@@ -208,29 +614,8 @@ class BlockStructure(object):
         """
         Mutates this block structure by removing any unreachable blocks.
         """
-
-        # Create a new block relations map to store only those blocks
-        # that are still linked
-        pruned_block_relations = {}
-        old_block_relations = self._block_relations
-
-        # Build the structure from the leaves up by doing a post-order
-        # traversal of the old structure, thereby encountering only
-        # reachable blocks.
-        for block_key in self.post_order_traversal():
-            # If the block is in the old structure,
-            if block_key in old_block_relations:
-                # Add it to the new pruned structure
-                self._add_block(pruned_block_relations, block_key)
-
-                # Add a relationship to only those old children that
-                # were also added to the new pruned structure.
-                for child in old_block_relations[block_key].children:
-                    if child in pruned_block_relations:
-                        self._add_to_relations(pruned_block_relations, block_key, child)
-
-        # Replace this structure's relations with the newly pruned one.
-        self._block_relations = pruned_block_relations
+        # Replace this structure's relations with a newly pruned one.
+        self._block_relations = self._block_relations.pruned(self.root_block_usage_key)
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -240,44 +625,15 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._block_relations.add_relation(parent_key, child_key)
 
-    @staticmethod
-    def _add_to_relations(block_relations, parent_key, child_key):
+    def _use_indexed_relations(self):
         """
-        Adds a parent to child relationship in the given block
-        relations map.
-
-        Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
-
-            parent_key (UsageKey) - Usage key of the parent block.
-
-            child_key (UsageKey) - Usage key of the child block.
+        Switches the backing store of this structure's relations to an
+        _IndexedBlockRelations.
         """
-        BlockStructure._add_block(block_relations, parent_key)
-        BlockStructure._add_block(block_relations, child_key)
-
-        block_relations[child_key].parents.append(parent_key)
-        block_relations[parent_key].children.append(child_key)
-
-    @staticmethod
-    def _add_block(block_relations, usage_key):
-        """
-        Adds the given usage_key to the given block_relations map.
-
-        Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
-
-            usage_key (UsageKey) - Usage key of the block that is to
-                be added to the given block_relations.
-        """
-        if usage_key not in block_relations:
-            block_relations[usage_key] = _BlockRelations()
+        if not isinstance(self._block_relations, _IndexedBlockRelations):
+            self._block_relations = _IndexedBlockRelations.from_block_relations(self._block_relations)
 
 
 class FieldData(object):
@@ -621,19 +977,8 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
-        children = self._block_relations[usage_key].children
-        parents = self._block_relations[usage_key].parents
-
-        # Remove block from its children.
-        for child in children:
-            self._block_relations[child].parents.remove(usage_key)
-
-        # Remove block from its parents.
-        for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
-
-        # Remove block.
-        self._block_relations.pop(usage_key, None)
+        # Remove block and its relations.
+        parents, children = self._block_relations.remove_block(usage_key)
         self._block_data_map.pop(usage_key, None)
 
         # Recreate the graph connections if descendants are to be kept.
@@ -4,6 +4,8 @@ waffle switches for the Block Structure framework.
 """
 
 
+from django.conf import settings
+
 from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
 from openedx.core.lib.cache_utils import request_cached
 
@@ -16,6 +18,10 @@ WAFFLE_NAMESPACE = u'block_structure'
 INVALIDATE_CACHE_ON_PUBLISH = u'invalidate_cache_on_publish'
 STORAGE_BACKING_FOR_CACHE = u'storage_backing_for_cache'
 RAISE_ERROR_WHEN_NOT_FOUND = u'raise_error_when_not_found'
+PROCESS_LOCAL_CACHE = u'process_local_cache'
+
+# Default maximum size, in bytes, of the process-local cache.
+DEFAULT_PROCESS_LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
 
 def waffle():
@@ -39,3 +45,12 @@ def cache_timeout_in_seconds():
     Returns and caches the current setting for cache_timeout_in_seconds.
     """
     return BlockStructureConfiguration.current().cache_timeout_in_seconds
+
+
+def process_local_cache_max_bytes():
+    """
+    Returns the maximum size, in bytes, of the process-local cache.
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get(
+        'PROCESS_LOCAL_CACHE_MAX_BYTES', DEFAULT_PROCESS_LOCAL_CACHE_MAX_BYTES,
+    )
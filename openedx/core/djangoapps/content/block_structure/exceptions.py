@@ -40,3 +40,10 @@ class BlockStructureNotFound(BlockStructureException):
         super(BlockStructureNotFound, self).__init__(
             u'Block structure not found; data_usage_key: {}'.format(root_block_usage_key)
         )
+
+
+class BlockStructureDeserializationError(BlockStructureException):
+    """
+    Exception for when serialized Block Structure data cannot be decoded.
+    """
+    pass
@@ -1,7 +1,12 @@
 """
 Module for factory class for BlockStructure objects.
 """
-from .block_structure import BlockStructureBlockData, BlockStructureModulestoreData
+from .block_structure import (
+    BlockStructureBlockData,
+    BlockStructureModulestoreData,
+    _BlockRelationsMap,
+    _IndexedBlockRelations,
+)
 
 
 class BlockStructureFactory(object):
@@ -55,6 +60,9 @@ class BlockStructureFactory(object):
 
         root_xblock = modulestore.get_item(root_block_usage_key, depth=None, lazy=False)
         build_block_structure(root_xblock)
+
+        # The relations are complete, so switch to the faster backing store for the collect phase.
+        block_structure._use_indexed_relations()  # pylint: disable=protected-access
         return block_structure
 
     @classmethod
@@ -89,9 +97,18 @@ class BlockStructureFactory(object):
     def create_new(cls, root_block_usage_key, block_relations, transformer_data, block_data_map):
         """
         Returns a new block structure for given the arguments.
+
+        The given block_relations may be either a backing store of the
+        block structure framework or a plain dict of usage keys to
+        _BlockRelations, as found in legacy serialized data.  The new
+        structure's relations are backed by an _IndexedBlockRelations.
         """
+        if not isinstance(block_relations, (_BlockRelationsMap, _IndexedBlockRelations)):
+            block_relations = _BlockRelationsMap(block_relations)
+
         block_structure = BlockStructureBlockData(root_block_usage_key)
         block_structure._block_relations = block_relations  # pylint: disable=protected-access
+        block_structure._use_indexed_relations()  # pylint: disable=protected-access
         block_structure.transformer_data = transformer_data
         block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
         return block_structure
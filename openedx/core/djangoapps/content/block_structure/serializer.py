@@ -0,0 +1,611 @@
+"""
+Module for the compact binary serialization of BlockStructure objects.
+
+Rather than pickling the object graph of a block structure, the data is
+laid out column by column:
+
+    * An interned table of all usage keys in the structure.  Keys are
+      stored as (course key, block type, block id) rows, with each
+      distinct course key and block type appearing only once.
+
+    * Integer-indexed parent and child arrays (in CSR layout) into the
+      usage key table, which are loaded as is into an
+      _IndexedBlockRelations.
+
+    * For each collected xBlock field and each transformer's block
+      field, a column holding the field's values for all blocks that
+      have it.
+
+Columns of plain builtin values are encoded with marshal, columns of
+usage keys are encoded as indices into the key table, and only columns
+holding other types of values fall back to pickle.
+
+The block data of each transformer is kept in a separate section that is
+only decoded once the transformer's data is first accessed, so requests
+that run only a few transformers do not pay for decoding the others.
+
+Serialized data starts with a MAGIC prefix followed by a version byte,
+which allows readers to recognize (and fall back to unpickling) data
+that was written with the legacy zpickle format.
+"""
+
+
+import marshal
+import zlib
+from array import array
+from copy import deepcopy
+
+import six
+from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locator import BlockUsageLocator
+from six.moves import cPickle as pickle
+
+from openedx.core.lib.cache_utils import zunpickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _IndexedBlockRelations
+from .exceptions import BlockStructureDeserializationError
+
+# Prefix of all data written by this module.  Since zlib streams always
+# start with a 0x78 byte, the leading NUL distinguishes this format from
+# legacy zpickled data.
+MAGIC = b'\x00BS'
+
+# The latest version of the serialization format.  Incrementally update
+# this value whenever the layout of the serialized data changes.
+FORMAT_VERSION = 1
+
+# The marshal format version used for all marshalled data.
+MARSHAL_VERSION = 4
+
+# Pickle protocol used for columns holding non-builtin values.
+PICKLE_PROTOCOL = 4
+
+# Kinds of encoded columns.
+MARSHAL_COLUMN = 0
+USAGE_KEY_COLUMN = 1
+PICKLE_COLUMN = 2
+
+# Kinds of encoded usage key tables.
+INTERNED_KEY_TABLE = 0
+COLUMN_KEY_TABLE = 1
+
+# Typecode of the integer arrays used for indices.
+INDEX_TYPECODE = 'i'
+
+# Types that marshal encodes and decodes as the very same types.
+_MARSHAL_SCALAR_TYPES = frozenset(
+    [type(None), bool, float, complex, six.binary_type, six.text_type] + list(six.integer_types)
+)
+_MARSHAL_CONTAINER_TYPES = frozenset([tuple, list, set, frozenset])
+
+
+def is_serialized(serialized_data):
+    """
+    Returns whether the given data was written by this module (as
+    opposed to the legacy zpickle format).
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize(block_structure):
+    """
+    Returns the compact binary serialization of the block relations,
+    transformer data and block data of the given block structure.
+    """
+    payload = _BlockStructureEncoder(block_structure).encode()
+    return MAGIC + six.int2byte(FORMAT_VERSION) + zlib.compress(marshal.dumps(payload, MARSHAL_VERSION))
+
+
+def deserialize(serialized_data):
+    """
+    Returns a tuple of (block_relations, transformer_data, block_data_map)
+    decoded from the given serialized data.  Data in the legacy zpickle
+    format is unpickled instead.
+
+    Raises:
+        BlockStructureDeserializationError if the data is of an
+        unsupported version.
+    """
+    if not is_serialized(serialized_data):
+        return zunpickle(serialized_data)
+    return decode(decompress(serialized_data))
+
+
+def decompress(serialized_data):
+    """
+    Returns the decompressed payload of the given serialized data, which
+    must have been written by this module.  The returned bytes can be
+    cached and passed to decode.
+
+    Raises:
+        BlockStructureDeserializationError if the data is of an
+        unsupported version.
+    """
+    version = six.indexbytes(serialized_data, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise BlockStructureDeserializationError(
+            u'Unsupported block structure serialization version {}.'.format(version)
+        )
+    return zlib.decompress(serialized_data[len(MAGIC) + 1:])
+
+
+def decode(decompressed_data):
+    """
+    Returns a tuple of (block_relations, transformer_data, block_data_map)
+    decoded from the given decompressed payload.
+    """
+    return _BlockStructureDecoder(marshal.loads(decompressed_data)).decode()
+
+
+def _is_marshallable(value):
+    """
+    Returns whether the given value round-trips through marshal as the
+    very same type.  Marshal would otherwise silently encode subclasses
+    of builtins and buffer objects (e.g. bytearray) as their base type.
+    """
+    value_type = type(value)
+    if value_type in _MARSHAL_SCALAR_TYPES:
+        return True
+    if value_type in _MARSHAL_CONTAINER_TYPES:
+        return all(_is_marshallable(item) for item in value)
+    if value_type is dict:
+        return all(
+            _is_marshallable(key) and _is_marshallable(item)
+            for key, item in six.iteritems(value)
+        )
+    return False
+
+
+def _to_index_bytes(indices):
+    """
+    Returns the given list of ints as packed bytes.
+    """
+    return array(INDEX_TYPECODE, indices).tobytes()
+
+
+def _from_index_bytes(index_bytes):
+    """
+    Returns the packed bytes as an array of ints.
+    """
+    indices = array(INDEX_TYPECODE)
+    indices.frombytes(index_bytes)
+    return indices
+
+
+class _BlockStructureEncoder(object):
+    """
+    Encodes the data of a single block structure into a tuple of
+    marshallable values.
+    """
+    def __init__(self, block_structure):
+        self.block_structure = block_structure
+
+        # Interned table of usage keys.
+        # list [UsageKey], dict {UsageKey: int}
+        self.keys = []
+        self.key_indices = {}
+
+    def encode(self):
+        """
+        Returns the encoded payload for the block structure.
+        """
+        block_relations = self.block_structure._block_relations  # pylint: disable=protected-access
+        block_data_map = self.block_structure._block_data_map  # pylint: disable=protected-access
+
+        # Relation keys are interned first so that the relation
+        # arrays are positionally aligned with the key table.
+        for usage_key in block_relations:
+            self._key_index(usage_key)
+
+        relations = self._encode_relations(block_relations)
+        transformer_data = self._encode_transformer_data(self.block_structure.transformer_data)
+        block_data = self._encode_block_data(block_data_map)
+
+        return (
+            FORMAT_VERSION,
+            self._encode_key_table(),
+            len(block_relations),
+            relations,
+            transformer_data,
+            block_data,
+        )
+
+    def _key_index(self, usage_key):
+        """
+        Returns the index of the given key in the key table, interning
+        the key if it's not yet in the table.
+        """
+        try:
+            return self.key_indices[usage_key]
+        except KeyError:
+            index = self.key_indices[usage_key] = len(self.keys)
+            self.keys.append(usage_key)
+            return index
+
+    def _encode_key_table(self):
+        """
+        Returns the encoded usage key table.
+        """
+        if not all(isinstance(usage_key, BlockUsageLocator) for usage_key in self.keys):
+            return COLUMN_KEY_TABLE, self._encode_column(self.keys, allow_usage_keys=False)
+
+        course_keys, course_key_indices = [], {}
+        block_types, block_type_indices = [], {}
+        course_key_column, block_type_column, block_ids = [], [], []
+
+        for usage_key in self.keys:
+            course_key = six.text_type(usage_key.course_key)
+            if course_key not in course_key_indices:
+                course_key_indices[course_key] = len(course_keys)
+                course_keys.append(course_key)
+            if usage_key.block_type not in block_type_indices:
+                block_type_indices[usage_key.block_type] = len(block_types)
+                block_types.append(usage_key.block_type)
+
+            course_key_column.append(course_key_indices[course_key])
+            block_type_column.append(block_type_indices[usage_key.block_type])
+            block_ids.append(six.text_type(usage_key.block_id))
+
+        return INTERNED_KEY_TABLE, (
+            tuple(course_keys),
+            _to_index_bytes(course_key_column),
+            tuple(block_types),
+            _to_index_bytes(block_type_column),
+            tuple(block_ids),
+        )
+
+    def _encode_relations(self, block_relations):
+        """
+        Returns the parents and children of all blocks as CSR-style
+        (offsets, indices) arrays.
+        """
+        child_offsets, child_indices = [0], []
+        parent_offsets, parent_indices = [0], []
+
+        for usage_key in block_relations:
+            child_indices.extend(self.key_indices[child] for child in block_relations.get_children(usage_key))
+            child_offsets.append(len(child_indices))
+            parent_indices.extend(self.key_indices[parent] for parent in block_relations.get_parents(usage_key))
+            parent_offsets.append(len(parent_indices))
+
+        return (
+            _to_index_bytes(child_offsets),
+            _to_index_bytes(child_indices),
+            _to_index_bytes(parent_offsets),
+            _to_index_bytes(parent_indices),
+        )
+
+    def _encode_transformer_data(self, transformer_data):
+        """
+        Returns the encoded non-block-specific transformer data.
+        """
+        return tuple(
+            (transformer_name, self._encode_fields([data]))
+            for transformer_name, data in six.iteritems(transformer_data)
+        )
+
+    def _encode_block_data(self, block_data_map):
+        """
+        Returns the encoded xBlock fields and transformer block data of
+        all blocks, with each transformer's data in a separate section.
+        """
+        block_data_list = list(six.itervalues(block_data_map))
+        block_indices = [self._key_index(block_data.location) for block_data in block_data_list]
+
+        # Group each transformer's data across blocks.
+        # dict {transformer name: ([row position], [TransformerData])}
+        transformer_rows = {}
+        for position, block_data in enumerate(block_data_list):
+            for transformer_name, data in six.iteritems(block_data.transformer_data):
+                positions, rows = transformer_rows.setdefault(transformer_name, ([], []))
+                positions.append(position)
+                rows.append(data)
+
+        transformer_sections = tuple(
+            (transformer_name, _to_index_bytes(positions), self._encode_fields(rows))
+            for transformer_name, (positions, rows) in six.iteritems(transformer_rows)
+        )
+
+        return (
+            _to_index_bytes(block_indices),
+            self._encode_fields(block_data_list),
+            transformer_sections,
+        )
+
+    def _encode_fields(self, field_data_list):
+        """
+        Returns the encoded field columns of the given list of FieldData
+        objects, as a tuple of (field name, row positions, column).
+        """
+        # dict {field name: ([row position], [value])}
+        columns = {}
+        for position, field_data in enumerate(field_data_list):
+            for field_name, value in six.iteritems(field_data.fields):
+                positions, values = columns.setdefault(field_name, ([], []))
+                positions.append(position)
+                values.append(value)
+
+        return tuple(
+            (field_name, _to_index_bytes(positions), self._encode_column(values))
+            for field_name, (positions, values) in six.iteritems(columns)
+        )
+
+    def _encode_column(self, values, allow_usage_keys=True):
+        """
+        Returns a (column kind, bytes) tuple for the given list of
+        values, using the most compact encoding supported by all of them.
+        """
+        if _is_marshallable(values):
+            return MARSHAL_COLUMN, marshal.dumps(values, MARSHAL_VERSION)
+
+        if allow_usage_keys and all(value is None or isinstance(value, BlockUsageLocator) for value in values):
+            return USAGE_KEY_COLUMN, _to_index_bytes([
+                -1 if value is None else self._key_index(value)
+                for value in values
+            ])
+
+        return PICKLE_COLUMN, pickle.dumps(values, PICKLE_PROTOCOL)
+
+
+class _BlockStructureDecoder(object):
+    """
+    Decodes a payload created by _BlockStructureEncoder back into the
+    data of a block structure.
+    """
+    def __init__(self, payload):
+        (
+            self.format_version,
+            self.key_table,
+            self.num_relation_keys,
+            self.relations,
+            self.transformer_data,
+            self.block_data,
+        ) = payload
+        self.keys = None
+
+    def decode(self):
+        """
+        Returns a tuple of (block_relations, transformer_data,
+        block_data_map).  The transformer data of the blocks in
+        block_data_map is decoded lazily.
+        """
+        self.keys = self._decode_key_table()
+        return (
+            self._decode_relations(),
+            self._decode_transformer_data(),
+            self._decode_block_data(),
+        )
+
+    def _decode_key_table(self):
+        """
+        Returns the list of usage keys in the key table.
+        """
+        table_kind, table = self.key_table
+        if table_kind == COLUMN_KEY_TABLE:
+            return self._decode_column(table)
+
+        course_key_strings, course_key_column, block_types, block_type_column, block_ids = table
+        course_keys = [CourseKey.from_string(course_key) for course_key in course_key_strings]
+        return [
+            course_keys[course_key_index].make_usage_key(block_types[block_type_index], block_id)
+            for course_key_index, block_type_index, block_id in zip(
+                _from_index_bytes(course_key_column),
+                _from_index_bytes(block_type_column),
+                block_ids,
+            )
+        ]
+
+    def _decode_relations(self):
+        """
+        Returns the block relations, backed directly by the decoded
+        index arrays.
+        """
+        return _IndexedBlockRelations(
+            self.keys[:self.num_relation_keys],
+            *(_from_index_bytes(index_bytes) for index_bytes in self.relations)
+        )
+
+    def _decode_transformer_data(self):
+        """
+        Returns the non-block-specific transformer data map.
+        """
+        transformer_data = TransformerDataMap()
+        for transformer_name, fields in self.transformer_data:
+            data = TransformerData()
+            self._decode_fields(fields, [data])
+            transformer_data[transformer_name] = data
+        return transformer_data
+
+    def _decode_block_data(self):
+        """
+        Returns the block data map.  The transformer block data is not
+        decoded here; each transformer's section is instead decoded
+        on first access by any of the blocks.
+        """
+        block_indices, xblock_fields, transformer_sections = self.block_data
+        block_data_list = [BlockData(self.keys[index]) for index in _from_index_bytes(block_indices)]
+        self._decode_fields(xblock_fields, block_data_list)
+
+        if transformer_sections:
+            loader = _TransformerSectionLoader(self, block_data_list, transformer_sections)
+            for block_data in block_data_list:
+                block_data.transformer_data = _LazyTransformerDataMap(loader)
+
+        return {block_data.location: block_data for block_data in block_data_list}
+
+    def decode_transformer_section(self, transformer_name, positions, fields, block_data_list):
+        """
+        Decodes the given transformer's block data into the blocks of
+        the given block_data_list.
+        """
+        rows = []
+        for position in _from_index_bytes(positions):
+            data = TransformerData()
+            dict.__setitem__(block_data_list[position].transformer_data, transformer_name, data)
+            rows.append(data)
+        self._decode_fields(fields, rows)
+
+    def _decode_fields(self, fields, field_data_list):
+        """
+        Decodes the given field columns into the given list of FieldData
+        objects.
+        """
+        for field_name, positions, column in fields:
+            for position, value in zip(_from_index_bytes(positions), self._decode_column(column)):
+                field_data_list[position].fields[field_name] = value
+
+    def _decode_column(self, column):
+        """
+        Returns the list of values of the given encoded column.
+        """
+        column_kind, column_bytes = column
+        if column_kind == MARSHAL_COLUMN:
+            return marshal.loads(column_bytes)
+        elif column_kind == USAGE_KEY_COLUMN:
+            keys = self.keys
+            return [None if index == -1 else keys[index] for index in _from_index_bytes(column_bytes)]
+        elif column_kind == PICKLE_COLUMN:
+            return pickle.loads(column_bytes)
+        raise BlockStructureDeserializationError(u'Unknown column kind {}.'.format(column_kind))
+
+
+class _TransformerSectionLoader(object):
+    """
+    Decodes the transformer sections of a deserialized block structure
+    on demand, so that requests only pay for the data of the
+    transformers they actually run.
+    """
+    def __init__(self, decoder, block_data_list, transformer_sections):
+        self.decoder = decoder
+        self.block_data_list = block_data_list
+
+        # Map of a transformer's name to its yet undecoded section.
+        # dict {string: (bytes, tuple)}
+        self.pending = {
+            transformer_name: (positions, fields)
+            for transformer_name, positions, fields in transformer_sections
+        }
+
+    def load(self, transformer_name):
+        """
+        Decodes the section of the given transformer into all blocks,
+        if not yet decoded.
+        """
+        section = self.pending.pop(transformer_name, None)
+        if section is not None:
+            positions, fields = section
+            self.decoder.decode_transformer_section(transformer_name, positions, fields, self.block_data_list)
+            if not self.pending:
+                self._release()
+
+    def load_all(self):
+        """
+        Decodes all pending sections into all blocks.
+        """
+        for transformer_name in list(self.pending):
+            self.load(transformer_name)
+
+    def __deepcopy__(self, memo):
+        """
+        Returns a loader of the same pending sections into copies of
+        the blocks, sharing the decoder and its encoded sections.
+        """
+        copied = _TransformerSectionLoader.__new__(_TransformerSectionLoader)
+        memo[id(self)] = copied
+        copied.decoder = self.decoder
+        copied.pending = dict(self.pending)
+        copied.block_data_list = deepcopy(self.block_data_list, memo)
+        return copied
+
+    def _release(self):
+        """
+        Detaches this loader from the blocks once all sections are
+        decoded, so they no longer pay for the lazy lookups.
+        """
+        for block_data in self.block_data_list:
+            block_data.transformer_data._loader = None  # pylint: disable=protected-access
+        self.decoder = None
+        self.block_data_list = []
+
+
+class _LazyTransformerDataMap(TransformerDataMap):
+    """
+    TransformerDataMap of a single block whose transformers' data is
+    decoded by the given _TransformerSectionLoader on first access.
+    """
+    def __init__(self, loader):
+        super(_LazyTransformerDataMap, self).__init__()
+        self._loader = loader
+
+    def _load(self, key):
+        """
+        Ensures the section of the transformer for the given key is decoded.
+        """
+        if self._loader is not None:
+            self._loader.load(self._translate_key(key))
+
+    def _load_all(self):
+        """
+        Ensures the sections of all transformers are decoded.
+        """
+        if self._loader is not None:
+            self._loader.load_all()
+
+    def __getitem__(self, key):
+        self._load(key)
+        return super(_LazyTransformerDataMap, self).__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._load(key)
+        super(_LazyTransformerDataMap, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._load(key)
+        super(_LazyTransformerDataMap, self).__delitem__(key)
+
+    def __contains__(self, key):
+        self._load(key)
+        return dict.__contains__(self, self._translate_key(key))
+
+    def get(self, key, default=None):
+        self._load(key)
+        return dict.get(self, self._translate_key(key), default)
+
+    def pop(self, key, *args):
+        self._load(key)
+        return dict.pop(self, self._translate_key(key), *args)
+
+    def __iter__(self):
+        self._load_all()
+        return super(_LazyTransformerDataMap, self).__iter__()
+
+    def __len__(self):
+        self._load_all()
+        return super(_LazyTransformerDataMap, self).__len__()
+
+    def keys(self):
+        self._load_all()
+        return super(_LazyTransformerDataMap, self).keys()
+
+    def values(self):
+        self._load_all()
+        return super(_LazyTransformerDataMap, self).values()
+
+    def items(self):
+        self._load_all()
+        return super(_LazyTransformerDataMap, self).items()
+
+    def __deepcopy__(self, memo):
+        # Keep the pending sections pending in the copy, which decodes them
+        # into the copied blocks, so that copying a structure (see
+        # BlockStructure.copy) doesn't decode every transformer's data.
+        copied = _LazyTransformerDataMap(None)
+        memo[id(self)] = copied
+        if self._loader is not None:
+            copied._loader = deepcopy(self._loader, memo)  # pylint: disable=protected-access
+        for key, value in dict.items(self):
+            dict.__setitem__(copied, key, deepcopy(value, memo))
+        return copied
+
+    def __reduce__(self):
+        return TransformerDataMap, (list(self.items()),)
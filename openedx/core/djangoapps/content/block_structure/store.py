@@ -9,9 +9,10 @@ from logging import getLogger
 import six
 
 from django.utils.encoding import python_2_unicode_compatible
-from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from openedx.core.lib.cache_utils import ByteSizeLRUCache
+
+from . import config, serializer
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -20,6 +21,9 @@ from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# Process-local cache of decompressed serialized data, created on first use.
+_process_local_cache = None
+
 
 @python_2_unicode_compatible
 class StubModel(object):
@@ -56,8 +60,8 @@ class BlockStructureStore(object):
 
     def add(self, block_structure):
         """
-        Stores and caches a compressed and pickled serialization of
-        the given block structure.
+        Stores and caches a compressed serialization of the given
+        block structure.
 
         The data stored includes the structure's
         block relations, transformer data, and block data.
@@ -70,6 +74,7 @@ class BlockStructureStore(object):
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        self._delete_from_local_cache(bs_model)
 
     def get(self, root_block_usage_key):
         """
@@ -94,13 +99,21 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
 
-        try:
-            serialized_data = self._get_from_cache(bs_model)
-        except BlockStructureNotFound:
-            serialized_data = self._get_from_store(bs_model)
-            self._add_to_cache(serialized_data, bs_model)
+        decompressed_data = self._get_from_local_cache(bs_model)
+        if decompressed_data is None:
+            try:
+                serialized_data = self._get_from_cache(bs_model)
+            except BlockStructureNotFound:
+                serialized_data = self._get_from_store(bs_model)
+                self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+            if not (_is_process_local_cache_enabled() and serializer.is_serialized(serialized_data)):
+                return self._deserialize(serialized_data, root_block_usage_key)
+
+            decompressed_data = self._decompress(serialized_data, bs_model)
+            self._add_to_local_cache(decompressed_data, bs_model)
+
+        return self._deserialize(decompressed_data, root_block_usage_key, decompressed=True)
 
     def delete(self, root_block_usage_key):
         """
@@ -113,6 +126,7 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        self._delete_from_local_cache(bs_model)
         bs_model.delete()
         logger.info(u"BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -180,6 +194,49 @@ class BlockStructureStore(object):
             raise BlockStructureNotFound(bs_model.data_usage_key)
         return serialized_data
 
+    def _get_from_local_cache(self, bs_model):
+        """
+        Returns the decompressed serialized data for the given
+        BlockStructureModel from the process-local cache; returns None
+        if not found or if the process-local cache is disabled.
+        """
+        if not _is_process_local_cache_enabled():
+            return None
+
+        local_cache = _get_process_local_cache()
+        decompressed_data = local_cache.get(self._encode_root_cache_key(bs_model))
+        if decompressed_data is None:
+            logger.info(
+                u"BlockStructure: Not found in process-local cache; %s, hits: %d, misses: %d.",
+                bs_model,
+                local_cache.hits,
+                local_cache.misses,
+            )
+        return decompressed_data
+
+    def _add_to_local_cache(self, decompressed_data, bs_model):
+        """
+        Adds the given decompressed serialized data for the given
+        BlockStructureModel to the process-local cache.
+        """
+        local_cache = _get_process_local_cache()
+        local_cache.set(self._encode_root_cache_key(bs_model), decompressed_data)
+        logger.info(
+            u"BlockStructure: Added to process-local cache; %s, size: %d, total size: %d, evictions: %d",
+            bs_model,
+            len(decompressed_data),
+            local_cache.current_bytes,
+            local_cache.evictions,
+        )
+
+    def _delete_from_local_cache(self, bs_model):
+        """
+        Removes the data for the given BlockStructureModel from the
+        process-local cache, if it was ever used.
+        """
+        if _process_local_cache is not None:
+            _process_local_cache.delete(self._encode_root_cache_key(bs_model))
+
     def _get_from_store(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -196,24 +253,40 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        return zpickle(data_to_cache)
+        return serializer.serialize(block_structure)
+
+    def _decompress(self, serialized_data, bs_model):
+        """
+        Returns the decompressed payload of the given serialized data.
+        Raises:
+             BlockStructureNotFound if the data cannot be decompressed.
+        """
+        try:
+            return serializer.decompress(serialized_data)
+        except Exception:
+            # Somehow failed to decompress the data, assume it's corrupt.
+            logger.exception(u"BlockStructure: Failed to decompress data from cache for %s", bs_model)
+            raise BlockStructureNotFound(bs_model.data_usage_key)
 
-    def _deserialize(self, serialized_data, root_block_usage_key):
+    def _deserialize(self, serialized_data, root_block_usage_key, decompressed=False):
         """
         Deserializes the given data and returns the parsed block_structure.
+        Data in the legacy zpickle format is still supported.
+
+        If decompressed is True, the given data is a payload previously
+        returned by _decompress.
         """
 
         try:
-            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+            if decompressed:
+                block_relations, transformer_data, block_data_map = serializer.decode(serialized_data)
+            else:
+                block_relations, transformer_data, block_data_map = serializer.deserialize(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
             bs_model = self._get_model(root_block_usage_key)
             logger.exception(u"BlockStructure: Failed to load data from cache for %s", bs_model)
+            self._delete_from_local_cache(bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)
 
         return BlockStructureFactory.create_new(
@@ -267,3 +340,24 @@ def _is_storage_backing_enabled():
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_process_local_cache_enabled():
+    """
+    Returns whether the process-local cache for Block Structures is
+    enabled.  It is only used along with storage backing, since only
+    then do cache keys include the version of the stored data, which
+    prevents serving stale data after the course is updated by another
+    process.
+    """
+    return _is_storage_backing_enabled() and config.waffle().is_enabled(config.PROCESS_LOCAL_CACHE)
+
+
+def _get_process_local_cache():
+    """
+    Returns the process-local cache, creating it if needed.
+    """
+    global _process_local_cache  # pylint: disable=global-statement
+    if _process_local_cache is None:
+        _process_local_cache = ByteSizeLRUCache(config.process_local_cache_max_bytes())
+    return _process_local_cache
@@ -28,13 +28,21 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
     """
 
     @ddt.data(
-        [],
-        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
-        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
-        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+        *itertools.product(
+            [
+                [],
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+            [True, False],
+        )
     )
-    def test_relations(self, children_map):
+    @ddt.unpack
+    def test_relations(self, children_map, use_indexed_relations):
         block_structure = self.create_block_structure(children_map, BlockStructure)
+        if use_indexed_relations:
+            block_structure._use_indexed_relations()
 
         # get_children
         for parent, children in enumerate(children_map):
@@ -49,6 +57,26 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             self.assertIn(node, block_structure)
         self.assertNotIn(len(children_map) + 1, block_structure)
 
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_indexed_relations_traversals(self, children_map):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        indexed_block_structure = self.create_block_structure(children_map, BlockStructure)
+        indexed_block_structure._use_indexed_relations()
+
+        self.assertEqual(list(indexed_block_structure), list(block_structure))
+        self.assertEqual(
+            list(indexed_block_structure.topological_traversal()),
+            list(block_structure.topological_traversal()),
+        )
+        self.assertEqual(
+            list(indexed_block_structure.post_order_traversal(filter_func=lambda block: block != 1)),
+            list(block_structure.post_order_traversal(filter_func=lambda block: block != 1)),
+        )
+
 
 @ddt.ddt
 class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
@@ -209,16 +237,19 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
                 ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
                 ChildrenMapTestMixin.DAG_CHILDREN_MAP,
             ],
+            [True, False],
         )
     )
     @ddt.unpack
-    def test_remove_block(self, keep_descendants, block_to_remove, children_map):
+    def test_remove_block(self, keep_descendants, block_to_remove, children_map, use_indexed_relations):
         ### skip test if invalid
         if (block_to_remove >= len(children_map)) or (keep_descendants and block_to_remove == 0):
             return
 
         ### create structure
         block_structure = self.create_block_structure(children_map)
+        if use_indexed_relations:
+            block_structure._use_indexed_relations()
         parents_map = self.get_parents_map(children_map)
 
         ### verify blocks pre-exist
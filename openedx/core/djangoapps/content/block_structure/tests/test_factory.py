@@ -7,6 +7,7 @@ from django.test import TestCase
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
+from ..block_structure import _BlockRelationsMap, _IndexedBlockRelations
 from ..exceptions import BlockStructureNotFound
 from ..factory import BlockStructureFactory
 from ..store import BlockStructureStore
@@ -28,6 +29,9 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
             root_block_usage_key=0, modulestore=self.modulestore
         )
         self.assert_block_structure(block_structure, self.children_map)
+        self.assertIsInstance(
+            block_structure._block_relations, _IndexedBlockRelations  # pylint: disable=protected-access
+        )
 
     def test_from_modulestore_fail(self):
         with self.assertRaises(ItemNotFoundError):
@@ -65,3 +69,17 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
             block_structure._block_data_map,  # pylint: disable=protected-access
         )
         self.assert_block_structure(new_structure, self.children_map)
+
+    def test_new_from_legacy_relations(self):
+        block_structure = self.create_block_structure(self.children_map)
+        self.assertIsInstance(block_structure._block_relations, _BlockRelationsMap)  # pylint: disable=protected-access
+        new_structure = BlockStructureFactory.create_new(
+            block_structure.root_block_usage_key,
+            dict(block_structure._block_relations),  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+        )
+        self.assert_block_structure(new_structure, self.children_map)
+        self.assertIsInstance(
+            new_structure._block_relations, _IndexedBlockRelations  # pylint: disable=protected-access
+        )
@@ -0,0 +1,147 @@
+"""
+Tests for block_structure/serializer.py
+"""
+
+
+from datetime import datetime
+from unittest import TestCase
+
+import ddt
+import six
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+from pytz import UTC
+
+from openedx.core.lib.cache_utils import zpickle
+
+from .. import serializer
+from ..exceptions import BlockStructureDeserializationError
+from ..factory import BlockStructureFactory
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the block structure serializer.
+    """
+    def setUp(self):
+        super(TestSerializer, self).setUp()
+        self.block_structure = self.create_block_structure(self.DAG_CHILDREN_MAP)
+        self.block_structure._add_transformer(MockTransformer)  # pylint: disable=protected-access
+
+        other_course_key = CourseLocator('other_org', 'other_course', 'other_run')
+        for block_id in range(len(self.DAG_CHILDREN_MAP)):
+            block_key = self.block_key_factory(block_id)
+            block_data = self.block_structure._get_or_create_block(block_key)  # pylint: disable=protected-access
+            block_data.display_name = u'Block {}'.format(block_id)
+            block_data.start = datetime(2020, 1, block_id + 1, tzinfo=UTC)
+            block_data.graded = block_id % 2 == 0
+            if block_id % 3 == 0:
+                block_data.source = BlockUsageLocator(other_course_key, 'html', six.text_type(block_id))
+            self.block_structure.set_transformer_block_field(
+                block_key, MockTransformer, 'test', {'ids': [block_id], 'set': {block_id}},
+            )
+
+    def _round_trip(self, serialized_data):
+        """
+        Returns a new block structure created from the given serialized data.
+        """
+        return BlockStructureFactory.create_new(
+            self.block_structure.root_block_usage_key,
+            *serializer.deserialize(serialized_data)
+        )
+
+    def assert_same_block_data(self, block_structure):
+        """
+        Verifies that the data of the given block structure equals that
+        of self.block_structure.
+        """
+        self.assert_block_structure(block_structure, self.DAG_CHILDREN_MAP)
+        self.assertEqual(
+            block_structure.transformer_data[MockTransformer].fields,
+            self.block_structure.transformer_data[MockTransformer].fields,
+        )
+        for block_key, expected_block_data in self.block_structure.iteritems():
+            block_data = block_structure[block_key]
+            self.assertEqual(block_data.location, block_key)
+            self.assertEqual(block_data.fields, expected_block_data.fields)
+            self.assertEqual(
+                block_data.transformer_data[MockTransformer].fields,
+                expected_block_data.transformer_data[MockTransformer].fields,
+            )
+
+    def test_round_trip(self):
+        serialized_data = serializer.serialize(self.block_structure)
+        self.assertTrue(serializer.is_serialized(serialized_data))
+        self.assert_same_block_data(self._round_trip(serialized_data))
+
+    def test_parents_order(self):
+        block_structure = self._round_trip(serializer.serialize(self.block_structure))
+        for block_key in self.block_structure:
+            self.assertEqual(block_structure.get_parents(block_key), self.block_structure.get_parents(block_key))
+            self.assertEqual(block_structure.get_children(block_key), self.block_structure.get_children(block_key))
+
+    def test_legacy_zpickle(self):
+        serialized_data = zpickle((
+            self.block_structure._block_relations,  # pylint: disable=protected-access
+            self.block_structure.transformer_data,
+            self.block_structure._block_data_map,  # pylint: disable=protected-access
+        ))
+        self.assertFalse(serializer.is_serialized(serialized_data))
+        self.assert_same_block_data(self._round_trip(serialized_data))
+
+    def test_lazy_transformer_sections(self):
+        block_structure = self._round_trip(serializer.serialize(self.block_structure))
+        root_block_data = block_structure[block_structure.root_block_usage_key]
+        self.assertEqual(dict.__len__(root_block_data.transformer_data), 0)
+
+        self.assertEqual(
+            block_structure.get_transformer_block_field(block_structure.root_block_usage_key, MockTransformer, 'test'),
+            {'ids': [0], 'set': {0}},
+        )
+        for block_key in block_structure:
+            self.assertEqual(dict.__len__(block_structure[block_key].transformer_data), 1)
+
+    def test_copy_with_lazy_transformer_sections(self):
+        block_structure = self._round_trip(serializer.serialize(self.block_structure))
+        copied_structure = block_structure.copy()
+        for block_key in block_structure:
+            self.assertEqual(dict.__len__(block_structure[block_key].transformer_data), 0)
+            self.assertEqual(dict.__len__(copied_structure[block_key].transformer_data), 0)
+
+        self.assert_same_block_data(copied_structure)
+        # The sections were decoded into the copy's blocks only.
+        for block_key in block_structure:
+            self.assertEqual(dict.__len__(block_structure[block_key].transformer_data), 0)
+        self.assert_same_block_data(block_structure)
+
+    def test_copy_with_decoded_transformer_sections(self):
+        block_structure = self._round_trip(serializer.serialize(self.block_structure))
+        root_key = block_structure.root_block_usage_key
+        block_structure.get_transformer_block_field(root_key, MockTransformer, 'test')['ids'].append(-1)
+
+        copied_structure = block_structure.copy()
+        copied_structure.get_transformer_block_field(root_key, MockTransformer, 'test')['ids'].append(-2)
+        self.assertEqual(
+            block_structure.get_transformer_block_field(root_key, MockTransformer, 'test')['ids'], [0, -1],
+        )
+        self.assertEqual(
+            copied_structure.get_transformer_block_field(root_key, MockTransformer, 'test')['ids'], [0, -1, -2],
+        )
+
+    def test_unsupported_version(self):
+        serialized_data = serializer.serialize(self.block_structure)
+        serialized_data = serializer.MAGIC + six.int2byte(serializer.FORMAT_VERSION + 1) + serialized_data[4:]
+        with self.assertRaises(BlockStructureDeserializationError):
+            serializer.deserialize(serialized_data)
+
+    @ddt.data(
+        ([1, u'a', None, (2.5, {u'b': {3}})], serializer.MARSHAL_COLUMN),
+        ([bytearray(b'a')], serializer.PICKLE_COLUMN),
+        ([datetime(2020, 1, 1, tzinfo=UTC)], serializer.PICKLE_COLUMN),
+    )
+    @ddt.unpack
+    def test_column_kinds(self, values, expected_kind):
+        encoder = serializer._BlockStructureEncoder(self.block_structure)  # pylint: disable=protected-access
+        column_kind, _ = encoder._encode_column(values)  # pylint: disable=protected-access
+        self.assertEqual(column_kind, expected_kind)
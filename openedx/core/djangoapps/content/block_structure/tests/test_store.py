@@ -7,7 +7,8 @@ import ddt
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from .. import store
+from ..config import PROCESS_LOCAL_CACHE, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
@@ -30,6 +31,7 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        store._process_local_cache = None  # pylint: disable=protected-access
 
     def add_transformers(self):
         """
@@ -90,3 +92,30 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_process_local_cache(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(PROCESS_LOCAL_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(self.block_structure.root_block_usage_key)
+                self.mock_cache.map.clear()
+
+                if with_storage_backing:
+                    stored_value = self.store.get(self.block_structure.root_block_usage_key)
+                    self.assert_block_structure(stored_value, self.children_map)
+                    self.assertEqual(store._process_local_cache.hits, 1)  # pylint: disable=protected-access
+                    # The process-local cache is not repopulated into the shared cache.
+                    self.assertEqual(self.mock_cache.map, {})
+                else:
+                    with self.assertRaises(BlockStructureNotFound):
+                        self.store.get(self.block_structure.root_block_usage_key)
+
+    def test_process_local_cache_invalidation(self):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_LOCAL_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(self.block_structure.root_block_usage_key)
+                self.store.delete(self.block_structure.root_block_usage_key)
+                with self.assertRaises(BlockStructureNotFound):
+                    self.store.get(self.block_structure.root_block_usage_key)
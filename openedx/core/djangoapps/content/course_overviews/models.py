@@ -3,14 +3,17 @@ Declaration of CourseOverview model
 """
 
 
+import copy
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import six
 from ccx_keys.locator import CCXLocator
 from config_models.models import ConfigurationModel
 from django.conf import settings
-from django.db import models, transaction
+from django.core.signals import setting_changed
+from django.db import connection, models, transaction
 from django.db.models import Q
 from django.db.models.fields import BooleanField, DateTimeField, DecimalField, FloatField, IntegerField, TextField
 from django.db.models.signals import post_save, post_delete
@@ -28,7 +31,7 @@ from lms.djangoapps.discussion import django_comment_client
 from openedx.core.djangoapps.catalog.models import CatalogIntegration
 from openedx.core.djangoapps.lang_pref.api import get_closest_released_language
 from openedx.core.djangoapps.models.course_details import CourseDetails
-from openedx.core.lib.cache_utils import request_cached, RequestCache
+from openedx.core.lib.cache_utils import LRUCache, request_cached, RequestCache
 from static_replace.models import AssetBaseUrlConfig
 from xmodule import block_metadata_utils, course_metadata_utils
 from xmodule.course_module import DEFAULT_START_DATE, CourseDescriptor
@@ -39,6 +42,20 @@ from xmodule.tabs import CourseTab
 
 log = logging.getLogger(__name__)
 
+# The process-wide cache of CourseOverview.get_from_ids, created by _get_overview_cache.
+_overview_cache = None  # pylint: disable=invalid-name
+
+
+def _get_overview_cache():
+    """
+    Returns the process-wide cache of CourseOverview.get_from_ids, holding at most
+    COURSE_OVERVIEW_CACHE_SIZE overviews, with the versions they were cached at.
+    """
+    global _overview_cache  # pylint: disable=global-statement
+    if _overview_cache is None:
+        _overview_cache = LRUCache(settings.COURSE_OVERVIEW_CACHE_SIZE)
+    return _overview_cache
+
 
 @python_2_unicode_compatible
 class CourseOverview(TimeStampedModel):
@@ -365,8 +382,14 @@ class CourseOverview(TimeStampedModel):
         """
         Return a dict mapping course_ids to CourseOverviews.
 
-        Tries to select all CourseOverviews in one query,
-        then fetches remaining (uncached) overviews from the modulestore.
+        Tries to select all CourseOverviews, with their image sets and tabs,
+        in one query, then loads the remaining (uncached) overviews from the
+        modulestore with load_many_from_module_store.
+
+        Overviews selected from the database are also kept in a process-wide
+        cache of COURSE_OVERVIEW_CACHE_SIZE overviews, and returned from it
+        while neither they nor their image sets have changed.  Checking that
+        takes a single, light, query.
 
         Course IDs for non-existant courses will map to None.
 
@@ -375,21 +398,111 @@ class CourseOverview(TimeStampedModel):
 
         Returns: dict[CourseKey, CourseOverview|None]
         """
-        overviews = {
-            overview.id: overview
-            for overview in cls.objects.select_related('image_set').filter(
-                id__in=course_ids,
+        course_ids = list(course_ids)
+        overviews = cls._get_cached_overviews(course_ids)
+
+        uncached_ids = [course_id for course_id in course_ids if course_id not in overviews]
+        if uncached_ids:
+            for overview in cls.objects.select_related('image_set').prefetch_related('tab_set').filter(
+                id__in=uncached_ids,
                 version__gte=cls.VERSION
-            )
-        }
+            ):
+                overviews[overview.id] = overview
+                if settings.COURSE_OVERVIEW_CACHE_SIZE:
+                    _get_overview_cache().set(overview.id, (copy.copy(overview), overview._cache_version()))
+
+        missing_ids = [course_id for course_id in course_ids if course_id not in overviews]
+        if missing_ids:
+            overviews.update(cls.load_many_from_module_store(missing_ids))
+        return overviews
+
+    @classmethod
+    def _get_cached_overviews(cls, course_ids):
+        """
+        Return a dict mapping the course_ids whose overviews are in the
+        process-wide cache, and still current, to copies of them.
+        """
+        if not settings.COURSE_OVERVIEW_CACHE_SIZE:
+            return {}
+
+        overview_cache = _get_overview_cache()
+        cached_entries = {}
         for course_id in course_ids:
-            if course_id not in overviews:
-                try:
-                    overviews[course_id] = cls.load_from_module_store(course_id)
-                except CourseOverview.DoesNotExist:
-                    overviews[course_id] = None
+            entry = overview_cache.get(course_id)
+            if entry is not None:
+                cached_entries[course_id] = entry
+        if not cached_entries:
+            return {}
+
+        current_versions = {
+            course_id: (modified, version, image_set_modified)
+            for course_id, modified, version, image_set_modified in cls.objects.filter(
+                id__in=list(cached_entries)
+            ).values_list('id', 'modified', 'version', 'image_set__modified')
+        }
+        overviews = {}
+        for course_id, (overview, cache_version) in six.iteritems(cached_entries):
+            if current_versions.get(course_id) == cache_version and overview.version >= cls.VERSION:
+                overviews[course_id] = copy.copy(overview)
+            else:
+                overview_cache.delete(course_id)
         return overviews
 
+    def _cache_version(self):
+        """
+        Return the version of this overview in the process-wide cache, which
+        changes whenever the overview, or its image set, is saved.
+        """
+        image_set_modified = self.image_set.modified if hasattr(self, 'image_set') else None
+        return self.modified, self.version, image_set_modified
+
+    @classmethod
+    def load_many_from_module_store(cls, course_ids, max_workers=None):
+        """
+        Load the CourseOverviews of course_ids from the module store, as
+        load_from_module_store does, in a pool of up to max_workers threads.
+
+        Arguments:
+            course_ids (list[CourseKey])
+            max_workers (int): the most courses to load at once, which defaults
+                to COURSE_OVERVIEW_LOAD_WORKERS.
+
+        Returns: dict[CourseKey, CourseOverview|None], with None for non-existent courses.
+
+        Raises:
+            - IOError, or any other error of load_from_module_store, for the
+                first course in course_ids which raised one.
+        """
+        if max_workers is None:
+            max_workers = settings.COURSE_OVERVIEW_LOAD_WORKERS
+        if max_workers <= 1 or len(course_ids) <= 1:
+            return {course_id: cls._load_if_exists(course_id) for course_id in course_ids}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(course_ids))) as executor:
+            return dict(zip(course_ids, executor.map(cls._load_if_exists_in_thread, course_ids)))
+
+    @classmethod
+    def _load_if_exists(cls, course_id):
+        """
+        Load the CourseOverview of course_id from the module store, or return
+        None if the course doesn't exist.
+        """
+        try:
+            return cls.load_from_module_store(course_id)
+        except cls.DoesNotExist:
+            return None
+
+    @classmethod
+    def _load_if_exists_in_thread(cls, course_id):
+        """
+        Run _load_if_exists in a worker thread of load_many_from_module_store,
+        closing the database connection the thread opened.
+        """
+        try:
+            return cls._load_if_exists(course_id)
+        finally:
+            connection.close()
+
     def clean_id(self, padding_char='='):
         """
         Returns a unique deterministic base32-encoded ID for the course.
@@ -653,7 +766,10 @@ class CourseOverview(TimeStampedModel):
         """
         Returns an iterator of CourseTabs.
         """
-        for tab_dict in self.tab_set.all().values():
+        tab_fields = [field.attname for field in CourseOverviewTab._meta.concrete_fields]
+        # Iterate over the models, rather than values(), to use the tabs prefetched by get_from_ids.
+        for overview_tab in self.tab_set.all():
+            tab_dict = {field: getattr(overview_tab, field) for field in tab_fields}
             tab = CourseTab.from_json(tab_dict)
             if tab is None:
                 log.warning("Can't instantiate CourseTab from %r", tab_dict)
@@ -1038,7 +1154,30 @@ def _invalidate_overview_cache(**kwargs):  # pylint: disable=unused-argument
     RequestCache('course_overview').clear()
 
 
+def _invalidate_cached_overview(instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remove a saved or deleted overview from this process' cache of overviews.
+
+    Other processes find that their cached overview is outdated when they next use it.
+    """
+    if _overview_cache is not None:
+        _overview_cache.delete(instance.id)
+
+
+def _reset_overview_cache(setting, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop this process' cache of overviews when its size is overridden, so that
+    it is recreated, empty, with the new size.
+    """
+    global _overview_cache  # pylint: disable=global-statement
+    if setting == 'COURSE_OVERVIEW_CACHE_SIZE':
+        _overview_cache = None
+
+
 post_save.connect(_invalidate_overview_cache, sender=CourseOverview)
 post_save.connect(_invalidate_overview_cache, sender=CourseOverviewImageConfig)
 post_delete.connect(_invalidate_overview_cache, sender=CourseOverview)
 post_delete.connect(_invalidate_overview_cache, sender=CourseOverviewImageConfig)
+post_save.connect(_invalidate_cached_overview, sender=CourseOverview)
+post_delete.connect(_invalidate_cached_overview, sender=CourseOverview)
+setting_changed.connect(_reset_overview_cache)
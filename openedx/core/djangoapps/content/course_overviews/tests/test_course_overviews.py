@@ -594,6 +594,55 @@ class CourseOverviewTestCase(CatalogIntegrationMixin, ModuleStoreTestCase, Cache
         assert overviews_by_id[non_existent_course_key] is None
         assert mock_load_from_modulestore.call_count == 3
 
+    @ddt.data(1, 4)
+    @mock.patch('openedx.core.djangoapps.content.course_overviews.models.connection')
+    def test_load_many_from_module_store(self, workers, mock_connection):
+        """
+        Assert that CourseOverview.load_many_from_module_store loads every
+        course, with any number of workers.
+        """
+        course_ids = [CourseKey.from_string('course-v1:edX+Course{}+Run'.format(index)) for index in range(4)]
+
+        def load_from_module_store(course_id):
+            if course_id == course_ids[3]:
+                raise CourseOverview.DoesNotExist()
+            return course_id
+
+        with mock.patch.object(CourseOverview, 'load_from_module_store', side_effect=load_from_module_store):
+            overviews_by_id = CourseOverview.load_many_from_module_store(course_ids, max_workers=workers)
+        assert overviews_by_id == dict({course_id: course_id for course_id in course_ids[:3]}, **{course_ids[3]: None})
+        # Worker threads close their database connections.
+        assert mock_connection.close.call_count == (4 if workers > 1 else 0)
+
+    @override_settings(COURSE_OVERVIEW_CACHE_SIZE=10)
+    def test_get_from_ids_process_cache(self):
+        """
+        Assert that CourseOverviews.get_from_ids returns current overviews from
+        the process cache, with one query, and reselects changed ones.
+        """
+        courses = [CourseFactory.create(emit_signals=True) for __ in range(2)]
+        course_ids = [course.id for course in courses]
+        CourseOverview.get_from_ids(course_ids)
+
+        with self.assertNumQueries(1):
+            overviews_by_id = CourseOverview.get_from_ids(course_ids)
+            assert [overviews_by_id[course_id].id for course_id in course_ids] == course_ids
+            # The tabs were prefetched, too.
+            overviews_by_id[course_ids[0]].tabs  # pylint: disable=pointless-statement
+
+        overview = CourseOverview.objects.get(id=course_ids[0])
+        overview.display_name = 'Changed'
+        overview.save()
+        overviews_by_id = CourseOverview.get_from_ids(course_ids)
+        assert overviews_by_id[course_ids[0]].display_name == 'Changed'
+
+        # Overviews changed by other processes are reselected, too.
+        CourseOverview.objects.filter(id=course_ids[1]).update(
+            display_name='Changed elsewhere', modified=timezone.now() + datetime.timedelta(seconds=1)
+        )
+        overviews_by_id = CourseOverview.get_from_ids(course_ids)
+        assert overviews_by_id[course_ids[1]].display_name == 'Changed elsewhere'
+
 
 @ddt.ddt
 class CourseOverviewImageSetTestCase(ModuleStoreTestCase):
@@ -0,0 +1,442 @@
+"""
+A local disk cache of course assets, for the assets too large for the
+Django cache used by the caching module.
+
+Assets are cached in files named after their key and content digest, so a
+changed asset is cached in a new file, and the old one ages out.  The cache is
+shared by all the processes of a server, and bounded in size: whenever adding
+an asset takes it over CONTENTSERVER_DISK_CACHE['MAX_SIZE'] bytes, the least
+recently used assets are removed.
+
+Assets are cached as they're streamed to the client which missed them (see
+DiskCacheFillingContent), so that it needn't wait for a large asset to be
+cached first.  Only the process holding an asset's lock file fills it, writing
+to a temporary name and renaming the file into place, so readers never see a
+partly written file.  The cache's total size is kept in a file updated under an
+exclusive lock, so that concurrent writers don't lose each other's updates.
+
+Removing a file which another process is reading is safe: on POSIX the reader
+keeps its open file until it's done.  But files handed off to the web server
+(see the sendfile module) are only opened once the response is returned, so
+recently used files are never evicted.
+"""
+
+
+import errno
+import fcntl
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import six
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# The size of the chunks cached files are read in.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Evictions remove assets until the cache is this fraction of its maximum
+# size, so that a full cache isn't scanned again on every write.
+EVICTION_TARGET = 0.9
+
+# Files used more recently than this many seconds ago aren't evicted, since they
+# may have just been handed off to the web server, which hasn't opened them yet.
+EVICTION_GRACE_PERIOD = 60
+
+# Temporary files last written this many seconds ago were left by fills which
+# died, and are removed by evictions.
+TEMP_FILE_MAX_AGE = 24 * 60 * 60
+
+LOCK_FILE_NAME = '.lock'
+SIZE_FILE_NAME = '.size'
+TEMP_FILE_PREFIX = '.tmp-'
+ASSET_LOCK_FILE_SUFFIX = '.lock'
+
+
+class CachedAssetFile(io.FileIO):
+    """
+    A cached asset's file, read in READ_CHUNK_SIZE chunks when streamed (see StaticContentStream).
+    """
+    def readchunk(self):
+        return self.read(READ_CHUNK_SIZE)
+
+
+class DiskCachedContent(StaticContentStream):
+    """
+    Asset content read from the disk cache.  ``file_name`` is the name of its
+    file, relative to the cache's directory.
+    """
+    def __init__(self, content, file_name, stream):
+        super(DiskCachedContent, self).__init__(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self.file_name = file_name
+
+
+class DiskCacheFillingContent(StaticContentStream):
+    """
+    Asset content streamed from the contentstore, which fills the disk cache
+    with the asset as it's streamed, if it's streamed from its first byte to
+    its last, and no other process is filling the cache with it.
+    """
+    def __init__(self, content, cache):
+        super(DiskCacheFillingContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self._content = content
+        self._cache = cache
+
+    def stream_data(self):
+        return self._fill_while_streaming(self._content.stream_data(), 0)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        return self._fill_while_streaming(self._content.stream_data_in_range(first_byte, last_byte), first_byte)
+
+    def _fill_while_streaming(self, chunks, first_byte):
+        """
+        Yields chunks, the content from first_byte on, writing them to the
+        cache if they start at the beginning of the content.  The cache is
+        only filled once the last chunk is yielded: streams which stop
+        before the end of the content, as when the client goes away, are
+        abandoned.
+        """
+        fill = self._start_fill() if first_byte == 0 else None
+        try:
+            for chunk in chunks:
+                if fill is not None:
+                    try:
+                        fill.write(chunk)
+                    except (IOError, OSError):
+                        log.exception(u"Could not cache content in the disk cache: %s", six.text_type(self.location))
+                        fill.abandon()
+                        fill = None
+                yield chunk
+
+            if fill is not None:
+                completed_fill, fill = fill, None
+                try:
+                    completed_fill.finish()
+                except (IOError, OSError):
+                    log.exception(u"Could not cache content in the disk cache: %s", six.text_type(self.location))
+        finally:
+            if fill is not None:
+                fill.abandon()
+
+    def _start_fill(self):
+        """
+        Returns the DiskCacheFill of this content, or None if it isn't cached by this process.
+        """
+        try:
+            return self._cache.start_fill(self._content)
+        except (IOError, OSError):
+            log.exception(u"Could not cache content in the disk cache: %s", six.text_type(self.location))
+            return None
+
+    def close(self):
+        self._content.close()
+
+    def copy_to_in_mem(self):
+        return self._content.copy_to_in_mem()
+
+
+class DiskCacheFill(object):
+    """
+    The caching of an asset's content by the process holding the asset's lock
+    file.  The content is written to a temporary file, which is renamed into
+    place once all of it is written.
+    """
+    def __init__(self, cache, content, path, lock_file):
+        self.cache = cache
+        self.content = content
+        self.path = path
+        self.size = 0
+        self._lock_file = lock_file
+        file_descriptor, self._temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TEMP_FILE_PREFIX)
+        self._file = os.fdopen(file_descriptor, 'wb')
+
+    def write(self, chunk):
+        """
+        Writes the next chunk of the content.
+        """
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def finish(self):
+        """
+        Caches the written content, if all of it was written, and ends the
+        fill.  Returns whether the content was cached.
+        """
+        try:
+            self._file.close()
+            if self.size != self.content.length:
+                return False
+            # If another process cached the same content meanwhile, this replaces its identical file.
+            replaced = os.path.exists(self.path)
+            os.rename(self._temp_path, self.path)
+            self._temp_path = None
+        finally:
+            self.abandon()
+
+        monitoring_utils.accumulate('contentserver.disk_cache.sets', 1)
+        if not replaced:
+            self.cache._add_size(self.size)  # pylint: disable=protected-access
+        return True
+
+    def abandon(self):
+        """
+        Ends the fill, removing the content written so far, if it wasn't cached.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except OSError:
+                pass
+            self._temp_path = None
+        if self._lock_file is not None:
+            self.cache._unlock_asset(self._lock_file)  # pylint: disable=protected-access
+            self._lock_file = None
+
+
+class DiskAssetCache(object):
+    """
+    A bounded, least recently used, cache of asset content in the files of directory.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def file_name(content):
+        """
+        Returns the name of the file content is cached in, unique to the asset and its version.
+        """
+        version = content.content_digest or six.text_type(content.last_modified_at)
+        key = u'{}\n{}'.format(six.text_type(content.location), version).encode('utf-8')
+        name = hashlib.sha1(key).hexdigest()
+        # Split the files into subdirectories, so that no one directory gets too big.
+        return os.path.join(name[:2], name)
+
+    def get(self, content):
+        """
+        Returns the DiskCachedContent of content, the asset content loaded
+        from the contentstore, or None if it isn't cached.
+        """
+        file_name = self.file_name(content)
+        path = os.path.join(self.directory, file_name)
+        try:
+            stream = CachedAssetFile(path)
+        except (IOError, OSError) as error:
+            if error.errno != errno.ENOENT:
+                log.exception(u"Could not read cached asset: %s", path)
+            monitoring_utils.accumulate('contentserver.disk_cache.misses', 1)
+            return None
+
+        # The modification time orders the files for eviction.
+        try:
+            os.utime(path, None)
+        except (IOError, OSError):
+            pass
+        monitoring_utils.accumulate('contentserver.disk_cache.hits', 1)
+        return DiskCachedContent(content, file_name, stream)
+
+    def set(self, content):
+        """
+        Caches content, the asset content loaded from the contentstore, and
+        returns its DiskCachedContent.  Returns None if content is larger than
+        the cache, or if another process is caching it.
+        """
+        fill = self.start_fill(content)
+        if fill is None:
+            return self.get(content)
+
+        try:
+            for chunk in content.stream_data():
+                fill.write(chunk)
+        except Exception:
+            fill.abandon()
+            raise
+        if not fill.finish():
+            return None
+        return DiskCachedContent(content, self.file_name(content), CachedAssetFile(fill.path))
+
+    def start_fill(self, content):
+        """
+        Starts caching content, the asset content loaded from the contentstore,
+        and returns its DiskCacheFill.  Returns None if content is larger than
+        the cache, already cached, or being cached by another process.
+        """
+        if content.length is None or content.length > self.max_size:
+            return None
+
+        path = os.path.join(self.directory, self.file_name(content))
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process created it first.
+                if not os.path.isdir(directory):
+                    raise
+
+        lock_file = self._lock_asset(path)
+        if lock_file is None:
+            monitoring_utils.accumulate('contentserver.disk_cache.concurrent_fills', 1)
+            return None
+        try:
+            if os.path.exists(path):
+                # Another process cached it since it was missed.
+                self._unlock_asset(lock_file)
+                return None
+            return DiskCacheFill(self, content, path, lock_file)
+        except Exception:
+            self._unlock_asset(lock_file)
+            raise
+
+    def get_or_set(self, content):
+        """
+        Returns the DiskCachedContent of content, caching it first if needed,
+        or None if it can't be cached.
+        """
+        return self.get(content) or self.set(content)
+
+    @contextmanager
+    def _lock(self):
+        """
+        Holds the cache's exclusive lock, shared by all processes.
+        """
+        with open(os.path.join(self.directory, LOCK_FILE_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _lock_asset(path):
+        """
+        Takes the exclusive lock of the asset cached at path, shared by all
+        processes, and returns its open lock file, or None if another process
+        holds it.
+        """
+        lock_file = open(path + ASSET_LOCK_FILE_SUFFIX, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as error:
+            lock_file.close()
+            if error.errno in (errno.EAGAIN, errno.EACCES):
+                return None
+            raise
+        return lock_file
+
+    @staticmethod
+    def _unlock_asset(lock_file):
+        """
+        Removes and releases the lock file of an asset.
+
+        Another process which opened the lock file before it was removed can
+        still take its lock, while a third takes the lock of a new lock file,
+        in which case both cache the same content, which is harmless.
+        """
+        try:
+            os.unlink(lock_file.name)
+        except OSError:
+            pass
+        lock_file.close()
+
+    def _add_size(self, size):
+        """
+        Adds size bytes to the cache's total size, and evicts assets if it's now too big.
+        """
+        size_path = os.path.join(self.directory, SIZE_FILE_NAME)
+        with self._lock():
+            try:
+                with open(size_path) as size_file:
+                    total_size = int(size_file.read())
+            except (IOError, OSError, ValueError):
+                # Missing or corrupted: count the cached files instead.
+                total_size = None
+
+            if total_size is None or total_size + size > self.max_size:
+                total_size = self._evict()
+            else:
+                total_size += size
+
+            with open(size_path, 'w') as size_file:
+                size_file.write(str(total_size))
+
+    def _evict(self):
+        """
+        Removes the least recently used assets until the cache is back under
+        its eviction target, and returns the size of the remaining assets.
+        Must be called with the lock held.
+        """
+        now = time.time()
+        files = []
+        for directory, __, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if directory == self.directory or file_name.endswith(ASSET_LOCK_FILE_SUFFIX):
+                    # The bookkeeping and lock files.
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if not file_name.startswith(TEMP_FILE_PREFIX):
+                    files.append((stat.st_mtime, stat.st_size, path))
+                elif now - stat.st_mtime > TEMP_FILE_MAX_AGE:
+                    # Left by a fill which died.
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+        total_size = sum(size for __, size, __ in files)
+        if total_size <= self.max_size:
+            return total_size
+
+        evicted_size = 0
+        evicted_count = 0
+        target_size = self.max_size * EVICTION_TARGET
+        for modified_at, size, path in sorted(files):
+            if total_size - evicted_size <= target_size:
+                break
+            if now - modified_at < EVICTION_GRACE_PERIOD:
+                # This and all the remaining files were used too recently.
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            evicted_size += size
+            evicted_count += 1
+
+        monitoring_utils.accumulate('contentserver.disk_cache.evictions', evicted_count)
+        monitoring_utils.accumulate('contentserver.disk_cache.evicted_size', evicted_size)
+        return total_size - evicted_size
+
+
+def get_disk_cache():
+    """
+    Returns the DiskAssetCache configured by the CONTENTSERVER_DISK_CACHE setting, or None if it's disabled.
+    """
+    config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', None) or {}
+    if not config.get('DIR'):
+        return None
+    return DiskAssetCache(config['DIR'], config.get('MAX_SIZE', 0))
@@ -0,0 +1,73 @@
+"""
+Tests for the warm_asset_disk_cache management command.
+"""
+
+
+import copy
+import os
+import shutil
+import tempfile
+from uuid import uuid4
+
+import mock
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test.utils import override_settings
+
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.xml_importer import import_course_from_xml
+
+from openedx.core.djangoapps.contentserver.disk_cache import DiskAssetCache
+
+COMMAND_MODULE = 'openedx.core.djangoapps.contentserver.management.commands.warm_asset_disk_cache'
+
+TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
+TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'] = 'test_xcontent_%s' % uuid4().hex
+
+
+@override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
+class TestWarmAssetDiskCache(SharedModuleStoreTestCase):
+    """
+    Tests for the warm_asset_disk_cache management command.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestWarmAssetDiskCache, cls).setUpClass()
+        cls.course_key = modulestore().make_course_key('edX', 'toy', '2012_Fall')
+        import_course_from_xml(
+            modulestore(), 1, settings.COMMON_TEST_DATA_ROOT, ['toy'], static_content_store=contentstore(),
+        )
+
+    def setUp(self):
+        super(TestWarmAssetDiskCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_disabled(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_asset_disk_cache', str(self.course_key))
+
+    def test_invalid_course_key(self):
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIR': self.cache_dir, 'MAX_SIZE': 10 ** 8}):
+            with self.assertRaises(CommandError):
+                call_command('warm_asset_disk_cache', 'not a course key')
+
+    @mock.patch(COMMAND_MODULE + '.CACHED_CONTENT_MAX_SIZE', 0)
+    def test_warm(self):
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIR': self.cache_dir, 'MAX_SIZE': 10 ** 8}):
+            call_command('warm_asset_disk_cache', str(self.course_key))
+
+        assets, count = contentstore().get_all_content_for_course(self.course_key)
+        self.assertGreater(count, 0)
+        cache = DiskAssetCache(self.cache_dir, 10 ** 8)
+        for asset in assets:
+            content = contentstore().find(asset['asset_key'], as_stream=True)
+            self.assertTrue(os.path.exists(os.path.join(self.cache_dir, cache.file_name(content))))
+            content.close()
+
+    def test_small_assets_not_cached(self):
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIR': self.cache_dir, 'MAX_SIZE': 10 ** 8}):
+            call_command('warm_asset_disk_cache', str(self.course_key))
+        self.assertEqual(os.listdir(self.cache_dir), [])
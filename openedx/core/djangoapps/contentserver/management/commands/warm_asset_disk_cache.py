@@ -0,0 +1,68 @@
+"""
+Command to load the assets of courses into the contentserver's disk cache.
+"""
+
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.django import contentstore
+from xmodule.exceptions import NotFoundError
+
+from ...disk_cache import get_disk_cache
+from ...middleware import CACHED_CONTENT_MAX_SIZE
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Caches the assets of courses which are too large for the Django cache in
+    the disk cache, so that the first requests for them don't have to wait on
+    the contentstore.  Run it on each server, since the disk cache is local.
+
+    Example usage:
+        $ ./manage.py lms warm_asset_disk_cache 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+    """
+    help = 'Loads the large assets of one or more courses into the contentserver disk cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='+', help=u'The courses whose assets to cache.')
+
+    def handle(self, *args, **options):
+        disk_cache = get_disk_cache()
+        if disk_cache is None:
+            raise CommandError(u'The disk cache is disabled: set CONTENTSERVER_DISK_CACHE["DIR"].')
+
+        try:
+            course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+        except InvalidKeyError as error:
+            raise CommandError(u'Invalid course key: {}'.format(error))
+
+        for course_key in course_keys:
+            cached_count = 0
+            assets, __ = contentstore().get_all_content_for_course(course_key)
+            for asset in assets:
+                if asset.get('length', 0) < CACHED_CONTENT_MAX_SIZE:
+                    continue
+                try:
+                    content = AssetManager.find(asset['asset_key'], as_stream=True)
+                except NotFoundError:
+                    continue
+
+                try:
+                    cached_content = disk_cache.get_or_set(content)
+                except (IOError, OSError):
+                    log.exception(u'Could not cache asset: %s', asset['asset_key'])
+                    continue
+                finally:
+                    content.close()
+                if cached_content is not None:
+                    cached_content.close()
+                    cached_count += 1
+
+            log.info(u'Cached %d assets of %s in the disk cache.', cached_count, course_key)
@@ -5,6 +5,7 @@ Middleware to serve assets.
 
 import datetime
 import logging
+import uuid
 
 import six
 from django.http import (
@@ -13,7 +14,8 @@ from django.http import (
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseNotModified,
-    HttpResponsePermanentRedirect
+    HttpResponsePermanentRedirect,
+    StreamingHttpResponse
 )
 from django.utils.deprecation import MiddlewareMixin
 from opaque_keys import InvalidKeyError
@@ -23,12 +25,14 @@ from six import text_type
 from openedx.core.djangoapps.header_control import force_header_for_response
 from student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from .caching import get_cached_content, set_cached_content
+from .disk_cache import DiskCachedContent, DiskCacheFillingContent, get_disk_cache
+from .sendfile import get_sendfile_config, sendfile_header
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -43,6 +47,12 @@ except ImportError:
 
 HTTP_DATE_FORMAT = u"%a, %d %b %Y %H:%M:%S GMT"
 
+# Range headers with more ranges than this are ignored, and the full content is sent.
+MAX_RANGES = 20
+
+# Assets smaller than this are kept in the Django cache; larger ones in the disk cache.
+CACHED_CONTENT_MAX_SIZE = 1048576
+
 
 class StaticContentServer(MiddlewareMixin):
     """
@@ -126,18 +136,17 @@ class StaticContentServer(MiddlewareMixin):
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # Assets in the disk cache can be handed off to the web server, which then deals with any Range
+            # header itself.
+            response = self.get_sendfile_response(content)
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if response is None and request.META.get('HTTP_RANGE'):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -151,37 +160,43 @@ class StaticContentServer(MiddlewareMixin):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_RANGES:
+                        # Serving many (possibly overlapping) ranges costs more than the full content.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, text_type(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, text_type(loc)
                         )
                     else:
-                        first, last = ranges[0]
+                        ranges = coalesce_ranges([
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ])
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s",
+                                header_value, text_type(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        if len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = self.make_content_response(
+                                content, content.stream_data_in_range(first, last)
+                            )
                             response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, text_type(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # Content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = self.get_multipart_response(content, ranges)
+                        response.status_code = 206  # Partial Content
+
+                        if newrelic:
+                            newrelic.agent.add_custom_parameter('contentserver.ranged', True)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = self.make_content_response(content, content.stream_data())
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -190,7 +205,6 @@ class StaticContentServer(MiddlewareMixin):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
@@ -201,6 +215,77 @@ class StaticContentServer(MiddlewareMixin):
 
             return response
 
+    @staticmethod
+    def make_content_response(content, chunks, content_type=None):
+        """
+        Returns a response with the body chunks of content, of the content's type
+        unless another content_type is given.
+
+        The chunks of content streamed from the contentstore are sent as they're
+        read, so that serving an asset never holds more than a chunk of it in memory.
+        """
+        content_type = content_type or content.content_type
+        if isinstance(content, StaticContentStream):
+            return StreamingHttpResponse(chunks, content_type=content_type)
+        return HttpResponse(chunks, content_type=content_type)
+
+    def get_multipart_response(self, content, ranges):
+        """
+        Returns a multipart/byteranges response with the (first, last) byte ranges of content.
+        """
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                u'\r\n--{boundary}\r\n'
+                u'Content-Type: {content_type}\r\n'
+                u'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'
+            ).format(
+                boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+            ).encode('utf-8')
+            for first, last in ranges
+        ]
+        closing_boundary = u'\r\n--{boundary}--\r\n'.format(boundary=boundary).encode('utf-8')
+
+        def parts():
+            """
+            Yields the chunks of the multipart body, each range's content as it's read.
+            """
+            for part_header, (first, last) in zip(part_headers, ranges):
+                yield part_header
+                for chunk in content.stream_data_in_range(first, last):
+                    yield chunk
+            yield closing_boundary
+
+        response = self.make_content_response(
+            content, parts(), content_type=u'multipart/byteranges; boundary={}'.format(boundary)
+        )
+        response['Content-Length'] = str(
+            sum(len(part_header) for part_header in part_headers) +
+            sum(last - first + 1 for first, last in ranges) +
+            len(closing_boundary)
+        )
+        return response
+
+    def get_sendfile_response(self, content):
+        """
+        Returns a response handing off sending content to the web server, or None
+        if it should be sent by this process (see the sendfile module).
+        """
+        if not isinstance(content, DiskCachedContent):
+            return None
+        config = get_sendfile_config()
+        if config is None:
+            return None
+
+        # The web server opens the file itself.
+        content.close()
+        response = HttpResponse(content_type=content.content_type)
+        header, value = sendfile_header(config, get_disk_cache().directory, content.file_name)
+        response[header] = value
+        if newrelic:
+            newrelic.agent.add_custom_parameter('contentserver.sendfile', True)
+        return response
+
     def set_caching_headers(self, content, response):
         """
         Sets caching headers based on whether or not the asset is locked.
@@ -284,6 +369,9 @@ class StaticContentServer(MiddlewareMixin):
         """
         Loads an asset based on its location, either retrieving it from a cache
         or loading it directly from the contentstore.
+
+        Assets too large for the cache are read from the disk cache, if it's
+        configured, rather than from the contentstore.
         """
 
         # See if we can load this item from cache.
@@ -298,12 +386,33 @@ class StaticContentServer(MiddlewareMixin):
             # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
             # because it's the default for memcached and also we don't want to do too much
             # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+            if content.length is not None and content.length < CACHED_CONTENT_MAX_SIZE:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
+            else:
+                content = self.load_asset_from_disk_cache(content)
 
         return content
 
+    def load_asset_from_disk_cache(self, content):
+        """
+        Returns content, loaded from the contentstore, from the disk cache
+        instead, if it's cached.  Otherwise returns content as it is, caching
+        it as it's sent, if the disk cache is enabled.
+        """
+        disk_cache = get_disk_cache()
+        if disk_cache is None:
+            return content
+
+        cached_content = disk_cache.get(content)
+        if newrelic:
+            newrelic.agent.add_custom_parameter('contentserver.disk_cached', cached_content is not None)
+        if cached_content is None:
+            # Caching large assets takes a while, so the client isn't made to wait for it.
+            return DiskCacheFillingContent(content, disk_cache)
+        content.close()
+        return cached_content
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -346,3 +455,17 @@ def parse_range_header(header_value, content_length):
         raise ValueError('Invalid syntax')
 
     return unit, ranges
+
+
+def coalesce_ranges(ranges):
+    """
+    Returns the (start, end) tuples of ranges, in order, with any overlapping or
+    adjacent ranges merged, so that no byte is sent more than once.
+    """
+    coalesced = []
+    for first, last in sorted(ranges):
+        if coalesced and first <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(last, coalesced[-1][1]))
+        else:
+            coalesced.append((first, last))
+    return coalesced
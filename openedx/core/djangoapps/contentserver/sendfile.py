@@ -0,0 +1,57 @@
+"""
+Hand-off of asset responses to the web server in front of the LMS/Studio.
+
+When the CONTENTSERVER_SENDFILE setting names a backend, StaticContentServer
+answers requests for assets in the disk cache (see disk_cache) with an empty
+response carrying the header which tells the web server which file to send
+instead (nginx's X-Accel-Redirect or Apache/lighttpd's X-Sendfile).  The web
+server then handles Range requests and the transfer, and the worker is free as
+soon as the headers are written.
+"""
+
+
+import logging
+import os
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+SENDFILE_HEADERS = {
+    X_ACCEL_REDIRECT: 'X-Accel-Redirect',
+    X_SENDFILE: 'X-Sendfile',
+}
+
+
+def get_sendfile_config():
+    """
+    Returns the CONTENTSERVER_SENDFILE setting, or None if no backend is configured.
+    """
+    config = getattr(settings, 'CONTENTSERVER_SENDFILE', None) or {}
+    backend = config.get('BACKEND')
+    if not backend:
+        return None
+    if backend not in SENDFILE_HEADERS:
+        log.error(u"Unknown CONTENTSERVER_SENDFILE backend: %s", backend)
+        return None
+    return config
+
+
+def sendfile_header(config, cache_dir, file_name):
+    """
+    Returns the name and value of the header which hands off sending the
+    file file_name of the disk cache in cache_dir to the web server.
+
+    nginx's X-Accel-Redirect takes a URI, which should be mapped to the cache's
+    directory by an ``internal`` location (URL_PREFIX); X-Sendfile takes the
+    file's path.
+    """
+    backend = config['BACKEND']
+    if backend == X_ACCEL_REDIRECT:
+        value = config.get('URL_PREFIX', '/').rstrip('/') + '/' + file_name.replace(os.sep, '/')
+    else:
+        value = os.path.join(cache_dir, file_name)
+    return SENDFILE_HEADERS[backend], value
@@ -8,7 +8,10 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
 import six
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -30,7 +33,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from ..middleware import coalesce_ranges, parse_range_header, HTTP_DATE_FORMAT, MAX_RANGES, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -240,18 +243,129 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with a part for each range.
         """
-        first_byte = self.length_unlocked / 4
-        last_byte = self.length_unlocked / 2
-        # pylint: disable=unicode-format-string
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = resp.content
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+
+        data = self.contentstore.find(self.unlocked_asset).data
+        boundary = resp['Content-Type'].split('boundary=')[1].encode('utf-8')
+        parts = body.split(b'\r\n--' + boundary)
+        self.assertEqual(parts[0], b'')
+        self.assertEqual(parts[-1], b'--\r\n')
+        expected_ranges = [(first_byte, last_byte), (self.length_unlocked - 100, self.length_unlocked - 1)]
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, part_data = part.split(b'\r\n\r\n', 1)
+            self.assertIn(
+                u'Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked).encode('utf-8'), headers
+            )
+            self.assertEqual(part_data, data[first:last + 1])
+
+    def test_range_request_overlapping_ranges(self):
+        """
+        Test that overlapping ranges are merged, and sent as a single range if they all overlap.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-19, 0-14, 20-29')
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], u'bytes 0-29/{}'.format(self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '30')
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that a Range header with too many ranges outputs the full content.
+        """
+        header_value = 'bytes=' + ', '.join('{0}-{0}'.format(byte) for byte in range(MAX_RANGES + 1))
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE=header_value)
+
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    def disable_cache(self):
+        """
+        Make the contentserver skip the Django cache, so that assets are loaded from the disk cache.
+        """
+        for name, value in (('get_cached_content', lambda location: None), ('CACHED_CONTENT_MAX_SIZE', 0)):
+            patcher = patch('openedx.core.djangoapps.contentserver.middleware.' + name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_disk_cache_dir(self):
+        """
+        Returns a new directory for the disk cache, removed after the test.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        return cache_dir
+
+    def cached_files(self, cache_dir):
+        """
+        Returns the names of the assets cached in the disk cache in cache_dir.
+        """
+        return [
+            file_name
+            for directory, __, file_names in os.walk(cache_dir)
+            for file_name in file_names
+            if directory != cache_dir and not file_name.endswith('.lock')
+        ]
+
+    def test_disk_cache(self):
+        """
+        Test that assets too large for the Django cache are cached in the disk
+        cache as they're sent, and then served from it.
+        """
+        self.disable_cache()
+        cache_dir = self.make_disk_cache_dir()
+        data = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIR': cache_dir, 'MAX_SIZE': 10000}):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-19')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(b''.join(resp.streaming_content), data[10:20])
+            # Only assets sent from their start are cached.
+            self.assertEqual(self.cached_files(cache_dir), [])
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(b''.join(resp.streaming_content), data)
+            self.assertEqual(len(self.cached_files(cache_dir)), 1)
+
+            with patch('openedx.core.djangoapps.contentserver.middleware.DiskCacheFillingContent') as mock_filling:
+                resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-19')
+                self.assertEqual(resp.status_code, 206)
+                self.assertEqual(b''.join(resp.streaming_content), data[10:20])
+            self.assertFalse(mock_filling.called)
+
+    def test_sendfile(self):
+        """
+        Test that assets in the disk cache are handed off to the web server when configured.
+        """
+        self.disable_cache()
+        cache_dir = self.make_disk_cache_dir()
+        data = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(
+            CONTENTSERVER_DISK_CACHE={'DIR': cache_dir, 'MAX_SIZE': 10000},
+            CONTENTSERVER_SENDFILE={'BACKEND': 'x-accel-redirect', 'URL_PREFIX': '/protected/'},
+        ):
+            # Assets which aren't cached yet are sent, and cached, by the contentserver.
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(b''.join(resp.streaming_content), data)
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, b'')
+        self.assertTrue(resp['X-Accel-Redirect'].startswith('/protected/'))
+        cached_path = os.path.join(cache_dir, resp['X-Accel-Redirect'][len('/protected/'):])
+        with open(cached_path, 'rb') as cached_file:
+            self.assertEqual(cached_file.read(), data)
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -446,3 +560,20 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegex(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+@ddt.ddt
+class CoalesceRangesTestCase(unittest.TestCase):
+    """
+    Tests for the coalesce_ranges function.
+    """
+    @ddt.data(
+        ([(100, 199)], [(100, 199)]),
+        ([(200, 299), (100, 199)], [(100, 299)]),
+        ([(100, 199), (300, 399)], [(100, 199), (300, 399)]),
+        ([(9900, 9999), (9800, 9999)], [(9800, 9999)]),
+        ([(0, 500), (100, 199), (300, 600)], [(0, 600)]),
+    )
+    @ddt.unpack
+    def test_coalesce_ranges(self, ranges, expected_ranges):
+        self.assertEqual(coalesce_ranges(ranges), expected_ranges)
@@ -0,0 +1,190 @@
+"""
+Tests for the contentserver's disk cache
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from io import BytesIO
+
+from mock import patch
+
+from xmodule.contentstore.content import StaticContentStream
+
+from ..disk_cache import (
+    SIZE_FILE_NAME,
+    TEMP_FILE_MAX_AGE,
+    TEMP_FILE_PREFIX,
+    DiskAssetCache,
+    DiskCachedContent,
+    DiskCacheFillingContent
+)
+
+
+def make_content(name, data, digest=None):
+    """
+    Returns asset content, as loaded from the contentstore, with the given data.
+    """
+    return StaticContentStream(
+        u'/asset-v1:edX+toy+2012_Fall+type@asset+block@{}'.format(name), name, 'application/pdf', BytesIO(data),
+        length=len(data), content_digest=digest or name,
+    )
+
+
+class DiskAssetCacheTest(unittest.TestCase):
+    """
+    Tests for DiskAssetCache
+    """
+    def setUp(self):
+        super(DiskAssetCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = DiskAssetCache(self.directory, 130)
+
+        patcher = patch('openedx.core.djangoapps.contentserver.disk_cache.monitoring_utils')
+        self.mock_monitoring = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, content):
+        """
+        Returns all of the data of content.
+        """
+        data = b''.join(content.stream_data())
+        content.close()
+        return data
+
+    def metrics(self):
+        """
+        Returns the totals of the metrics reported so far.
+        """
+        totals = {}
+        for call in self.mock_monitoring.accumulate.call_args_list:
+            name, value = call[0]
+            totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def cached_file_names(self):
+        """
+        Returns the names of the cached files, excluding the bookkeeping files.
+        """
+        return sorted(
+            file_name
+            for directory, __, file_names in os.walk(self.directory)
+            for file_name in file_names
+            if directory != self.directory
+        )
+
+    def test_get_or_set(self):
+        content = make_content('a.pdf', b'a' * 30)
+        self.assertIsNone(self.cache.get(content))
+
+        cached_content = self.cache.get_or_set(content)
+        self.assertIsInstance(cached_content, DiskCachedContent)
+        self.assertEqual(self.read(cached_content), b'a' * 30)
+        self.assertEqual(cached_content.content_digest, 'a.pdf')
+
+        cached_content = self.cache.get_or_set(make_content('a.pdf', b'not read'))
+        self.assertEqual(self.read(cached_content), b'a' * 30)
+        self.assertEqual(self.metrics(), {
+            'contentserver.disk_cache.misses': 2,
+            'contentserver.disk_cache.hits': 1,
+            'contentserver.disk_cache.sets': 1,
+        })
+
+    def test_new_version(self):
+        self.cache.set(make_content('a.pdf', b'old', digest='1'))
+        self.assertIsNone(self.cache.get(make_content('a.pdf', b'new', digest='2')))
+
+    def test_too_large(self):
+        self.assertIsNone(self.cache.set(make_content('a.pdf', b'a' * 131)))
+        self.assertEqual(self.cached_file_names(), [])
+
+    def test_eviction(self):
+        names = ['a.pdf', 'b.pdf', 'c.pdf']
+        for index, name in enumerate(names):
+            self.cache.set(make_content(name, b'x' * 40)).close()
+            # Make the files' modification times distinct.
+            path = os.path.join(self.directory, DiskAssetCache.file_name(make_content(name, b'')))
+            os.utime(path, (index, index))
+
+        # Using a.pdf makes b.pdf the least recently used.
+        self.cache.get(make_content('a.pdf', b'')).close()
+        self.cache.set(make_content('d.pdf', b'x' * 40)).close()
+
+        self.assertIsNone(self.cache.get(make_content('b.pdf', b'')))
+        self.assertIsNone(self.cache.get(make_content('c.pdf', b'')))
+        self.assertIsNotNone(self.cache.get(make_content('a.pdf', b'')))
+        self.assertEqual(len(self.cached_file_names()), 2)
+        with open(os.path.join(self.directory, SIZE_FILE_NAME)) as size_file:
+            self.assertEqual(size_file.read(), '80')
+
+        metrics = self.metrics()
+        self.assertEqual(metrics['contentserver.disk_cache.evictions'], 2)
+        self.assertEqual(metrics['contentserver.disk_cache.evicted_size'], 80)
+
+    def test_lost_size(self):
+        self.cache.set(make_content('a.pdf', b'x' * 40)).close()
+        os.remove(os.path.join(self.directory, SIZE_FILE_NAME))
+        self.cache.set(make_content('b.pdf', b'x' * 40)).close()
+        with open(os.path.join(self.directory, SIZE_FILE_NAME)) as size_file:
+            self.assertEqual(size_file.read(), '80')
+
+    def test_eviction_grace_period(self):
+        # Files used within the grace period, which may have just been handed off to the web server, are kept.
+        for name in ['a.pdf', 'b.pdf', 'c.pdf', 'd.pdf']:
+            self.cache.set(make_content(name, b'x' * 40)).close()
+
+        self.assertEqual(len(self.cached_file_names()), 4)
+        self.assertEqual(self.metrics().get('contentserver.disk_cache.evictions', 0), 0)
+
+    def test_stale_temp_files(self):
+        directory = os.path.join(self.directory, 'ab')
+        os.makedirs(directory)
+        stale_path = os.path.join(directory, TEMP_FILE_PREFIX + 'stale')
+        recent_path = os.path.join(directory, TEMP_FILE_PREFIX + 'recent')
+        for path in (stale_path, recent_path):
+            with open(path, 'wb') as temp_file:
+                temp_file.write(b'x' * 40)
+        stale_time = time.time() - TEMP_FILE_MAX_AGE - 1
+        os.utime(stale_path, (stale_time, stale_time))
+
+        self.cache._evict()  # pylint: disable=protected-access
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(recent_path))
+
+    def test_concurrent_fills(self):
+        content = make_content('a.pdf', b'a' * 30)
+        fill = self.cache.start_fill(content)
+        self.assertIsNotNone(fill)
+        # Only one process fills an asset at once.
+        self.assertIsNone(self.cache.start_fill(make_content('a.pdf', b'a' * 30)))
+        self.assertIsNone(self.cache.set(make_content('a.pdf', b'a' * 30)))
+
+        fill.write(b'a' * 30)
+        self.assertTrue(fill.finish())
+        # Cached assets aren't filled again.
+        self.assertIsNone(self.cache.start_fill(content))
+        self.assertEqual(self.cached_file_names(), [DiskAssetCache.file_name(content).split(os.sep)[-1]])
+        self.assertEqual(self.metrics()['contentserver.disk_cache.concurrent_fills'], 2)
+
+    def test_filling_content(self):
+        content = DiskCacheFillingContent(make_content('a.pdf', b'abcdef' * 5), self.cache)
+        self.assertEqual(b''.join(content.stream_data_in_range(6, 11)), b'abcdef')
+        self.assertIsNone(self.cache.get(content))
+
+        self.assertEqual(b''.join(content.stream_data()), b'abcdef' * 5)
+        self.assertEqual(self.read(self.cache.get(content)), b'abcdef' * 5)
+
+    def test_abandoned_fill(self):
+        content = DiskCacheFillingContent(make_content('a.pdf', b'a' * 30), self.cache)
+        chunks = content.stream_data()
+        self.assertEqual(next(chunks), b'a' * 30)
+        # The client went away before the end of the content.
+        chunks.close()
+
+        self.assertIsNone(self.cache.get(content))
+        self.assertEqual(self.cached_file_names(), [])
+        self.assertIsNotNone(self.cache.start_fill(content))
@@ -6,6 +6,7 @@ Utilities related to caching.
 import collections
 import functools
 import itertools
+import threading
 import zlib
 
 import six
@@ -153,6 +154,156 @@ class process_cached(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+class ByteSizeLRUCache(object):
+    """
+    A thread-safe, process-local LRU cache whose capacity is bounded by
+    the total byte size of its values rather than by their number.
+
+    Values are evicted in least-recently-used order once the total size
+    exceeds max_bytes.  Values larger than max_bytes are never cached.
+    Counters of hits, misses and evictions are kept for monitoring.
+
+    WARNING: Only cache values that are immutable or never mutated by
+    callers, since the very same object is returned on every hit.
+    """
+
+    def __init__(self, max_bytes, sizeof=len):
+        """
+        Arguments:
+            max_bytes (int) - The maximum total size of cached values.
+            sizeof (function: value->int) - Function returning the byte
+                size of a value.
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for the given key, marking it as most
+        recently used; returns default if not found.
+        """
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Caches the given value for the given key, evicting least
+        recently used values as needed.
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Removes the value cached for the given key, if any.
+        """
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        """
+        Removes all cached values and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        """
+        Removes the entry for the given key, if any.  Must be called
+        with the lock held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+
+
+class LRUCache(object):
+    """
+    A thread-safe, process-local LRU cache holding at most max_size values.
+
+    WARNING: Only cache values that are immutable or never mutated by
+    callers, since the very same object is returned on every hit.
+    """
+
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum number of cached values.
+        """
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for the given key, marking it as most
+        recently used; returns default if not found.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Caches the given value for the given key, evicting the least
+        recently used value if the cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.max_size <= 0:
+                return
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Removes the value cached for the given key, if any.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all cached values.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
 class CacheInvalidationManager:
     """
     This class provides a decorator for simple functions, which can handle invalidation.
@@ -9,7 +9,7 @@ import ddt
 from mock import Mock
 
 from edx_django_utils.cache import RequestCache
-from openedx.core.lib.cache_utils import request_cached
+from openedx.core.lib.cache_utils import ByteSizeLRUCache, LRUCache, request_cached
 import six
 
 
@@ -297,3 +297,74 @@ class TestRequestCachedDecorator(TestCase):
         result = wrapped(3)
         self.assertEqual(result, 2)
         self.assertEqual(to_be_wrapped.call_count, 2)
+
+
+class TestByteSizeLRUCache(TestCase):
+    """
+    Test the ByteSizeLRUCache class.
+    """
+    def setUp(self):
+        super(TestByteSizeLRUCache, self).setUp()
+        self.cache = ByteSizeLRUCache(max_bytes=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', b'12345')
+        self.assertEqual(self.cache.get('a'), b'12345')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.current_bytes, 5)
+
+    def test_eviction_by_size(self):
+        self.cache.set('a', b'1234')
+        self.cache.set('b', b'1234')
+        self.cache.get('a')
+        self.cache.set('c', b'1234')
+
+        # 'b' was the least recently used value.
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), b'1234')
+        self.assertEqual(self.cache.get('c'), b'1234')
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual(self.cache.current_bytes, 8)
+
+    def test_replace_and_delete(self):
+        self.cache.set('a', b'1234')
+        self.cache.set('a', b'123456')
+        self.assertEqual(self.cache.current_bytes, 6)
+        self.cache.delete('a')
+        self.assertEqual(self.cache.current_bytes, 0)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_too_large_value(self):
+        self.cache.set('a', b'12345678901')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.current_bytes, 0)
+
+
+class TestLRUCache(TestCase):
+    """
+    Test the LRUCache class.
+    """
+    def setUp(self):
+        super(TestLRUCache, self).setUp()
+        self.cache = LRUCache(max_size=2)
+
+    def test_eviction_by_count(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        # 'b' was the least recently used value.
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_replace_and_delete(self):
+        self.cache.set('a', 1)
+        self.cache.set('a', 2)
+        self.assertEqual(self.cache.get('a'), 2)
+        self.cache.delete('a')
+        self.assertEqual(len(self.cache), 0)
@@ -20,6 +20,7 @@ from openedx.core.lib.xblock_utils import (
     replace_course_urls,
     replace_jump_to_id_urls,
     replace_static_urls,
+    replace_urls,
     request_token,
     sanitize_html_id,
     wrap_fragment,
@@ -177,6 +178,31 @@ class TestXblockUtils(SharedModuleStoreTestCase):
         self.assertIsInstance(test_replace, Fragment)
         self.assertEqual(test_replace.content, anchor_tag)
 
+    @ddt.data(
+        ('course_mongo', '/courses/TestX/TS01/2015/', '/c4x/TestX/TS01/asset/id'),
+        ('course_split', '/courses/course-v1:TestX+TS02+2015/', '/asset-v1:TestX+TS02+2015+type@asset+block/id')
+    )
+    @ddt.unpack
+    def test_replace_urls(self, course_id, course_url, static_url):
+        """
+        Verify that the static, course and jump-to URLs have been replaced.
+        """
+        course = getattr(self, course_id)
+        test_replace = replace_urls(
+            course_id=course.id,
+            jump_to_id_base_url='/base_url/',
+            data_dir=None,
+            block=course,
+            view='baseview',
+            frag=Fragment('<a href="/static/id"><a href="/course/id"><a href="/jump_to_id/id">'),
+            context=None
+        )
+        self.assertIsInstance(test_replace, Fragment)
+        self.assertEqual(
+            test_replace.content,
+            '<a href="{}"><a href="{}id"><a href="/base_url/id">'.format(static_url, course_url)
+        )
+
     def test_sanitize_html_id(self):
         """
         Verify that colons and dashes are replaced.